@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.core.metrics import LatencyHistogram
+
+T = TypeVar('T')
+
+# Faixas (em segundos) dos histogramas de espera na fila e de duracao dos hashes
+HASH_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class HashingPoolFull(Exception):
+    # Lancada quando todas as threads de hash estao ocupadas e a fila de espera esta cheia
+    pass
+
+
+class HashingPool:
+    # Executa os hashes e verificacoes de senha (Argon2) em um pool de threads proprio, separado das threads que
+    # atendem as requisicoes da API. O argon2 libera o GIL durante o calculo, entao as threads rodam em paralelo, e o
+    # tamanho do pool limita a CPU e a memoria (memory_cost por hash) usadas ao mesmo tempo. Quando as threads e a fila
+    # de espera estao cheias, novos pedidos sao recusados na hora (HashingPoolFull), em vez de acumular requisicoes
+    # esperando e ocupando as threads que atendem os endpoints de dados.
+    #
+    # Arguments:
+    #   password_hash: Objeto do pwdlib que calcula e verifica os hashes
+    #   max_workers: Quantidade de hashes calculados ao mesmo tempo
+    #   max_queue: Quantidade de pedidos que podem esperar por uma thread livre
+    def __init__(self, password_hash: PasswordHash, max_workers: int, max_queue: int):
+        self.password_hash = password_hash
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.queued = self.running = 0
+        self.completed = self.rejected = self.errors = 0
+        self.wait_seconds = LatencyHistogram(HASH_LATENCY_BUCKETS)
+        self.hash_seconds = LatencyHistogram(HASH_LATENCY_BUCKETS)
+
+    def _submit(self, function: Callable[..., T], *args) -> Future:
+        # Agenda o calculo no pool, ou lanca HashingPoolFull se as threads e a fila estiverem cheias. A vaga eh liberada
+        # quando o calculo termina (veja _done)
+        if not self._slots.acquire(blocking = False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolFull()
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def task() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds.observe(started - submitted)
+            try:
+                return function(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.hash_seconds.observe(time.perf_counter() - started)
+
+        future = self._executor.submit(task)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self.errors += 1
+            else:
+                self.completed += 1
+
+    def hash(self, password: str) -> str:
+        return self._submit(self.password_hash.hash, password).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(self.password_hash.verify, password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        # Mesma funcao de hash(), para endpoints assincronos: a espera pelo resultado nao bloqueia o event loop
+        return await asyncio.wrap_future(self._submit(self.password_hash.hash, password))
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(self.password_hash.verify, password, hashed_password))
+
+    def stats(self) -> dict:
+        # Retorna a fila de espera, os hashes em execucao, os contadores e os histogramas de espera e de duracao
+        with self._lock:
+            return {'max_workers': self.max_workers, 'max_queue': self.max_queue, 'queue_depth': self.queued,
+                    'running': self.running, 'completed': self.completed, 'rejected': self.rejected,
+                    'errors': self.errors, 'wait_seconds': self.wait_seconds.snapshot(),
+                    'hash_seconds': self.hash_seconds.snapshot()}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait = False, cancel_futures = True)
+
+
+def argon2_password_hash(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHash:
+    # Cria o objeto do pwdlib com os parametros de custo do Argon2. Hashes gravados com outros parametros continuam
+    # sendo verificados normalmente, pois os parametros ficam gravados no proprio hash.
+    #
+    # Arguments:
+    #   time_cost: Quantidade de iteracoes
+    #   memory_cost: Memoria usada por hash (em KiB)
+    #   parallelism: Quantidade de linhas (threads) do Argon2
+    return PasswordHash((Argon2Hasher(time_cost = time_cost, memory_cost = memory_cost, parallelism = parallelism),))
+
+
+def hashing_pool_full() -> HTTPException:
+    # Resposta 429 enviada quando o pool de hashes esta saturado
+    return HTTPException(
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        detail='Too many authentication requests, try again later.',
+        headers={'Retry-After': '1'},
+    )
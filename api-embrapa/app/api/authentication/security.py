@@ -4,25 +4,21 @@ from http import HTTPStatus
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
-from pwdlib import PasswordHash
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from zoneinfo import ZoneInfo
 
 from app.models.users_db import User
-from app.core.database import SessionLocal
+from app.core.database import get_async_db
 from app.api.authentication.schemas import TokenData
 from app.api.authentication.settings import Settings
+from app.api.authentication.user_cache import UserCache
+from app.api.authentication.hashing import HashingPool, HashingPoolFull, argon2_password_hash, hashing_pool_full
 
 settings = Settings()
-pwd_context = PasswordHash.recommended()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+pwd_context = argon2_password_hash(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM)
+hashing_pool = HashingPool(pwd_context, settings.HASH_MAX_WORKERS, settings.HASH_MAX_QUEUE)
+user_cache = UserCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_SIZE)
 
 def create_access_token(data: dict):
     # Cria um JWT com base nas informacoes contidas no arquivo .env (importadas atraves da constante settings)
@@ -42,31 +38,41 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_password_hash(password: str):
-    # Cria um hash a partir do algoritmo argon2 para a senha desejada
+async def get_password_hash(password: str):
+    # Cria um hash a partir do algoritmo argon2 para a senha desejada, no pool de hashes (hashing_pool). Se o pool
+    # estiver saturado, responde 429
     #
     # Arguments:
     #   password: É um parâmetro contendo a senha
-    return pwd_context.hash(password)
+    try:
+        return await hashing_pool.hash_async(password)
+    except HashingPoolFull:
+        raise hashing_pool_full()
 
 
-def verify_password(plain_password: str, hashed_password: str):
+async def verify_password(plain_password: str, hashed_password: str):
     # Verifica se o hash da senha em texto puro eh o mesmo que o hash sendo fornecido
     #
     # Arguments:
     #   plain_password: É um parâmetro contendo a senha desejada
     #   hashed_password: É um parâmetro contendo o hash desejado (a ser comparado com o hash a ser calculado
     #                       baseado na senha fornecida no parâmetro anterior)
-    return pwd_context.verify(plain_password, hashed_password)
+    #
+    # A verificacao roda no pool de hashes (hashing_pool); se o pool estiver saturado, responde 429
+    try:
+        return await hashing_pool.verify_async(plain_password, hashed_password)
+    except HashingPoolFull:
+        raise hashing_pool_full()
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
 ):
-    # Verifica se o usuario existe no Banco de dados e se o JWT do mesmo ainda eh valido
+    # Verifica se o usuario existe no Banco de dados e se o JWT do mesmo ainda eh valido. Tokens ja validados ficam
+    # no cache de usuarios (user_cache) por alguns segundos, sem decodificar o JWT nem consultar o banco novamente
     #
     # Arguments:
     #   token: É um parâmetro contendo as informacoes do token JWT do usuario
@@ -77,6 +83,11 @@ def get_current_user(
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    generation = user_cache.generation()
+
     try:
         payload = decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -90,8 +101,11 @@ def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    db_user = db.query(User).filter(User.email == token_data.email).first()
+    db_user = (await db.execute(select(User).where(User.email == token_data.email))).scalars().first()
     if not db_user:
         raise credentials_exception
 
+    # O usuario eh desvinculado da sessao para que possa ser reutilizado por outras requisicoes
+    db.expunge(db_user)
+    user_cache.put(token, db_user, payload.get('exp'), generation)
     return db_user
\ No newline at end of file
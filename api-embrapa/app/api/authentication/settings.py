@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,3 +13,22 @@ class Settings(BaseSettings):
     ALGORITHM: str # Algoritmo utilizado para geracao dos tokens JWT
     ACCESS_TOKEN_EXPIRE_MINUTES: int # Tempo de expiracao (em minutos) dos tokens JWT
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None # URL usada pelo engine assincrono (padrao: DATABASE_URL com o driver assincrono)
+
+    # Pool de conexoes de cada engine: conexoes mantidas abertas, conexoes extras permitidas nos picos, espera maxima (em
+    # segundos) por uma conexao livre, tempo (em segundos) apos o qual uma conexao eh reaberta e teste da conexao antes do uso
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    DB_SLOW_QUERY_SECONDS: float = 0.5 # Consultas com pelo menos essa duracao (em segundos) sao contadas como lentas
+    AUTH_CACHE_TTL_SECONDS: int = 30 # Tempo (em segundos) que um usuario autenticado fica em cache (0 desativa o cache)
+    AUTH_CACHE_MAX_SIZE: int = 10000 # Quantidade maxima de tokens mantidos no cache de usuarios autenticados
+
+    # Custo do Argon2 usado nos novos hashes de senha: iteracoes, memoria por hash (em KiB) e paralelismo
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    HASH_MAX_WORKERS: int = 2 # Quantidade de hashes de senha calculados ao mesmo tempo
+    HASH_MAX_QUEUE: int = 16 # Pedidos de hash que podem esperar na fila; acima disso a API responde 429
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from app.models.users_db import User
+
+
+class UserCache:
+    # Cache em memória (por processo) dos usuários autenticados, indexado pelo token JWT, para que get_current_user não
+    # precise decodificar o token e consultar o banco a cada requisição. Cada entrada vale por "ttl" segundos (ou até
+    # a expiração do token, o que vier antes) e as entradas usadas há mais tempo são removidas quando o cache passa de
+    # "max_size" entradas. Alterar ou remover um usuário deve chamar invalidate(email), que remove os tokens dele.
+    #
+    # Arguments:
+    #   ttl: Tempo (em segundos) que um usuário fica no cache. Zero desativa o cache.
+    #   max_size: Quantidade máxima de tokens armazenados
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._entries: OrderedDict[str, tuple['User', float]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, token: str) -> Optional['User']:
+        # Retorna o usuário do token, ou None se o token não estiver no cache ou se a entrada tiver expirado
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: 'User', token_expires_at: Optional[float], generation: int) -> None:
+        # Armazena o usuário (já desvinculado da sessão do banco) do token. O usuário não é armazenado se algum usuário
+        # tiver sido alterado ou removido depois de "generation" (obtida com generation() antes da consulta ao banco)
+        #
+        # Arguments:
+        #   token: Token JWT recebido na requisição
+        #   user: Usuário do token
+        #   token_expires_at: Expiração do token (campo "exp", timestamp Unix), se houver
+        #   generation: Geração do cache no início da consulta
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, time.monotonic() + token_expires_at - time.time())
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+
+    def invalidate(self, email: str) -> int:
+        # Remove os tokens do usuário com o e-mail informado e retorna quantos foram removidos
+        with self._lock:
+            self._generation += 1
+            tokens = [token for token, (user, _) in self._entries.items() if user.email == email]
+            for token in tokens:
+                del self._entries[token]
+            self.invalidations += 1
+            return len(tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'entries': len(self._entries), 'max_size': self.max_size,
+                    'ttl_seconds': self.ttl}
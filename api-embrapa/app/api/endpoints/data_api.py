@@ -1,118 +1,506 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Annotated
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Annotated, Any, Awaitable, Callable, MutableMapping
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.users_db import User
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, get_async_db
 from typing import Optional, List
 from app.models.production_scraped_data import ProductionScrapedData
 from app.models.comercialization_scraped_data import ComercializationScrapedData    
 from app.models.processing_scraped_data import ProcessingScrapedData
 from app.models.import_scraped_data import ImportScrapedData
 from app.models.export_scraped_data import ExportScrapedData
+from app.models.trend_data import TrendYearlyData, TrendGrowthData
 from app.api.authentication.security import get_current_user
+from app.core.aggregations import MEASURE_COLUMNS, aggregate_query, split_list
+from app.core.result_cache import result_cache
+from app.core.snapshots import MEDIA_TYPE as PARQUET_MEDIA_TYPE, snapshot_store
+from app.core.trends import trend_cache_table
+from app.scrapper.scrap import abas
+from app.scrapper.registry import ABAS
+import pyarrow as pa
+import pyarrow.parquet as pq
+import base64
+import csv
+import hashlib
+import io
+import json
 
 router = APIRouter()
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
-def get_db():
-    db = SessionLocal()
+# Quantidade de linhas por página: padrão e máximo aceito no parâmetro "limit"
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+# Ordenações aceitas no parâmetro "sort" (o prefixo "-" indica ordem decrescente). A ordenação por ano usa o id
+# como desempate, para que o cursor identifique uma única linha.
+SORT_KEYS = {'id': ('id',), '-id': ('id',), 'ano': ('ano', 'id'), '-ano': ('ano', 'id')}
+SORT_PATTERN = '^-?(id|ano)$'
+
+# Formatos de exportação em streaming (parâmetro "format" ou cabeçalho Accept) e linhas lidas do banco por vez
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+FORMAT_PATTERN = '^(json|ndjson|csv)$'
+STREAM_BATCH_SIZE = 1000
+
+# Modelo (tabela) de cada aba do site da Embrapa
+ABA_MODELS = {aba: spec.model for aba, spec in ABAS.items()}
+
+def encode_cursor(values: list) -> str:
+    # Cursor opaco com os valores das colunas de ordenação da última linha retornada
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, size: int) -> list:
     try:
-        yield db
-    finally:
-        db.close()
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code = 400, detail = "Invalid cursor")
+    return values
+
+async def keyset_page(db: AsyncSession, headers: MutableMapping[str, str], model, ano: Optional[int], limit: int,
+                      cursor: Optional[str], sort: str) -> list[dict]:
+    # Retorna uma página de linhas da tabela do modelo, paginada pela chave de ordenação (keyset): em vez de OFFSET,
+    # a consulta continua a partir dos valores da última linha da página anterior, usando o índice da chave primária.
+    # O total de linhas (com o filtro de ano) vai no cabeçalho X-Total-Count e o cursor da próxima página no
+    # cabeçalho X-Next-Cursor, ausente na última página.
+    #
+    # Arguments:
+    #   db: Sessão do banco de dados
+    #   headers: Cabeçalhos da resposta, que recebem os cabeçalhos de paginação
+    #   model: Modelo (tabela) a ser consultado
+    #   ano: Se for informado, retorna apenas as linhas desse ano
+    #   limit: Quantidade máxima de linhas da página
+    #   cursor: Valor do cabeçalho X-Next-Cursor da página anterior; se for nulo, retorna a primeira página
+    #   sort: Ordenação das linhas (id, -id, ano ou -ano)
+    table = model.__table__
+    descending = sort.startswith('-')
+    key_columns = [table.c[column] for column in SORT_KEYS[sort]]
+    filters = [table.c.ano == ano] if ano is not None else []
+
+    headers['X-Total-Count'] = str(await db.scalar(select(func.count()).select_from(table).where(*filters)))
+
+    query = select(*table.columns).where(*filters)
+    if cursor is not None:
+        # (ano, id) > (último ano, último id), escrito sem comparação de tuplas para funcionar em qualquer banco
+        values = decode_cursor(cursor, len(key_columns))
+        after = lambda column, value: column < value if descending else column > value
+        conditions = [and_(*[column == value for column, value in zip(key_columns[:n], values[:n])],
+                           after(key_columns[n], values[n]))
+                      for n in range(len(key_columns))]
+        query = query.where(or_(*conditions))
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in key_columns]).limit(limit + 1)
+
+    # Uma linha a mais é buscada apenas para saber se existe uma próxima página
+    rows = [dict(row) for row in (await db.execute(query)).mappings()]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_cursor([rows[-1][column.name] for column in key_columns])
+    return rows
+
+def stream_format(format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    # Define se a resposta deve ser exportada em streaming: o parâmetro "format" tem prioridade sobre o cabeçalho Accept.
+    # Retorna "ndjson", "csv" ou None (resposta JSON paginada)
+    if format is not None:
+        return format if format in STREAM_FORMATS else None
+    for media_type in (accept or '').split(','):
+        media_type = media_type.split(';')[0].strip()
+        for name, stream_media_type in STREAM_FORMATS.items():
+            if media_type == stream_media_type:
+                return name
+    return None
+
+async def iter_rows(model, ano: Optional[int], sort: str, export_format: str):
+    # Gera o conteúdo da exportação em blocos de STREAM_BATCH_SIZE linhas, lidas do banco com um cursor do lado do
+    # servidor (stream_results), para que a memória usada não dependa do tamanho da tabela. O gerador abre a sua
+    # própria sessão, pois é executado depois que a função do endpoint (e a sessão recebida por ela) já terminou.
+    table = model.__table__
+    descending = sort.startswith('-')
+    query = select(*table.columns).order_by(*[table.c[column].desc() if descending else table.c[column].asc()
+                                              for column in SORT_KEYS[sort]])
+    if ano is not None:
+        query = query.where(table.c.ano == ano)
+    columns = [column.name for column in table.columns]
+
+    async with AsyncSessionLocal() as db:
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator = '\n')
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        result = await db.stream(query.execution_options(yield_per = STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            if export_format == 'csv':
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii = False, default = str) + '\n'
+                              for row in rows)
+
+def stream_table(model, ano: Optional[int], sort: str, export_format: str) -> StreamingResponse:
+    # Exporta a tabela inteira do modelo (com o filtro de ano, se houver) em NDJSON ou CSV, em streaming
+    media_type = STREAM_FORMATS[export_format]
+    filename = f"{model.__tablename__}{f'_{ano}' if ano is not None else ''}.{export_format}"
+    return StreamingResponse(iter_rows(model, ano, sort, export_format), media_type = f'{media_type}; charset=utf-8',
+                             headers = {'Content-Disposition': f'attachment; filename="{filename}"'})
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Indica se o cabeçalho If-None-Match da requisição contém o ETag da resposta, caso em que a resposta é 304 sem
+    # conteúdo. O cabeçalho pode ter uma lista de ETags separadas por vírgula ou "*" (qualquer versão), e a comparação
+    # ignora o prefixo "W/" dos ETags fracos, como define o If-None-Match (RFC 9110)
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in tags]
+
+async def cached_json(table: str, key: tuple, compute: Callable[[dict[str, str]], Awaitable[Any]],
+                      if_none_match: Optional[str]) -> Response:
+    # Retorna a resposta JSON de uma consulta usando o cache de respostas: a mesma consulta (tabela e parâmetros) só
+    # chega ao banco de novo depois que um scrap da aba invalida o cache da tabela. O cabeçalho X-Cache indica se a
+    # resposta veio do cache (HIT) ou do banco (MISS), e o ETag permite que o cliente receba 304 (sem conteúdo) quando
+    # já tiver a mesma resposta.
+    #
+    # Arguments:
+    #   table: Nome da tabela consultada
+    #   key: Parâmetros da consulta
+    #   compute: Função que faz a consulta e retorna o conteúdo da resposta, recebendo os cabeçalhos a serem preenchidos
+    #   if_none_match: Valor do cabeçalho If-None-Match da requisição
+    entry = result_cache.get(table, key)
+    status = 'HIT'
+    if entry is None:
+        status = 'MISS'
+        generation = result_cache.generation(table)
+        headers = {}
+        body = await compute(headers)
+        content = json.dumps(jsonable_encoder(body), ensure_ascii = False, allow_nan = False, separators = (',', ':'))
+        entry = result_cache.put(table, key, content.encode('utf-8'), headers, generation)
+
+    headers = {**entry.headers, 'ETag': entry.etag, 'X-Cache': status}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code = 304, headers = headers)
+    return Response(entry.content, media_type = 'application/json', headers = headers)
+
+async def cached_json_page(db: AsyncSession, model, ano: Optional[int], limit: int, cursor: Optional[str], sort: str,
+                           if_none_match: Optional[str], empty_message: str) -> Response:
+    # Retorna uma página da tabela (veja keyset_page) em JSON, usando o cache de respostas (veja cached_json)
+    #
+    # Arguments:
+    #   db, model, ano, limit, cursor, sort: Veja keyset_page
+    #   if_none_match: Valor do cabeçalho If-None-Match da requisição
+    #   empty_message: Mensagem retornada quando a tabela (com o filtro de ano) está vazia
+    async def compute(headers: dict[str, str]) -> list:
+        rows = await keyset_page(db, headers, model, ano, limit, cursor, sort)
+        return rows if rows or cursor is not None else [empty_message]
+
+    return await cached_json(model.__tablename__, ('page', ano, limit, cursor, sort), compute, if_none_match)
 
 @router.get('/producao')
-def getProducao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Realiza o método get no endpoint /producao para gerar um JSON com todos os anos dísponiveis
+async def getProducao(current_user: CurrentUser, ano: Optional[int] = Query(None),
+                      limit: int = Query(DEFAULT_LIMIT, ge = 1, le = MAX_LIMIT), cursor: Optional[str] = Query(None),
+                      sort: str = Query('id', pattern = SORT_PATTERN),
+                      format: Optional[str] = Query(None, pattern = FORMAT_PATTERN), accept: Optional[str] = Header(None),
+                      if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /producao para gerar um JSON paginado com todos os anos dísponiveis
     # da tabela producao_scraped_data
     # Arguments:
     #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional, para caso você deseje consultar os dados de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
+    #   limit: Quantidade máxima de linhas retornadas (padrão 1000, máximo 10000)
+    #   cursor: Valor do cabeçalho X-Next-Cursor da resposta anterior, para buscar a próxima página
+    #   sort: Ordenação das linhas: id (padrão), -id, ano ou -ano
+    #   format: json (padrão, paginado), ndjson ou csv. Nos formatos ndjson e csv a tabela inteira é exportada em
+    #        streaming, sem paginação; também podem ser escolhidos pelo cabeçalho Accept (application/x-ndjson ou text/csv)
+    #   if_none_match: ETag de uma resposta anterior; se a resposta não tiver mudado, retorna 304 sem conteúdo
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
 
-    if ano is None:
-        producao_data = db.query(ProductionScrapedData).all()
-    else:
-        producao_data = db.query(ProductionScrapedData).filter(ProductionScrapedData.ano == ano).all()
-    if not producao_data:
-        return "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/producao", 
-    return producao_data
+    export_format = stream_format(format, accept)
+    if export_format is not None:
+        return stream_table(ProductionScrapedData, ano, sort, export_format)
+
+    return await cached_json_page(db, ProductionScrapedData, ano, limit, cursor, sort, if_none_match,
+                            "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/producao")
     
 @router.get('/processamento')
-def getProcessamento(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Realiza o método get no endpoint /processamento para gerar um JSON com todos os anos dísponiveis
+async def getProcessamento(current_user: CurrentUser, ano: Optional[int] = Query(None),
+                           limit: int = Query(DEFAULT_LIMIT, ge = 1, le = MAX_LIMIT), cursor: Optional[str] = Query(None),
+                           sort: str = Query('id', pattern = SORT_PATTERN),
+                           format: Optional[str] = Query(None, pattern = FORMAT_PATTERN), accept: Optional[str] = Header(None),
+                           if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /processamento para gerar um JSON paginado com todos os anos dísponiveis
     # da tabela processamento_scraped_data
     # Arguments:
     #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional, para caso você deseje consultar os dados de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
+    #   limit: Quantidade máxima de linhas retornadas (padrão 1000, máximo 10000)
+    #   cursor: Valor do cabeçalho X-Next-Cursor da resposta anterior, para buscar a próxima página
+    #   sort: Ordenação das linhas: id (padrão), -id, ano ou -ano
+    #   format: json (padrão, paginado), ndjson ou csv. Nos formatos ndjson e csv a tabela inteira é exportada em
+    #        streaming, sem paginação; também podem ser escolhidos pelo cabeçalho Accept (application/x-ndjson ou text/csv)
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
     
-    if ano is None:
-        processamento_data = db.query(ProcessingScrapedData).all()
-    else:
-        processamento_data = db.query(ProcessingScrapedData).filter(ProcessingScrapedData.ano == ano).all()
-    if not processamento_data:
-        return "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/producao", 
-    return processamento_data
+    export_format = stream_format(format, accept)
+    if export_format is not None:
+        return stream_table(ProcessingScrapedData, ano, sort, export_format)
+
+    return await cached_json_page(db, ProcessingScrapedData, ano, limit, cursor, sort, if_none_match,
+                            "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/producao")
 
 @router.get('/comercializacao')
-def getComercializacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Realiza o método get no endpoint /comercializacao para gerar um JSON com todos os anos dísponiveis
+async def getComercializacao(current_user: CurrentUser, ano: Optional[int] = Query(None),
+                             limit: int = Query(DEFAULT_LIMIT, ge = 1, le = MAX_LIMIT), cursor: Optional[str] = Query(None),
+                             sort: str = Query('id', pattern = SORT_PATTERN),
+                             format: Optional[str] = Query(None, pattern = FORMAT_PATTERN), accept: Optional[str] = Header(None),
+                             if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /comercializacao para gerar um JSON paginado com todos os anos dísponiveis
     # da tabela comercializacao_scraped_data
     # Arguments:
     #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional, para caso você deseje consultar os dados de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
+    #   limit: Quantidade máxima de linhas retornadas (padrão 1000, máximo 10000)
+    #   cursor: Valor do cabeçalho X-Next-Cursor da resposta anterior, para buscar a próxima página
+    #   sort: Ordenação das linhas: id (padrão), -id, ano ou -ano
+    #   format: json (padrão, paginado), ndjson ou csv. Nos formatos ndjson e csv a tabela inteira é exportada em
+    #        streaming, sem paginação; também podem ser escolhidos pelo cabeçalho Accept (application/x-ndjson ou text/csv)
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
     
-    if ano is None:
-        comercializacao_data = db.query(ComercializationScrapedData).all()
-    else:
-        comercializacao_data = db.query(ComercializationScrapedData).filter(ComercializationScrapedData.ano == ano).all()
-    if not comercializacao_data:
-        return "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/comercializacao", 
-    return comercializacao_data
+    export_format = stream_format(format, accept)
+    if export_format is not None:
+        return stream_table(ComercializationScrapedData, ano, sort, export_format)
+
+    return await cached_json_page(db, ComercializationScrapedData, ano, limit, cursor, sort, if_none_match,
+                            "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/comercializacao")
 
 
 @router.get('/importacao')
-def getImportacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Realiza o método get no endpoint /importacao para gerar um JSON com todos os anos dísponiveis
+async def getImportacao(current_user: CurrentUser, ano: Optional[int] = Query(None),
+                        limit: int = Query(DEFAULT_LIMIT, ge = 1, le = MAX_LIMIT), cursor: Optional[str] = Query(None),
+                        sort: str = Query('id', pattern = SORT_PATTERN),
+                        format: Optional[str] = Query(None, pattern = FORMAT_PATTERN), accept: Optional[str] = Header(None),
+                        if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /importacao para gerar um JSON paginado com todos os anos dísponiveis
     # da tabela importacao_scraped_data
     # Arguments:
     #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional, para caso você deseje consultar os dados de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
+    #   limit: Quantidade máxima de linhas retornadas (padrão 1000, máximo 10000)
+    #   cursor: Valor do cabeçalho X-Next-Cursor da resposta anterior, para buscar a próxima página
+    #   sort: Ordenação das linhas: id (padrão), -id, ano ou -ano
+    #   format: json (padrão, paginado), ndjson ou csv. Nos formatos ndjson e csv a tabela inteira é exportada em
+    #        streaming, sem paginação; também podem ser escolhidos pelo cabeçalho Accept (application/x-ndjson ou text/csv)
+    #   if_none_match: ETag de uma resposta anterior; se a resposta não tiver mudado, retorna 304 sem conteúdo
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
 
-    if ano is None:
-        importacao_data = db.query(ImportScrapedData).all()
-    else:
-        importacao_data = db.query(ImportScrapedData).filter(ImportScrapedData.ano == ano).all()
-    if not importacao_data:
-        return "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/importacao", 
-    return importacao_data
+    export_format = stream_format(format, accept)
+    if export_format is not None:
+        return stream_table(ImportScrapedData, ano, sort, export_format)
+
+    return await cached_json_page(db, ImportScrapedData, ano, limit, cursor, sort, if_none_match,
+                            "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/importacao")
 
 @router.get('/exportacao')
-def getExportacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Realiza o método get no endpoint /exportacao para gerar um JSON com todos os anos dísponiveis
+async def getExportacao(current_user: CurrentUser, ano: Optional[int] = Query(None),
+                        limit: int = Query(DEFAULT_LIMIT, ge = 1, le = MAX_LIMIT), cursor: Optional[str] = Query(None),
+                        sort: str = Query('id', pattern = SORT_PATTERN),
+                        format: Optional[str] = Query(None, pattern = FORMAT_PATTERN), accept: Optional[str] = Header(None),
+                        if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /exportacao para gerar um JSON paginado com todos os anos dísponiveis
     # da tabela exportacao_scraped_data
     # Arguments:
     #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional, para caso você deseje consultar os dados de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
+    #   limit: Quantidade máxima de linhas retornadas (padrão 1000, máximo 10000)
+    #   cursor: Valor do cabeçalho X-Next-Cursor da resposta anterior, para buscar a próxima página
+    #   sort: Ordenação das linhas: id (padrão), -id, ano ou -ano
+    #   format: json (padrão, paginado), ndjson ou csv. Nos formatos ndjson e csv a tabela inteira é exportada em
+    #        streaming, sem paginação; também podem ser escolhidos pelo cabeçalho Accept (application/x-ndjson ou text/csv)
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
     
-    if ano is None:
-        exportacao_data = db.query(ExportScrapedData).all()
+    export_format = stream_format(format, accept)
+    if export_format is not None:
+        return stream_table(ExportScrapedData, ano, sort, export_format)
+
+    return await cached_json_page(db, ExportScrapedData, ano, limit, cursor, sort, if_none_match,
+                            "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/exportacao")
+
+
+@router.get('/{aba}/aggregate')
+async def getAggregate(current_user: CurrentUser, aba: str, group_by: Optional[str] = Query('ano'),
+                       measure: str = Query('quantidade'), agg: str = Query('sum'), ano_inicio: Optional[int] = Query(None),
+                       ano_fim: Optional[int] = Query(None), top: Optional[int] = Query(None, ge = 1, le = 10000),
+                       if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /{aba}/aggregate para gerar um JSON com os dados da aba agregados no banco
+    # (GROUP BY), em vez de o cliente baixar todas as linhas para calcular totais por ano, país, produto etc.
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   aba: Aba do site da Embrapa (producao, processamento, comercializacao, importacao ou exportacao)
+    #   group_by: Colunas do agrupamento, separadas por vírgula (ano, paises, titulo, tipo_produto, cultivo,
+    #        classificacao_uva ou classificacao_derivado, conforme a aba). Vazio retorna os totais da aba
+    #   measure: Colunas agregadas, separadas por vírgula (quantidade e/ou valor, conforme a aba)
+    #   agg: Agregações, separadas por vírgula (sum, avg e/ou count). Cada agregação de cada coluna vira um campo
+    #        "{agg}_{measure}" no resultado (ex.: sum_valor)
+    #   ano_inicio, ano_fim: Faixa de anos considerada (inclusive)
+    #   top: Se for informado, retorna apenas os "top" grupos com o maior valor da primeira agregação
+    #   if_none_match: ETag de uma resposta anterior; se a resposta não tiver mudado, retorna 304 sem conteúdo
+    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
+
+    model = ABA_MODELS.get(aba)
+    if model is None:
+        raise HTTPException(status_code = 404, detail = "Aba not found")
+
+    group_columns, measures, aggregates = split_list(group_by), split_list(measure), split_list(agg)
+    try:
+        query = aggregate_query(model, group_columns, measures, aggregates, ano_inicio, ano_fim, top)
+    except ValueError as error:
+        raise HTTPException(status_code = 400, detail = str(error))
+
+    key = ('aggregate', tuple(group_columns), tuple(measures), tuple(aggregates), ano_inicio, ano_fim, top)
+    async def compute(headers: dict[str, str]) -> list:
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    return await cached_json(model.__tablename__, key, compute, if_none_match)
+
+
+def trend_model(aba: str, measure: str):
+    # Retorna o modelo (tabela) da aba, validando a aba (404) e a medida (400) pedidas nos endpoints de tendência
+    model = ABA_MODELS.get(aba)
+    if model is None:
+        raise HTTPException(status_code = 404, detail = "Aba not found")
+    if measure not in MEASURE_COLUMNS or measure not in model.__table__.c:
+        raise HTTPException(status_code = 400, detail = f"Invalid measure for {aba}: {measure}")
+    return model
+
+
+@router.get('/{aba}/trends')
+async def getTrends(current_user: CurrentUser, aba: str, measure: str = Query('quantidade'),
+                    categoria: Optional[str] = Query(None), item: Optional[str] = Query(None), ano: Optional[int] = Query(None),
+                    ano_inicio: Optional[int] = Query(None), ano_fim: Optional[int] = Query(None),
+                    if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /{aba}/trends para gerar um JSON com a tabela de tendência anual da aba,
+    # calculada ao final de cada scrap: valor de cada item (produto, cultivar ou país) por ano, variação em relação ao
+    # ano anterior (absoluta e percentual), média móvel e participação do item no total da categoria no ano.
+    # A consulta usa apenas os índices da tabela de resumo, sem recalcular nada a partir das linhas da aba
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   aba: Aba do site da Embrapa (producao, processamento, comercializacao, importacao ou exportacao)
+    #   measure: Medida consultada (quantidade ou valor, conforme a aba)
+    #   categoria: Filtra uma categoria (tipo de produto ou subopção da aba, ex.: Vinhos de mesa)
+    #   item: Filtra um item (produto, cultivar ou país)
+    #   ano: Retorna apenas um ano, com os itens ordenados pela participação (maior primeiro)
+    #   ano_inicio, ano_fim: Faixa de anos considerada (inclusive)
+    #   if_none_match: ETag de uma resposta anterior; se a resposta não tiver mudado, retorna 304 sem conteúdo
+    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
+
+    model = trend_model(aba, measure)
+    table = TrendYearlyData.__table__
+    query = (select(*(column for column in table.c if column.name not in ('id', 'aba', 'medida')))
+             .where(table.c.aba == aba, table.c.medida == measure))
+    for column, value in (('categoria', categoria), ('item', item), ('ano', ano)):
+        if value is not None:
+            query = query.where(table.c[column] == value)
+    if ano_inicio is not None:
+        query = query.where(table.c.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.where(table.c.ano <= ano_fim)
+    if ano is not None:
+        query = query.order_by(table.c.participacao.is_(None), table.c.participacao.desc(), table.c.item)
     else:
-        exportacao_data = db.query(ExportScrapedData).filter(ExportScrapedData.ano == ano).all()
-    if not exportacao_data:
-        return "Sua tabela está vazia, cadastre os dados no banco com o endpoint /scrap/exportacao", 
-    return exportacao_data
+        query = query.order_by(table.c.categoria, table.c.item, table.c.ano)
+
+    key = ('trends', measure, categoria, item, ano, ano_inicio, ano_fim)
+    async def compute(headers: dict[str, str]) -> list:
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    return await cached_json(trend_cache_table(TrendYearlyData, aba), key, compute, if_none_match)
+
+
+@router.get('/{aba}/growth')
+async def getGrowth(current_user: CurrentUser, aba: str, measure: str = Query('quantidade'),
+                    categoria: Optional[str] = Query(None), top: Optional[int] = Query(None, ge = 1, le = 10000),
+                    if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # Realiza o método get no endpoint /{aba}/growth para gerar um JSON com o crescimento de cada item da aba,
+    # calculado ao final de cada scrap: primeiro ano com valor positivo, último ano com valor, total do período e taxa
+    # de crescimento anual composta (cagr) entre eles, do maior para o menor crescimento
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   aba: Aba do site da Embrapa (producao, processamento, comercializacao, importacao ou exportacao)
+    #   measure: Medida consultada (quantidade ou valor, conforme a aba)
+    #   categoria: Filtra uma categoria (tipo de produto ou subopção da aba, ex.: Vinhos de mesa)
+    #   top: Se for informado, retorna apenas os "top" itens com o maior crescimento
+    #   if_none_match: ETag de uma resposta anterior; se a resposta não tiver mudado, retorna 304 sem conteúdo
+    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
+
+    model = trend_model(aba, measure)
+    table = TrendGrowthData.__table__
+    query = (select(*(column for column in table.c if column.name not in ('id', 'aba', 'medida')))
+             .where(table.c.aba == aba, table.c.medida == measure)
+             .order_by(table.c.cagr.is_(None), table.c.cagr.desc(), table.c.categoria, table.c.item))
+    if categoria is not None:
+        query = query.where(table.c.categoria == categoria)
+    if top is not None:
+        query = query.limit(top)
+
+    key = ('growth', measure, categoria, top)
+    async def compute(headers: dict[str, str]) -> list:
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    return await cached_json(trend_cache_table(TrendGrowthData, aba), key, compute, if_none_match)
+
+
+@router.get('/{aba}.parquet')
+def getSnapshot(current_user: CurrentUser, aba: str, columns: Optional[str] = Query(None),
+                ano: Optional[int] = Query(None), if_none_match: Optional[str] = Header(None)):
+    # Realiza o método get no endpoint /{aba}.parquet para baixar o snapshot Parquet mais recente da aba, gravado no
+    # último scrap, sem consultar o banco de dados. Sem filtros, o arquivo do snapshot é enviado diretamente; com
+    # filtros, o arquivo é lido mapeado em memória, apenas com as colunas e os row groups necessários
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   aba: Aba do site da Embrapa (producao, processamento, comercializacao, importacao ou exportacao)
+    #   columns: Colunas a serem retornadas, separadas por vírgula (ex.: paises,ano,valor); se for nulo, todas as colunas
+    #   ano: É um parâmetro opcional, para caso você deseje apenas os dados de um ano específico
+    #   if_none_match: ETag de um download anterior; se o snapshot não tiver mudado, a resposta é 304 sem conteúdo
+
+    path = snapshot_store.latest_path(aba) if snapshot_store is not None and aba in abas else None
+    if path is None:
+        raise HTTPException(status_code = 404, detail = f"Snapshot not found, run /scrap/{aba} to create it")
+
+    selected = [column.strip() for column in columns.split(',') if column.strip()] if columns else None
+    # O ETag identifica o snapshot e, quando há filtros, também as colunas e o ano pedidos
+    variant = hashlib.sha256(f'{selected}|{ano}'.encode()).hexdigest()[:12] if selected or ano is not None else None
+    etag = f'"{path.stem}-{variant}"' if variant else f'"{path.stem}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, max-age=0, must-revalidate'}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code = 304, headers = headers)
+
+    filename = f"{aba}{f'_{ano}' if ano is not None else ''}.parquet"
+    if selected is None and ano is None:
+        return FileResponse(path, media_type = PARQUET_MEDIA_TYPE, filename = filename, headers = headers)
+
+    try:
+        table = snapshot_store.read(aba, selected, ano)
+    except (KeyError, pa.ArrowInvalid) as error:
+        raise HTTPException(status_code = 400, detail = f"Invalid columns: {error}")
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression = 'zstd')
+    headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return Response(sink.getvalue().to_pybytes(), media_type = PARQUET_MEDIA_TYPE, headers = headers)
+
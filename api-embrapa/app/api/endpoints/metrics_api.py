@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.database import async_engine, engine
+from app.core.metrics import database_metrics, render_prometheus
+
+router = APIRouter()
+
+# Content-Type do formato texto do Prometheus
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+def api_metrics():
+    # Realiza o método get no endpoint /metrics para coletar as métricas do banco no formato texto do Prometheus:
+    # estado do pool de conexões de cada engine (tamanho, conexões em uso, livres e extras), histograma da espera por uma
+    # conexão, timeouts dessa espera, histograma da duração das consultas por tipo de comando e tabela, consultas lentas
+    # (DB_SLOW_QUERY_SECONDS) e consultas com erro. O endpoint não exige token, para que o Prometheus possa coletá-lo.
+
+    return PlainTextResponse(render_prometheus(database_metrics, {'sync': engine.pool, 'async': async_engine.pool}),
+                             media_type = PROMETHEUS_CONTENT_TYPE)
@@ -1,30 +1,252 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Annotated
+from typing import Annotated, Callable
 from sqlalchemy.orm import Session
-from app.scrapper.scrap import scrap_producao, scrap_processamento, scrap_comercializacao, scrap_importacao, scrap_exportacao 
+import pandas as pd
+import traceback
+from datetime import datetime, timezone
+from app.scrapper.scrap import scrap_aba, scrap_all
+from app.scrapper.registry import ABAS, AbaSpec
+from app.scrapper.session import get_http_metrics
+from app.scrapper.cache import page_cache
+from app.scrapper.recorder import page_recorder
+from app.scrapper.parse_pool import parse_pool
+from app.scrapper.fingerprints import FingerprintKey, PageFingerprints
 from app.core.database import SessionLocal
-from app.models.production_scraped_data import ProductionScrapedData
-from app.models.comercialization_scraped_data import ComercializationScrapedData    
-from app.models.processing_scraped_data import ProcessingScrapedData
-from app.models.import_scraped_data import ImportScrapedData
-from app.models.export_scraped_data import ExportScrapedData
-from app.api.authentication.security import get_current_user
+from app.core.bulk_loader import bulk_upsert, load_dataframe
+from app.core.jobs import ALL_ABAS, ScrapJob, job_manager
+from app.core.result_cache import result_cache
+from app.core.snapshots import snapshot_store
+from app.core.trends import refresh_trends, trend_cache_table
+from app.models.trend_data import TrendYearlyData, TrendGrowthData
+from app.models.page_state import ScrapPageState
+from app.api.authentication.security import get_current_user, hashing_pool, user_cache
 from app.models.users_db import User
-import pandas as pd
 from typing import Optional
 
 router = APIRouter()
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
-def get_db():
+def get_loaded_slices(db: Session, model, classificacao: Optional[str] = None) -> set[tuple[Optional[str], int]]:
+    # Retorna os pares (classificação, ano) que já existem na tabela do modelo informado
+    #
+    # Arguments:
+    #   db: Sessão do banco de dados
+    #   model: Modelo (tabela) a ser consultado
+    #   classificacao: Nome da coluna do modelo com o nome da subopção da aba (ex.: classificacao_derivado), se houver
+    if classificacao is None:
+        return {(None, ano) for (ano,) in db.query(model.ano).distinct()}
+    return {(nome, ano) for nome, ano in db.query(getattr(model, classificacao), model.ano).distinct()}
+
+def scrape_scope(loaded: set[tuple[Optional[str], int]], ano: Optional[int], incremental: bool) -> dict:
+    # Define o que será buscado no site: apenas o ano informado, todos os anos (incremental = False) ou apenas
+    # os anos que ainda não estão no banco (pares em "loaded", veja get_loaded_slices), mais o último ano disponível,
+    # que ainda pode ser alterado no site
+    if ano is not None:
+        return {'anos': [ano]}
+    if not incremental:
+        return {}
+    return {'loaded': loaded}
+
+def load_page_states(db: Session, loaded: dict[str, set[tuple[Optional[str], int]]]) -> dict[FingerprintKey, str]:
+    # Retorna o hash de cada página (aba, subopção, ano) gravado no último scrap das abas informadas. Apenas as páginas
+    # cujas linhas ainda estão no banco (pares em "loaded", veja get_loaded_slices) são consideradas: se as linhas de
+    # uma página forem apagadas, a página volta a ser tratada e gravada no próximo scrap
+    states = db.query(ScrapPageState.aba, ScrapPageState.subopcao, ScrapPageState.ano, ScrapPageState.content_hash)
+    known = {}
+    for aba, subopcao, ano, content_hash in states.filter(ScrapPageState.aba.in_(list(loaded))):
+        subopcao = subopcao or None
+        if (subopcao, ano) in loaded[aba]:
+            known[(aba, subopcao, ano)] = content_hash
+    return known
+
+def save_page_states(db: Session, fingerprints: PageFingerprints) -> None:
+    # Grava o hash das páginas novas e alteradas (veja load_page_states), na mesma transação das linhas das páginas.
+    # O commit fica a cargo de quem chamar a função
+    updated_at = datetime.now(timezone.utc)
+    records = [{'aba': aba, 'subopcao': subopcao or '', 'ano': ano, 'content_hash': content_hash, 'updated_at': updated_at}
+               for (aba, subopcao, ano), content_hash in fingerprints.seen.items()]
+    bulk_upsert(db, ScrapPageState, records, ('aba', 'subopcao', 'ano'))
+
+def warnings_message(job: ScrapJob) -> str:
+    # Complemento da mensagem final do job quando alguma etapa depois do commit dos dados falhou
+    return f", with {len(job.warnings)} warnings" if job.warnings else ""
+
+def page_changes_message(fingerprints: PageFingerprints) -> str:
+    changes = fingerprints.stats()
+    return f"{changes['unchanged']} unchanged, {changes['changed']} changed and {changes['new']} new pages"
+
+def page_slice(spec: AbaSpec, subopcao: Optional[str], ano: int) -> dict:
+    # Colunas da tabela (e seus valores) que identificam a fatia de uma página: a subopção, se a aba tiver, e o ano
+    if spec.classificacao is None:
+        return {'ano': int(ano)}
+    return {spec.classificacao: subopcao, 'ano': int(ano)}
+
+def load_page(db: Session, spec: AbaSpec, subopcao: Optional[str], ano: int, page: pd.DataFrame,
+              snapshot_pages: list[tuple[dict, pd.DataFrame]]) -> int:
+    # Grava uma página tratada na tabela da aba, substituindo a fatia (subopção, ano) da página: as linhas que saíram da
+    # página, ou que foram descartadas no tratamento, são removidas (veja load_dataframe). Guarda a fatia e as linhas,
+    # já com as colunas da tabela, para o snapshot Parquet. Retorna a quantidade de linhas gravadas
+    current_slice = page_slice(spec, subopcao, ano)
+    rows = load_dataframe(db, spec.model, page, spec.table_columns, spec.natural_key, page_slice = current_slice)
+    if snapshot_store is not None:
+        frame = page[list(spec.table_columns)].rename(columns = spec.table_columns) if not page.empty else None
+        snapshot_pages.append((current_slice, frame))
+    return rows
+
+# Abas cujas tabelas de tendência ficaram desatualizadas porque o cálculo falhou depois do commit dos dados. O cálculo
+# é tentado de novo no próximo scrap da aba, mesmo que nenhuma página tenha mudado
+stale_trends: set[str] = set()
+
+def refresh_aba_trends(db: Session, job: ScrapJob, spec: AbaSpec) -> bool:
+    # Recalcula as tabelas de tendência da aba e invalida as respostas de tendência e crescimento da aba no cache de
+    # respostas. Se o cálculo falhar, os dados da aba (já gravados) são mantidos, a falha fica no job (warnings) e a
+    # aba fica em stale_trends até o próximo scrap. Retorna se as tendências foram recalculadas
+    job.set_stage('trends')
+    try:
+        refresh_trends(db, spec.aba, spec.model, TrendYearlyData, TrendGrowthData)
+        db.commit()
+    except Exception as error:
+        db.rollback()
+        stale_trends.add(spec.aba)
+        job.add_warning(f"{spec.aba}: trends not refreshed, retried on the next scrap ({type(error).__name__}: {error})")
+        traceback.print_exc()
+        return False
+    stale_trends.discard(spec.aba)
+    result_cache.invalidate(trend_cache_table(TrendYearlyData, spec.aba))
+    result_cache.invalidate(trend_cache_table(TrendGrowthData, spec.aba))
+    return True
+
+def refresh_derived_data(db: Session, job: ScrapJob, spec: AbaSpec, snapshot_pages: list[tuple[dict, pd.DataFrame]]) -> None:
+    # Depois do commit das páginas de uma aba (e da invalidação das respostas da tabela, veja run_scrap): recalcula as
+    # tabelas de tendência da aba (veja refresh_aba_trends) e atualiza o snapshot Parquet da aba com as páginas gravadas
+    refresh_aba_trends(db, job, spec)
+
+    if snapshot_store is not None:
+        job.set_stage('snapshot')
+        slice_columns = (spec.classificacao, 'ano') if spec.classificacao else ('ano',)
+        frames = [frame for _, frame in snapshot_pages if frame is not None]
+        data = pd.concat(frames, ignore_index = True) if frames else pd.DataFrame(columns = list(spec.table_columns.values()))
+        snapshot_store.update(db, spec.aba, spec.model, data, slice_columns,
+                              slices = pd.DataFrame([current_slice for current_slice, _ in snapshot_pages]))
+
+def run_scrap(job: ScrapJob, spec: AbaSpec, ano: Optional[int], incremental: bool) -> tuple[int, str]:
+    # Executa o scrap de uma aba, grava o resultado no banco, invalida as respostas da tabela no cache de respostas,
+    # recalcula as tabelas de tendência da aba e atualiza o snapshot Parquet da aba. Roda no pool de threads dos jobs,
+    # com uma sessão própria do banco de dados, e retorna a quantidade de linhas gravadas e a mensagem final do job.
+    # O scrap roda em pipeline (veja scrap_pages): cada página é gravada no banco assim que é tratada, enquanto as
+    # próximas ainda estão sendo baixadas, e o commit é feito no final, com todas as páginas. As medições de cada etapa
+    # ficam no job (stage_timings)
+    #
+    # As páginas cuja tabela não mudou desde o último scrap (mesmo hash, veja load_page_states) são descartadas logo
+    # depois de obtidas, sem leitura da tabela, tratamento ou gravação. A contagem de páginas sem mudança, alteradas e
+    # novas fica no job (page_changes)
+    #
+    # Arguments:
+    #   job: Job em execução, que recebe o andamento de cada página (subopção, ano)
+    #   spec: Descrição da aba (tratamento das páginas, modelo, mapeamento das colunas e chave natural), veja registry.ABAS
+    #   ano, incremental: Parâmetros recebidos pelo endpoint (veja scrape_scope)
     db = SessionLocal()
     try:
-        yield db
+        rows = pages = 0
+        snapshot_pages = []
+
+        def write(subopcao: Optional[str], ano: int, page: pd.DataFrame) -> None:
+            # Etapa de gravação do pipeline (uma única thread, dona da sessão do banco até o fim do scrap)
+            nonlocal rows, pages
+            rows += load_page(db, spec, subopcao, ano, page, snapshot_pages)
+            pages += 1
+
+        loaded = get_loaded_slices(db, spec.model, spec.classificacao)
+        fingerprints = PageFingerprints(load_page_states(db, {spec.aba: loaded}))
+        scrap_aba(spec.aba, progress = job.progress, write = write, timings = job.set_timings,
+                  fingerprints = fingerprints, **scrape_scope(loaded, ano, incremental))
+        job.set_page_changes(fingerprints.stats())
+        if not pages:
+            if spec.aba in stale_trends:
+                refresh_aba_trends(db, job, spec)
+            return 0, f"{spec.label} data is already up to date ({page_changes_message(fingerprints)})"
+
+        job.set_stage('loading')
+        save_page_states(db, fingerprints)
+        db.commit()
+        # As respostas da tabela são invalidadas logo após o commit, antes das tendências e do snapshot: se eles
+        # falharem, o cache não continua servindo os dados anteriores
+        result_cache.invalidate(spec.model.__tablename__)
+        refresh_derived_data(db, job, spec, snapshot_pages)
+        return rows, (f"{spec.label} data scraped and stored successfully ({page_changes_message(fingerprints)})"
+                      f"{warnings_message(job)}")
+    finally:
+        db.close()
+
+def run_scrap_all(job: ScrapJob, ano: Optional[int], incremental: bool) -> tuple[int, str]:
+    # Executa o scrap de todas as abas com um único plano de requisições (veja scrap_all): as páginas de descoberta
+    # (subopções e faixas de anos) de todas as abas são obtidas juntas e reaproveitadas como páginas de dados do último
+    # ano, e todas as páginas dividem as mesmas requisições simultâneas. Cada página é gravada na tabela da sua aba
+    # assim que é tratada, o commit é feito no final, e as tendências e snapshots são atualizados apenas nas abas com
+    # páginas gravadas. O resumo do plano (requisições feitas e economizadas) fica no job (crawl_plan). Como no scrap
+    # de uma aba, as páginas sem mudança desde o último scrap são descartadas (veja run_scrap)
+    #
+    # Arguments:
+    #   job: Job em execução, que recebe o andamento de cada página (aba, subopção, ano)
+    #   ano, incremental: Parâmetros recebidos pelo endpoint (veja scrape_scope)
+    db = SessionLocal()
+    try:
+        rows = {aba: 0 for aba in ABAS}
+        pages = {aba: 0 for aba in ABAS}
+        snapshot_pages = {aba: [] for aba in ABAS}
+
+        def write(aba: str, subopcao: Optional[str], ano: int, page: pd.DataFrame) -> None:
+            # Etapa de gravação do pipeline (uma única thread, dona da sessão do banco até o fim do scrap)
+            rows[aba] += load_page(db, ABAS[aba], subopcao, ano, page, snapshot_pages[aba])
+            pages[aba] += 1
+
+        slices = {aba: get_loaded_slices(db, spec.model, spec.classificacao) for aba, spec in ABAS.items()}
+        scopes = {aba: scrape_scope(slices[aba], ano, incremental) for aba in ABAS}
+        loaded = {aba: scope['loaded'] for aba, scope in scopes.items() if 'loaded' in scope}
+        fingerprints = PageFingerprints(load_page_states(db, slices))
+        scrap_all(list(ABAS), anos = [ano] if ano is not None else None, loaded = loaded,
+                  progress = lambda aba, subopcao, ano, estado: job.progress(subopcao, ano, estado, aba),
+                  write = write, timings = job.set_timings, plan_stats = job.set_plan, fingerprints = fingerprints)
+        job.set_page_changes(fingerprints.stats())
+        saved = job.crawl_plan['requests_saved']
+        if not sum(pages.values()):
+            for aba in sorted(stale_trends):
+                refresh_aba_trends(db, job, ABAS[aba])
+            return 0, f"All data is already up to date ({saved} requests saved, {page_changes_message(fingerprints)})"
+
+        job.set_stage('loading')
+        save_page_states(db, fingerprints)
+        db.commit()
+        for aba, spec in ABAS.items():
+            if pages[aba]:
+                result_cache.invalidate(spec.model.__tablename__)
+        for aba, spec in ABAS.items():
+            if pages[aba]:
+                refresh_derived_data(db, job, spec, snapshot_pages[aba])
+            elif aba in stale_trends:
+                refresh_aba_trends(db, job, spec)
+        return sum(rows.values()), (f"All data scraped and stored successfully ({saved} requests saved, "
+                                    f"{page_changes_message(fingerprints)}){warnings_message(job)}")
     finally:
         db.close()
 
-@router.post('/producao')
-def api_scrape_producao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
+def submit_job(aba: str, ano: Optional[int], incremental: bool, runner: Callable[[ScrapJob], tuple[int, str]]) -> dict:
+    # Agenda o job de scrap e retorna o id do job. Se já houver um job da mesma aba com os mesmos parâmetros, ou de todas
+    # as abas com parâmetros que cobrem o pedido, na fila ou em execução, o id dele é retornado (coalesced = True) e
+    # nenhum job novo é criado. Nos outros casos, o novo job aguarda o fim dos jobs ativos da aba (veja JobManager)
+    job, created = job_manager.submit(aba, {'ano': ano, 'incremental': incremental}, runner)
+    return {"message": f"Scrap job {'queued' if created else 'already in progress'} for {aba}",
+            "job_id": job.id,
+            "status_url": f"/scrap/jobs/{job.id}",
+            "state": job.state,
+            "coalesced": not created}
+
+def submit_scrap(aba: str, ano: Optional[int], incremental: bool) -> dict:
+    # Agenda o job de scrap da aba (veja submit_job e run_scrap)
+    return submit_job(aba, ano, incremental, lambda job: run_scrap(job, ABAS[aba], ano, incremental))
+
+@router.post('/producao', status_code = 202)
+def api_scrape_producao(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
     # Realiza o método post no endpoint /scrap/producao para iniciar o scrap e pegar os dados
     # da aba produção no site da Embrapa, para salvar esses dados em um banco
     #
@@ -33,32 +255,16 @@ def api_scrape_producao(current_user: CurrentUser, ano: Optional[int] = Query(No
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
-    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-
-    if ano is None:
-        data = scrap_producao()
-    else:
-        data = scrap_producao()
-    
-    if data.empty:
-        raise HTTPException(status_code=400, detail='Failed to scrape production data')
-    
-    print(data.head())  # Imprimir os primeiros valores para depuração
-    
-    for _, row in data.iterrows():
-        db_data = ProductionScrapedData(
-            titulo=row['Produto'],
-            ano=row['ano'],
-            quantidade=row['Quantidade (L.)'],
-            tipo_produto=row['tipo_produto']
-        )
-        db.add(db_data)
-    db.commit()
-    
-    return {"message": "Production data scraped and stored successfully"}
-
-@router.post('/comercializacao')
-def api_scrap_comercializacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site. As linhas buscadas atualizam as existentes (mesma chave natural) em vez de duplicá-las
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento pode ser consultado em /scrap/jobs/{id}
+
+    return submit_scrap('producao', ano, incremental)
+
+
+@router.post('/comercializacao', status_code = 202)
+def api_scrap_comercializacao(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
     # Realiza o método post no endpoint /scrap/comercializacao para iniciar o scrap e pegar os dados
     # da aba comercialização no site da Embrapa, para salvar esses dados em um banco
     #
@@ -67,28 +273,16 @@ def api_scrap_comercializacao(current_user: CurrentUser, ano: Optional[int] = Qu
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
-    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-
-    data = scrap_comercializacao()
-
-    if data.empty:
-        raise HTTPException(status_code=400, detail='Failed to scrape comercialization data')
-    
-    print(data.head())
-    
-    for _, row in data.iterrows():
-        db_data = ComercializationScrapedData(
-            titulo=row['Produto'],
-            ano=row['ano'],
-            quantidade=row['Quantidade (L.)']
-        )
-        db.add(db_data)
-    db.commit()
-    
-    return {'message": "Comercialization data scraped and stored successfully'}
-
-@router.post('/processamento')
-def api_scrap_processamento(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site. As linhas buscadas atualizam as existentes (mesma chave natural) em vez de duplicá-las
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento pode ser consultado em /scrap/jobs/{id}
+
+    return submit_scrap('comercializacao', ano, incremental)
+
+
+@router.post('/processamento', status_code = 202)
+def api_scrap_processamento(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
     # Realiza o método post no endpoint /scrap/processamento para iniciar o scrap e pegar os dados
     # da aba processamento no site da Embrapa, para salvar esses dados em um banco
     #
@@ -97,31 +291,16 @@ def api_scrap_processamento(current_user: CurrentUser, ano: Optional[int] = Quer
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
-    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-
-
-    data =  scrap_processamento()
-
-    if data.empty:
-        raise HTTPException(status_code=400, detail='Failed to scrape processing data')
-    
-    print(data.head())
-
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site. As linhas buscadas atualizam as existentes (mesma chave natural) em vez de duplicá-las
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento pode ser consultado em /scrap/jobs/{id}
 
-    for _, row in data.iterrows():
-        db_data = ProcessingScrapedData(
-            cultivo=row['Cultivar'],
-            quantidade=row['Quantidade (Kg)'],
-            ano=row['ano'],
-            classificacao_uva=row['classificacao_uva']
-        )
-        db.add(db_data)
-    db.commit()
+    return submit_scrap('processamento', ano, incremental)
 
-    return {'message": "Processing data scraped and stored successfully'}
 
-@router.post('/importacao')
-def api_scrap_importacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
+@router.post('/importacao', status_code = 202)
+def api_scrap_importacao(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
     # Realiza o método post no endpoint /scrap/importacao para iniciar o scrap e pegar os dados
     # da aba importação no site da Embrapa, para salvar esses dados em um banco
     #
@@ -130,30 +309,16 @@ def api_scrap_importacao(current_user: CurrentUser, ano: Optional[int] = Query(N
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
-    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-
-    data =  scrap_importacao()
-
-    if data.empty:
-        raise HTTPException(status_code=400, detail='Failed to scrape importacao data')
-    
-    print(data.head())
-
-    for _, row in data.iterrows():
-        db_data = ImportScrapedData(
-            paises=row['Países'],
-            valor=row['Valor (US$)'],
-            ano=row['ano'],
-            quantidade=row['Quantidade (Kg)'],
-            classificacao_derivado=row['classificacao_derivado']
-        )
-        db.add(db_data)
-    db.commit()
-    return {'message": "Importacao data scraped and stored successfully'}
-
-
-@router.post('/exportacao')
-def api_scrap_exportacao(current_user: CurrentUser, ano: Optional[int] = Query(None), db: Session = Depends(get_db)):
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site. As linhas buscadas atualizam as existentes (mesma chave natural) em vez de duplicá-las
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento pode ser consultado em /scrap/jobs/{id}
+
+    return submit_scrap('importacao', ano, incremental)
+
+
+@router.post('/exportacao', status_code = 202)
+def api_scrap_exportacao(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
     # Realiza o método post no endpoint /scrap/exportacao para iniciar o scrap e pegar os dados
     # da aba exportação no site da Embrapa, para salvar esses dados em um banco
     #
@@ -162,23 +327,80 @@ def api_scrap_exportacao(current_user: CurrentUser, ano: Optional[int] = Query(N
     #        utilizar o metodo)
     #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
     #        seja nulo, será adicionado todos os anos disponíveis 
-    #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-
-    data =  scrap_exportacao()
-
-    if data.empty:
-        raise HTTPException(status_code=400, detail='Failed to scrape exportacao data')
-    
-    print(data.head())
-
-    for _, row in data.iterrows():
-        db_data = ExportScrapedData(
-            paises=row['Países'],
-            valor=row['Valor (US$)'],
-            ano=row['ano'],
-            quantidade=row['Quantidade (Kg)'],
-            classificacao_derivado=row['classificacao_derivado']
-        )
-        db.add(db_data)
-    db.commit()
-    return {'message": "Importacao data scraped and stored successfully'}
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site. As linhas buscadas atualizam as existentes (mesma chave natural) em vez de duplicá-las
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento pode ser consultado em /scrap/jobs/{id}
+
+    return submit_scrap('exportacao', ano, incremental)
+
+
+@router.post('/all', status_code = 202)
+def api_scrap_all(current_user: CurrentUser, ano: Optional[int] = Query(None), incremental: bool = Query(True)):
+    # Realiza o método post no endpoint /scrap/all para iniciar o scrap das cinco abas do site da Embrapa em um único
+    # job, com um único plano de requisições: as páginas usadas para descobrir as subopções e faixas de anos de cada aba
+    # são reaproveitadas como páginas de dados, evitando requisições repetidas (veja run_scrap_all)
+    #
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   ano: É um parâmetro opcional para caso você deseje fazer um scrap de um ano específico, caso o valor 
+    #        seja nulo, será adicionado todos os anos disponíveis 
+    #   incremental: Se verdadeiro (padrão), busca apenas os anos que ainda não estão no banco, mais o último ano
+    #        disponível no site, em cada aba
+    #
+    # O scrap roda em segundo plano: a resposta traz o id do job, cujo andamento (incluindo as requisições
+    # economizadas, em crawl_plan) pode ser consultado em /scrap/jobs/{id}. Se houver jobs de abas ativos, o job
+    # aguarda o fim deles antes de começar (stage "waiting")
+
+    return submit_job(ALL_ABAS, ano, incremental, lambda job: run_scrap_all(job, ano, incremental))
+
+
+@router.get('/metrics')
+def api_scrap_metrics(current_user: CurrentUser):
+    # Realiza o método get no endpoint /scrap/metrics para consultar os contadores das requisições feitas ao site
+    # da Embrapa desde que a API foi iniciada: requisições, novas tentativas, erros, bytes recebidos e histograma de latência,
+    # além das estatísticas do cache de páginas (acertos, faltas, revalidações e remoções) e do cache de respostas dos
+    # endpoints de dados (acertos, faltas, remoções, invalidações e tamanho), do cache de usuários autenticados, do
+    # pool de hashes de senha (fila de espera, pedidos recusados e histogramas de espera e de duração dos hashes), da
+    # gravação/reprodução de páginas (SCRAP_HTTP_MODE) e do pool de processos de extração das tabelas
+    #
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+
+    return {**get_http_metrics(), 'page_cache': page_cache.stats() if page_cache else None,
+            'result_cache': result_cache.stats(), 'auth_cache': user_cache.stats(),
+            'password_hashing': hashing_pool.stats(),
+            'recorder': page_recorder.stats() if page_recorder else None, 'parse_pool': parse_pool.stats(),
+            'stale_trends': sorted(stale_trends)}
+
+
+@router.get('/jobs')
+def api_scrap_jobs(current_user: CurrentUser, aba: Optional[str] = Query(None), state: Optional[str] = Query(None)):
+    # Realiza o método get no endpoint /scrap/jobs para listar os jobs de scrap (em execução e os últimos finalizados),
+    # do mais recente para o mais antigo, com estado, durações, quantidade de páginas por estado e linhas gravadas
+    #
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   aba: Filtra os jobs de uma aba (ex.: importacao)
+    #   state: Filtra os jobs em um estado (queued, running, succeeded ou failed)
+
+    return [job.snapshot(include_pages = False) for job in job_manager.list(aba, state)]
+
+
+@router.get('/jobs/{job_id}')
+def api_scrap_job(current_user: CurrentUser, job_id: str):
+    # Realiza o método get no endpoint /scrap/jobs/{job_id} para consultar um job de scrap, incluindo o andamento
+    # de cada página (subopção, ano) da aba e, ao final do pipeline, os tempos de cada etapa (stage_timings)
+    #
+    # Arguments:
+    #  current_user: É um parâmetro contendo o usuario atual logado na API (se nao estiver logado nao sera possivel
+    #        utilizar o metodo)
+    #   job_id: Id do job, retornado pelos endpoints de scrap
+
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code = 404, detail = "Job not found")
+    return job.snapshot()
@@ -2,13 +2,13 @@ from pydantic import EmailStr
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import pandas as pd
 from typing import Optional
 from http import HTTPStatus
 from app.scrapper.scrap import scrap_producao, scrap_processamento, scrap_comercializacao, scrap_importacao, \
     scrap_exportacao
-from app.core.database import SessionLocal
+from app.core.database import get_async_db
 from app.models.production_scraped_data import ProductionScrapedData
 from app.models.comercialization_scraped_data import ComercializationScrapedData
 from app.models.processing_scraped_data import ProcessingScrapedData
@@ -19,54 +19,48 @@ from app.api.authentication.schemas import Message, UserPublic, UserSchema
 from app.api.authentication.security import (
     get_current_user,
     get_password_hash,
+    user_cache,
 )
 
 router = APIRouter()
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @router.post('/create', status_code=HTTPStatus.CREATED)
-def create_user(user: UserSchema, db: Session = Depends(get_db)):
+async def create_user(user: UserSchema, db: AsyncSession = Depends(get_async_db)):
     # Realiza o método POST no endpoint /users/create para criar um usuario
     # no banco de dados
     #
     # Arguments:
     #   user: É um parâmetro contendo as informaces do usuario desejado
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user:
         if db_user.email == user.email:
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
                 detail='Email already registered.',
             )
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_db_user = User(
         email=user.email,
         password=hashed_password,
     )
     db.add(new_db_user)
-    db.commit()
-    db.refresh(new_db_user)
+    await db.commit()
+    await db.refresh(new_db_user)
 
     return new_db_user
 
 @router.get('/query', status_code=HTTPStatus.OK)
-def query_user(email: EmailStr, db: Session = Depends(get_db)):
+async def query_user(email: EmailStr, db: AsyncSession = Depends(get_async_db)):
     # Realiza o método GET no endpoint /users/query para obter informacoes de um usuario
     #   no banco de dados
     #
     # Arguments:
     #   email: É um parâmetro contendo o e-mail do usuario desejado
     #   db: É apenas um parâmetro para que seja possível iniciar a sessão no banco de dados
-    db_user = db.query(User).filter(User.email == email).first()
+    db_user = (await db.execute(select(User).where(User.email == email))).scalars().first()
     if not db_user:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
@@ -75,11 +69,11 @@ def query_user(email: EmailStr, db: Session = Depends(get_db)):
     return db_user
 
 @router.put('/update/{user_id}', response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserSchema,
     current_user: CurrentUser,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Realiza o método PUT no endpoint /users/update/{user_id} para atualizar um usuario
     #   no banco de dados
@@ -94,22 +88,25 @@ def update_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions.'
         )
-    old_user = db.query(User).filter(User.email == user.email).first()
-    db.delete(old_user)
-    db.commit()
+    old_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
+    await db.delete(old_user)
+    await db.commit()
     new_user = User(
         email = user.email,
-        password = get_password_hash(user.password),
+        password = await get_password_hash(user.password),
     )
     db.add(new_user)
-    db.commit()
+    await db.commit()
+    # Tokens em cache do usuario antigo deixam de valer imediatamente
+    user_cache.invalidate(current_user.email)
+    user_cache.invalidate(user.email)
     return new_user
 
 @router.delete('/delete/{user_id}', response_model=Message)
-def delete_user(
+async def delete_user(
     user_id: int,
     current_user: CurrentUser,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Realiza o método DELETE no endpoint /users/delete/{user_id} para deletar um usuario
     #   no banco de dados
@@ -123,9 +120,10 @@ def delete_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
-    old_user = db.query(User).filter(User.id == user_id).first()
-    db.delete(old_user)
-    db.commit()
+    old_user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
+    await db.delete(old_user)
+    await db.commit()
+    user_cache.invalidate(current_user.email)
 
     return {'message': 'User deleted'}
 
@@ -0,0 +1,61 @@
+from typing import Optional, Sequence
+
+from sqlalchemy import BigInteger, Integer, Numeric, Select, case, cast, func, select
+
+# Colunas que podem ser usadas no agrupamento e colunas numéricas que podem ser agregadas (quando existem na tabela)
+GROUP_COLUMNS = ('ano', 'paises', 'titulo', 'tipo_produto', 'cultivo', 'classificacao_uva', 'classificacao_derivado')
+MEASURE_COLUMNS = ('quantidade', 'valor')
+AGGREGATES = {'sum': func.sum, 'avg': func.avg, 'count': func.count}
+
+
+def numeric_expression(column):
+    """Expressão SQL com o valor numérico da coluna. Colunas ainda gravadas como texto (ex.: "1.234.567", "-" ou "nd")
+    são convertidas no banco com a mesma regra de clean_numeric_column: os pontos são removidos e apenas valores
+    compostos só por dígitos são considerados; os demais viram nulo e ficam fora das agregações."""
+    if isinstance(column.type, (Integer, Numeric)):
+        return column
+    digits = func.replace(column, '.', '')
+    return case((digits.regexp_match('^[0-9]+$'), cast(digits, BigInteger)), else_ = None)
+
+
+def split_list(value: Optional[str]) -> list[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def aggregate_query(model, group_by: Sequence[str], measures: Sequence[str], aggregates: Sequence[str],
+                    ano_inicio: Optional[int] = None, ano_fim: Optional[int] = None, top: Optional[int] = None) -> Select:
+    """Monta a consulta (GROUP BY) que agrega as colunas numéricas da tabela do modelo. Cada combinação de agregação e
+    coluna vira uma coluna do resultado chamada "{agregação}_{coluna}" (ex.: sum_valor). Lança ValueError se alguma
+    coluna ou agregação não for aceita para a tabela.
+
+    Arguments:
+        model -- Modelo (tabela) a ser consultado
+        group_by {Sequence[str]} -- Colunas do agrupamento (veja GROUP_COLUMNS). Sem colunas, retorna os totais da tabela.
+        measures {Sequence[str]} -- Colunas agregadas (quantidade e/ou valor)
+        aggregates {Sequence[str]} -- Agregações aplicadas a cada coluna (sum, avg e/ou count)
+        ano_inicio {Optional[int]} -- Primeiro ano considerado
+        ano_fim {Optional[int]} -- Último ano considerado
+        top {Optional[int]} -- Se for informado, retorna apenas os "top" grupos com o maior valor da primeira agregação
+    """
+    table = model.__table__
+    invalid = [column for column in group_by if column not in GROUP_COLUMNS or column not in table.c]
+    invalid += [column for column in measures if column not in MEASURE_COLUMNS or column not in table.c]
+    invalid += [aggregate for aggregate in aggregates if aggregate not in AGGREGATES]
+    if invalid:
+        raise ValueError(f"Invalid columns or aggregates for {table.name}: {', '.join(invalid)}")
+    if not measures or not aggregates:
+        raise ValueError("At least one measure and one aggregate are required")
+
+    groups = [table.c[column] for column in group_by]
+    metrics = [AGGREGATES[aggregate](numeric_expression(table.c[measure])).label(f'{aggregate}_{measure}')
+               for measure in measures for aggregate in aggregates]
+
+    query = select(*groups, *metrics).group_by(*groups)
+    if ano_inicio is not None:
+        query = query.where(table.c.ano >= ano_inicio)
+    if ano_fim is not None:
+        query = query.where(table.c.ano <= ano_fim)
+
+    if top is not None:
+        return query.order_by(metrics[0].desc(), *groups).limit(top)
+    return query.order_by(*groups)
@@ -0,0 +1,157 @@
+import os
+from typing import Any, Iterator, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import delete, insert, inspect, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Quantidade de linhas enviadas em cada INSERT com múltiplas linhas
+CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", 1000))
+
+_upsert_inserts = {
+    'mysql': mysql.insert,
+    'mariadb': mysql.insert,
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+_unique_keys: dict[tuple[str, str, tuple[str, ...]], bool] = {}
+
+
+def dataframe_to_records(data: pd.DataFrame, columns: dict[str, str]) -> list[dict]:
+    """Converte um dataframe em uma lista de dicionários com os nomes das colunas do modelo, trocando valores nulos
+    (NaN/NA) por None e tipos do numpy por tipos do Python.
+
+    Arguments:
+        data {pd.DataFrame} -- Dataframe com os dados extraídos do site
+        columns {dict[str, str]} -- Mapeamento do nome de cada coluna do dataframe para o nome da coluna do modelo
+    """
+    frame = data[list(columns)].rename(columns = columns).astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+
+def _chunks(records: list[dict], chunk_size: int) -> Iterator[list[dict]]:
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+
+def has_unique_key(db: Session, model, natural_key: Sequence[str]) -> bool:
+    """Verifica (uma vez por tabela) se a tabela do modelo possui restrição ou índice único nas colunas da chave natural.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        model -- Modelo (tabela) a ser verificado
+        natural_key {Sequence[str]} -- Colunas da chave natural
+    """
+    bind = db.get_bind()
+    key = (bind.url.render_as_string(), model.__tablename__, tuple(natural_key))
+    if key not in _unique_keys:
+        inspector = inspect(db.connection())
+        unique_columns = [constraint['column_names'] for constraint in inspector.get_unique_constraints(model.__tablename__)]
+        unique_columns += [index['column_names'] for index in inspector.get_indexes(model.__tablename__) if index['unique']]
+        _unique_keys[key] = any(set(columns) == set(natural_key) for columns in unique_columns)
+    return _unique_keys[key]
+
+
+def bulk_insert(db: Session, model, records: list[dict], chunk_size: int = CHUNK_SIZE) -> int:
+    """Insere as linhas em lotes de "chunk_size" linhas, com um único comando (executemany) por lote, que o SQLAlchemy
+    converte em INSERTs com múltiplas linhas. Retorna a quantidade de linhas inseridas.
+    O commit fica a cargo de quem chamar a função.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        model -- Modelo (tabela) que receberá os dados
+        records {list[dict]} -- Linhas a serem inseridas, como retornadas por dataframe_to_records
+        chunk_size {int} -- Quantidade de linhas por INSERT
+    """
+    for chunk in _chunks(records, chunk_size):
+        db.execute(insert(model.__table__), chunk)
+    return len(records)
+
+
+def bulk_upsert(db: Session, model, records: list[dict], natural_key: Sequence[str], chunk_size: int = CHUNK_SIZE) -> int:
+    """Insere ou atualiza as linhas com base na chave natural, "chunk_size" linhas por vez. Retorna a quantidade de linhas gravadas.
+
+    No MySQL/MariaDB usa INSERT ... ON DUPLICATE KEY UPDATE e no SQLite/PostgreSQL usa INSERT ... ON CONFLICT DO UPDATE.
+    Se o banco não tiver suporte a upsert ou a tabela ainda não tiver a restrição única da chave natural (tabelas criadas
+    antes dela existir), as linhas com a mesma chave são removidas e as novas são inseridas, na mesma transação.
+    O commit fica a cargo de quem chamar a função.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        model -- Modelo (tabela) que receberá os dados
+        records {list[dict]} -- Linhas a serem gravadas, como retornadas por dataframe_to_records
+        natural_key {Sequence[str]} -- Colunas que identificam uma linha (ex.: paises, classificacao_derivado, ano)
+        chunk_size {int} -- Quantidade de linhas por comando
+    """
+    # Linhas repetidas na mesma chave natural: a última prevalece
+    records = list({tuple(record[column] for column in natural_key): record for record in records}.values())
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect not in _upsert_inserts or not has_unique_key(db, model, natural_key):
+        key_columns = tuple_(*(table.c[column] for column in natural_key))
+        for chunk in _chunks(records, chunk_size):
+            db.execute(delete(table).where(key_columns.in_([tuple(record[column] for column in natural_key)
+                                                            for record in chunk])))
+        return bulk_insert(db, model, records, chunk_size)
+
+    update_columns = [column.name for column in table.columns
+                      if not column.primary_key and column.name not in natural_key]
+    statement = _upsert_inserts[dialect](table)
+    if dialect in ('mysql', 'mariadb'):
+        statement = statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns})
+    else:
+        statement = statement.on_conflict_do_update(index_elements = list(natural_key),
+                                                    set_ = {column: statement.excluded[column] for column in update_columns})
+    for chunk in _chunks(records, chunk_size):
+        db.execute(statement, chunk)
+    return len(records)
+
+
+def delete_stale_rows(db: Session, model, records: list[dict], natural_key: Sequence[str], page_slice: dict[str, Any],
+                      chunk_size: int = CHUNK_SIZE) -> int:
+    """Remove da fatia da tabela (linhas com os valores de "page_slice", ex.: a subopção e o ano de uma página) as linhas
+    cuja chave natural não está em "records": linhas que saíram da página ou que foram descartadas no tratamento (ex.:
+    quantidade "-"). Linhas com valor nulo em alguma coluna da chave também são removidas, já que o upsert não as
+    encontra e as duplicaria. Retorna a quantidade de linhas removidas. O commit fica a cargo de quem chamar a função.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        model -- Modelo (tabela) que receberá os dados
+        records {list[dict]} -- Linhas novas da fatia, como retornadas por dataframe_to_records
+        natural_key {Sequence[str]} -- Colunas que identificam uma linha (ex.: paises, classificacao_derivado, ano)
+        page_slice {dict[str, Any]} -- Valor de cada coluna que identifica a fatia (ex.: {'classificacao_derivado': 'Vinhos de mesa', 'ano': 2020})
+        chunk_size {int} -- Quantidade de linhas por comando
+    """
+    table = model.__table__
+    primary_key = next(iter(table.primary_key.columns))
+    keys = {tuple(record[column] for column in natural_key) for record in records}
+    query = select(primary_key, *(table.c[column] for column in natural_key)) \
+        .where(*(table.c[column] == value for column, value in page_slice.items()))
+    stale = [row[0] for row in db.execute(query) if tuple(row[1:]) not in keys or None in row[1:]]
+    for chunk in _chunks(stale, chunk_size):
+        db.execute(delete(table).where(primary_key.in_(chunk)))
+    return len(stale)
+
+
+def load_dataframe(db: Session, model, data: pd.DataFrame, columns: dict[str, str], natural_key: Sequence[str],
+                   chunk_size: int = CHUNK_SIZE, page_slice: Optional[dict[str, Any]] = None) -> int:
+    """Grava um dataframe inteiro na tabela do modelo com bulk_upsert. Retorna a quantidade de linhas gravadas.
+
+    Com "page_slice", o dataframe substitui a fatia inteira: as linhas da fatia que não estão no dataframe são removidas
+    (veja delete_stale_rows), na mesma transação.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        model -- Modelo (tabela) que receberá os dados
+        data {pd.DataFrame} -- Dataframe com os dados extraídos do site
+        columns {dict[str, str]} -- Mapeamento do nome de cada coluna do dataframe para o nome da coluna do modelo
+        natural_key {Sequence[str]} -- Colunas do modelo que identificam uma linha
+        chunk_size {int} -- Quantidade de linhas por comando
+        page_slice {Optional[dict[str, Any]]} -- Valor de cada coluna do modelo que identifica a fatia do dataframe
+    """
+    records = dataframe_to_records(data, columns) if not data.empty else []
+    if page_slice is not None:
+        delete_stale_rows(db, model, records, natural_key, page_slice, chunk_size)
+    return bulk_upsert(db, model, records, natural_key, chunk_size)
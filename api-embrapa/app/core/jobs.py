@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# Quantidade de jobs de scrap executados ao mesmo tempo e quantidade de jobs finalizados mantidos para consulta
+MAX_WORKERS = int(os.getenv("SCRAP_JOBS_MAX_WORKERS", 2))
+HISTORY_SIZE = int(os.getenv("SCRAP_JOBS_HISTORY_SIZE", 100))
+
+ACTIVE_STATES = ('queued', 'running')
+
+# Aba dos jobs de scrap de todas as abas
+ALL_ABAS = 'all'
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
+
+
+def _covers(all_abas_params: dict, params: dict) -> bool:
+    # Indica se o job de todas as abas faz o trabalho pedido para uma aba: mesmo ano e, se o pedido não for incremental
+    # (todos os anos de novo), o job de todas as abas também não é
+    return (all_abas_params.get('ano') == params.get('ano')
+            and (params.get('incremental', True) or not all_abas_params.get('incremental', True)))
+
+
+class ScrapJob:
+    """Execução em segundo plano do scrap de uma aba, com o andamento de cada página (subopção, ano).
+
+    Estados: "queued" (aguardando uma thread livre), "running", "succeeded" e "failed". Durante a execução, "stage"
+    indica a etapa atual: "fetching" (páginas sendo obtidas do site, tratadas e gravadas no banco, em pipeline),
+    "waiting" (aguardando o fim dos jobs das abas que já estavam ativos, no scrap de todas as abas), "loading" (commit
+    dos dados gravados), "trends" (tabelas de tendência da aba sendo recalculadas) ou "snapshot"
+    (snapshot Parquet da aba sendo gravado). Ao final do pipeline, "stage_timings" traz as medições de cada etapa.
+    No scrap de todas as abas (aba "all"), cada página é identificada também pela aba, e "crawl_plan" traz o resumo do
+    plano de requisições (veja scrapper.scrap.CrawlPlan.stats). Ao final do scrap, "page_changes" traz a quantidade de
+    páginas sem mudança desde o último scrap (descartadas, com estado "unchanged"), alteradas e novas. Falhas nas etapas
+    feitas depois do commit dos dados (ex.: tendências) não falham o job, já que os dados foram gravados: elas ficam
+    em "warnings".
+
+    Arguments:
+        aba {str} -- Aba do site da Embrapa (ex.: importacao), ou "all" no scrap de todas as abas
+        params {dict} -- Parâmetros recebidos pelo endpoint (ex.: ano, incremental)
+    """
+    def __init__(self, aba: str, params: dict):
+        self.id = uuid.uuid4().hex
+        self.aba = aba
+        self.params = params
+        self.state = 'queued'
+        self.stage: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.rows = 0
+        self.message: Optional[str] = None
+        self.error: Optional[str] = None
+        self.coalesced = 0
+        self.pages: dict[tuple[Optional[str], Optional[str], int], str] = {}
+        self.stage_timings: Optional[dict] = None
+        self.crawl_plan: Optional[dict] = None
+        self.page_changes: Optional[dict] = None
+        self.warnings: list[str] = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    def progress(self, subopcao: Optional[str], ano: int, estado: str, aba: Optional[str] = None) -> None:
+        """Registra o andamento de uma página (veja ProgressCallback em scrapper.scrap). A aba só é informada no scrap
+        de todas as abas."""
+        with self._lock:
+            self.pages[(aba, subopcao, ano)] = estado
+
+    def set_stage(self, stage: str) -> None:
+        with self._lock:
+            self.stage = stage
+
+    def set_timings(self, timings: dict) -> None:
+        """Registra as medições de cada etapa do pipeline de scrap (veja TimingsCallback em scrapper.scrap)."""
+        with self._lock:
+            self.stage_timings = timings
+
+    def set_plan(self, plan: dict) -> None:
+        """Registra o resumo do plano de requisições do scrap de todas as abas."""
+        with self._lock:
+            self.crawl_plan = plan
+
+    def set_page_changes(self, changes: dict) -> None:
+        """Registra a quantidade de páginas sem mudança, alteradas e novas (veja scrapper.fingerprints.PageFingerprints)."""
+        with self._lock:
+            self.page_changes = changes
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o fim do job e retorna se ele terminou dentro do tempo informado."""
+        return self._finished.wait(timeout)
+
+    def add_warning(self, warning: str) -> None:
+        """Registra a falha de uma etapa feita depois do commit dos dados."""
+        with self._lock:
+            self.warnings.append(warning)
+
+    def snapshot(self, include_pages: bool = True) -> dict:
+        """Retorna o estado do job, as durações (em segundos) e a contagem de páginas por estado. Com "include_pages",
+        inclui também o estado de cada página (subopção, ano)."""
+        with self._lock:
+            now = time.time()
+            counts = {}
+            for estado in self.pages.values():
+                counts[estado] = counts.get(estado, 0) + 1
+            snapshot = {
+                'id': self.id,
+                'aba': self.aba,
+                'params': self.params,
+                'state': self.state,
+                'stage': self.stage,
+                'created_at': _isoformat(self.created_at),
+                'started_at': _isoformat(self.started_at),
+                'finished_at': _isoformat(self.finished_at),
+                'queued_seconds': round((self.started_at or now) - self.created_at, 3),
+                'run_seconds': round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+                'pages_total': len(self.pages),
+                'pages': counts,
+                'rows': self.rows,
+                'coalesced': self.coalesced,
+                'stage_timings': self.stage_timings,
+                'crawl_plan': self.crawl_plan,
+                'page_changes': self.page_changes,
+                'warnings': list(self.warnings),
+                'message': self.message,
+                'error': self.error,
+            }
+            if include_pages:
+                snapshot['page_progress'] = [{**({'aba': aba} if aba else {}), 'subopcao': subopcao, 'ano': ano,
+                                              'state': estado}
+                                             for (aba, subopcao, ano), estado in self.pages.items()]
+            return snapshot
+
+
+class JobManager:
+    """Executa os jobs de scrap em um pool de threads, separado das threads que atendem as requisições da API.
+
+    Enquanto um job de uma aba estiver na fila ou em execução, novos pedidos para a mesma aba e com os mesmos parâmetros
+    recebem o mesmo job (coalescência). Um pedido com outros parâmetros (ex.: outro ano) cria um novo job, que só começa
+    o scrap depois que os jobs da aba que já estavam ativos terminarem, para que a mesma aba não seja buscada e gravada
+    duas vezes ao mesmo tempo. O job de todas as abas (ALL_ABAS) cobre cada uma delas: enquanto ele estiver ativo, os
+    pedidos de uma aba com o mesmo ano e que não peçam mais anos que ele (incremental) recebem esse job; os demais
+    criam um job da aba que aguarda o fim dele. O job de todas as abas só começa o scrap depois que os jobs das abas
+    que já estavam ativos terminarem.
+
+    Arguments:
+        max_workers {int} -- Quantidade de jobs executados ao mesmo tempo
+        history_size {int} -- Quantidade de jobs finalizados mantidos para consulta (os mais antigos são descartados)
+    """
+    def __init__(self, max_workers: int = MAX_WORKERS, history_size: int = HISTORY_SIZE):
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'scrap-job')
+        self._jobs: OrderedDict[str, ScrapJob] = OrderedDict()
+        self._active: dict[str, list[ScrapJob]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, aba: str, params: dict, runner: Callable[[ScrapJob], tuple[int, str]]) -> tuple[ScrapJob, bool]:
+        """Agenda um job para a aba e retorna (job, criado). Se já houver um job ativo para a aba com os mesmos
+        parâmetros, ou para todas as abas com parâmetros que cobrem o pedido, ele é retornado com criado = False e
+        "runner" não é executado.
+
+        Arguments:
+            aba {str} -- Aba do site da Embrapa (ex.: importacao), ou ALL_ABAS no scrap de todas as abas
+            params {dict} -- Parâmetros recebidos pelo endpoint, guardados para consulta e comparados na coalescência
+            runner {Callable[[ScrapJob], tuple[int, str]]} -- Função que executa o scrap e a carga, recebendo o job para
+                                                                reportar o andamento, e retorna (linhas gravadas, mensagem)
+        """
+        with self._lock:
+            same_aba = [active for active in self._active.get(aba, []) if active.active]
+            all_abas = [active for active in self._active.get(ALL_ABAS, []) if active.active] if aba != ALL_ABAS else []
+            candidates = [active for active in same_aba if active.params == params]
+            candidates += [active for active in all_abas if _covers(active.params, params)]
+            if candidates:
+                candidates[0].coalesced += 1
+                return candidates[0], False
+
+            # O novo job aguarda os jobs da mesma aba e de todas as abas que já estão ativos (com outros parâmetros); o
+            # job de todas as abas aguarda os jobs de todas as abas
+            if aba == ALL_ABAS:
+                waits = [active for jobs in self._active.values() for active in jobs if active.active]
+            else:
+                waits = same_aba + all_abas
+            job = ScrapJob(aba, params)
+            self._jobs[job.id] = job
+            self._active.setdefault(aba, []).append(job)
+            self._trim_history()
+        self._executor.submit(self._run, job, runner, waits)
+        return job, True
+
+    def _run(self, job: ScrapJob, runner: Callable[[ScrapJob], tuple[int, str]], waits: list[ScrapJob]) -> None:
+        job.started_at = time.time()
+        job.state = 'running'
+        try:
+            if waits:
+                job.set_stage('waiting')
+                for other in waits:
+                    other.wait()
+            job.set_stage('fetching')
+            job.rows, job.message = runner(job)
+            job.state = 'succeeded'
+        except Exception as error:
+            job.error = f'{type(error).__name__}: {error}'
+            job.state = 'failed'
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+            job.set_stage(None)
+            with self._lock:
+                active = self._active.get(job.aba, [])
+                if job in active:
+                    active.remove(job)
+                if not active:
+                    self._active.pop(job.aba, None)
+            job._finished.set()
+
+    def _trim_history(self) -> None:
+        # Descarta os jobs finalizados mais antigos; jobs ativos nunca são descartados
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ScrapJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, aba: Optional[str] = None, state: Optional[str] = None) -> list[ScrapJob]:
+        """Retorna os jobs conhecidos, do mais recente para o mais antigo, opcionalmente filtrados por aba e estado."""
+        with self._lock:
+            jobs = list(reversed(self._jobs.values()))
+        return [job for job in jobs if (aba is None or job.aba == aba) and (state is None or job.state == state)]
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Encerra o pool de threads, cancelando os jobs que ainda estão na fila."""
+        self._executor.shutdown(wait = wait, cancel_futures = True)
+
+
+job_manager = JobManager()
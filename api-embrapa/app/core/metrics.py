@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, TypeVar
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import Join, Select
+
+T = TypeVar('T')
+
+# Faixas (em segundos) dos histogramas de espera por uma conexão do pool e de duração das consultas
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class LatencyHistogram:
+    """Histograma cumulativo de latências (em segundos), no mesmo formato usado pelo Prometheus.
+
+    Arguments:
+        buckets {tuple[float, ...]} -- Limites superiores de cada faixa do histograma
+    """
+    def __init__(self, buckets: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for n, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[n] += 1
+                return
+        self.counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        cumulative, total = {}, 0
+        for bucket, count in zip([*map(str, self.buckets), '+Inf'], self.counts):
+            total += count
+            cumulative[bucket] = total
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class DatabaseMetrics:
+    """Métricas do banco, separadas por engine ('sync' ou 'async'): espera para obter uma conexão do pool, esperas que
+    terminaram em timeout, duração de cada consulta por tipo de comando e tabela, consultas lentas e consultas com erro.
+
+    Arguments:
+        slow_query_seconds {float} -- Duração (em segundos) a partir da qual uma consulta é contada como lenta
+    """
+    def __init__(self, slow_query_seconds: float = 0.5):
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkout_wait = defaultdict(lambda: LatencyHistogram(DB_LATENCY_BUCKETS))
+            self.checkout_timeouts = defaultdict(int)
+            self.query_seconds = defaultdict(lambda: LatencyHistogram(DB_LATENCY_BUCKETS))
+            self.slow_queries = defaultdict(int)
+            self.query_errors = defaultdict(int)
+
+    def time_checkout(self, engine: str, checkout: Callable[[], T]) -> T:
+        """Executa a retirada de uma conexão do pool medindo a espera (inclui abrir uma conexão nova, se necessário).
+
+        Arguments:
+            engine {str} -- Nome do engine ('sync' ou 'async')
+            checkout {Callable} -- Função do pool que retorna a conexão
+        """
+        start = time.perf_counter()
+        try:
+            return checkout()
+        except exc.TimeoutError:
+            with self._lock:
+                self.checkout_timeouts[engine] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.checkout_wait[engine].observe(elapsed)
+
+    def observe_query(self, engine: str, statement: str, table: str, elapsed: float) -> None:
+        with self._lock:
+            self.query_seconds[(engine, statement, table)].observe(elapsed)
+            if elapsed >= self.slow_query_seconds:
+                self.slow_queries[(engine, statement, table)] += 1
+
+    def observe_error(self, engine: str, statement: str, table: str) -> None:
+        with self._lock:
+            self.query_errors[(engine, statement, table)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'checkout_wait': {key: value.snapshot() for key, value in self.checkout_wait.items()},
+                    'checkout_timeouts': dict(self.checkout_timeouts),
+                    'query_seconds': {key: value.snapshot() for key, value in self.query_seconds.items()},
+                    'slow_queries': dict(self.slow_queries), 'query_errors': dict(self.query_errors)}
+
+
+database_metrics = DatabaseMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra em database_metrics o tempo de espera de cada retirada de conexão."""
+    engine_name = 'sync'
+
+    def _do_get(self):
+        return database_metrics.time_checkout(self.engine_name, super()._do_get)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Versão de TimedQueuePool para o engine assíncrono."""
+    engine_name = 'async'
+
+    def _do_get(self):
+        return database_metrics.time_checkout(self.engine_name, super()._do_get)
+
+
+def _table_name(clause) -> str:
+    # Nome da tabela principal de um FROM (para joins, a tabela da esquerda)
+    while isinstance(clause, Join):
+        clause = clause.left
+    return getattr(clause, 'name', None) or 'other'
+
+
+def statement_labels(context) -> tuple[str, str]:
+    """Retorna o tipo de comando (select, insert, update, delete...) e a tabela principal de uma consulta, usados como
+    labels das métricas. Consultas em texto puro ficam com a tabela 'other'. O resultado fica guardado no objeto
+    compilado, que o SQLAlchemy reaproveita entre execuções da mesma consulta.
+
+    Arguments:
+        context {ExecutionContext} -- Contexto de execução do SQLAlchemy
+    """
+    compiled = context.compiled
+    labels = getattr(compiled, '_metrics_labels', None)
+    if labels is not None:
+        return labels
+
+    words = (context.statement or '').lstrip()[:16].split(None, 1)
+    kind = words[0].lower() if words and words[0].isalpha() else 'other'
+    statement = getattr(compiled, 'statement', None)
+    if isinstance(statement, UpdateBase):
+        labels = kind, _table_name(statement.table)
+    elif isinstance(statement, Select):
+        froms = statement.get_final_froms()
+        labels = kind, _table_name(froms[0]) if froms else 'other'
+    else:
+        labels = kind, 'other'
+    if compiled is not None:
+        compiled._metrics_labels = labels
+    return labels
+
+
+def instrument_engine(engine: Engine, name: str, metrics: DatabaseMetrics = database_metrics) -> None:
+    """Registra os eventos que medem a duração de cada consulta executada pelo engine e contam as consultas com erro.
+    Para o engine assíncrono, deve ser chamada com async_engine.sync_engine.
+
+    Arguments:
+        engine {Engine} -- Engine do SQLAlchemy
+        name {str} -- Nome do engine nas métricas ('sync' ou 'async')
+        metrics {DatabaseMetrics} -- Métricas que recebem as medições
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.observe_query(name, *statement_labels(context), time.perf_counter() - context._metrics_start)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        if exception_context.execution_context is not None:
+            metrics.observe_error(name, *statement_labels(exception_context.execution_context))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram(lines: list[str], name: str, labels: dict, snapshot: dict) -> None:
+    for bucket, count in snapshot['buckets'].items():
+        lines.append(f'{name}_bucket{_labels(**labels, le=bucket)} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {snapshot["sum"]}')
+    lines.append(f'{name}_count{_labels(**labels)} {snapshot["count"]}')
+
+
+def render_prometheus(metrics: DatabaseMetrics, pools: dict[str, Pool]) -> str:
+    """Gera as métricas do banco no formato texto do Prometheus (versão 0.0.4).
+
+    Arguments:
+        metrics {DatabaseMetrics} -- Métricas de espera do pool e de duração das consultas
+        pools {dict[str, Pool]} -- Pool de conexões de cada engine, usado para o estado atual (tamanho, conexões em uso)
+    """
+    snapshot = metrics.snapshot()
+    lines = []
+
+    def header(name: str, kind: str, description: str) -> None:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    queue_pools = {engine: pool for engine, pool in pools.items() if isinstance(pool, QueuePool)}
+    for name, value, description in (
+            ('db_pool_size', QueuePool.size, 'Conexões mantidas abertas pelo pool.'),
+            ('db_pool_checked_out', QueuePool.checkedout, 'Conexões em uso.'),
+            ('db_pool_checked_in', QueuePool.checkedin, 'Conexões livres no pool.'),
+            # overflow() fica negativo enquanto o pool ainda não abriu todas as conexões do seu tamanho
+            ('db_pool_overflow', lambda pool: max(pool.overflow(), 0), 'Conexões extras abertas além do tamanho do pool.')):
+        header(name, 'gauge', description)
+        for engine, pool in queue_pools.items():
+            lines.append(f'{name}{_labels(engine=engine)} {value(pool)}')
+
+    header('db_pool_checkout_wait_seconds', 'histogram', 'Espera para obter uma conexão do pool.')
+    for engine, histogram in sorted(snapshot['checkout_wait'].items()):
+        _histogram(lines, 'db_pool_checkout_wait_seconds', {'engine': engine}, histogram)
+    header('db_pool_checkout_timeouts_total', 'counter', 'Esperas por conexão que terminaram em timeout.')
+    for engine, count in sorted(snapshot['checkout_timeouts'].items()):
+        lines.append(f'db_pool_checkout_timeouts_total{_labels(engine=engine)} {count}')
+
+    header('db_query_duration_seconds', 'histogram', 'Duração das consultas por tipo de comando e tabela.')
+    for (engine, statement, table), histogram in sorted(snapshot['query_seconds'].items()):
+        _histogram(lines, 'db_query_duration_seconds', {'engine': engine, 'statement': statement, 'table': table},
+                   histogram)
+    header('db_slow_queries_total', 'counter', f'Consultas com duração de pelo menos {metrics.slow_query_seconds}s.')
+    for (engine, statement, table), count in sorted(snapshot['slow_queries'].items()):
+        lines.append(f'db_slow_queries_total{_labels(engine=engine, statement=statement, table=table)} {count}')
+    header('db_query_errors_total', 'counter', 'Consultas que terminaram em erro.')
+    for (engine, statement, table), count in sorted(snapshot['query_errors'].items()):
+        lines.append(f'db_query_errors_total{_labels(engine=engine, statement=statement, table=table)} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,110 @@
+from sqlalchemy import Column, Connection, Engine, Index, Integer, MetaData, Numeric, String, Table, UniqueConstraint, \
+    delete, func, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.core.aggregations import numeric_expression
+from app.core.database import Base, engine as default_engine
+
+
+def text_columns_to_convert(connection: Connection, table: Table) -> list[Column]:
+    """Colunas numéricas do modelo que ainda estão gravadas como texto no banco (tabelas criadas antes da mudança de tipo)."""
+    reflected = {column['name']: column['type'] for column in inspect(connection).get_columns(table.name)}
+    return [column for column in table.columns
+            if isinstance(column.type, (Integer, Numeric)) and isinstance(reflected.get(column.name), String)]
+
+
+def convert_text_column(connection: Connection, table: Table, column: Column) -> None:
+    """Converte uma coluna de texto para o tipo numérico do modelo, mantendo os dados. Os valores são convertidos no
+    próprio banco com a regra de clean_numeric_column (pontos removidos; "-", "nd" e outros valores sem dígitos viram
+    nulo). Como o SQLite não altera o tipo de uma coluna, o mesmo caminho é usado em todos os bancos: uma coluna nova
+    recebe os valores convertidos, a coluna antiga é removida e a nova recebe o nome dela.
+
+    Arguments:
+        connection {Connection} -- Conexão com uma transação aberta
+        table {Table} -- Tabela do modelo
+        column {Column} -- Coluna do modelo a ser convertida
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    temporary = f'{column.name}__numeric'
+    column_type = column.type.compile(dialect = connection.dialect)
+
+    connection.execute(text(f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(temporary)} {column_type}'))
+    legacy = Table(table.name, MetaData(), Column(column.name, String), Column(temporary, column.type))
+    connection.execute(update(legacy).values({temporary: numeric_expression(legacy.c[column.name])}))
+    connection.execute(text(f'ALTER TABLE {quote(table.name)} DROP COLUMN {quote(column.name)}'))
+    connection.execute(text(f'ALTER TABLE {quote(table.name)} RENAME COLUMN {quote(temporary)} TO {quote(column.name)}'))
+
+
+def missing_unique_keys(connection: Connection, table: Table) -> list[UniqueConstraint]:
+    """Restrições únicas do modelo (chaves naturais) que a tabela no banco ainda não tem, nem como restrição nem como
+    índice único (tabelas criadas antes delas existirem)."""
+    inspector = inspect(connection)
+    existing = [set(constraint['column_names']) for constraint in inspector.get_unique_constraints(table.name)]
+    existing += [set(index['column_names']) for index in inspector.get_indexes(table.name) if index['unique']]
+    return [constraint for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint) and set(constraint.columns.keys()) not in existing]
+
+
+def remove_duplicates(connection: Connection, table: Table, columns: list[str]) -> int:
+    """Remove as linhas repetidas na chave natural, mantendo a de maior id (a gravada por último). Retorna a quantidade
+    de linhas removidas.
+
+    Arguments:
+        connection {Connection} -- Conexão com uma transação aberta
+        table {Table} -- Tabela do modelo
+        columns {list[str]} -- Colunas da chave natural
+    """
+    primary_key = next(iter(table.primary_key.columns))
+    # A subconsulta fica em uma tabela derivada, já que o MySQL não permite ler da tabela que está sendo alterada
+    kept = select(func.max(primary_key).label('id')).group_by(*(table.c[column] for column in columns)).subquery()
+    result = connection.execute(delete(table).where(primary_key.not_in(select(kept.c.id))))
+    return result.rowcount
+
+
+def upgrade_schema(engine: Engine = default_engine) -> list[str]:
+    """Atualiza as tabelas já existentes para o schema atual dos modelos: converte para número as colunas numéricas
+    ainda gravadas como texto, cria os índices que faltam e cria as chaves naturais (restrições únicas) que faltam, como
+    índices únicos, depois de remover as linhas repetidas em cada chave (veja remove_duplicates), para que as cargas
+    usem o upsert do banco (veja core.bulk_loader.bulk_upsert). Pode ser executada várias vezes; retorna a lista das
+    alterações feitas (vazia se o banco já estiver atualizado). Um índice único que não pode ser criado porque a tabela
+    tem valores repetidos (ex.: e-mails duplicados em users) é informado na lista e criado na próxima execução, depois
+    que os valores forem corrigidos.
+
+    Arguments:
+        engine {Engine} -- Engine do banco de dados
+    """
+    changes = []
+    with engine.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            for column in text_columns_to_convert(connection, table):
+                convert_text_column(connection, table, column)
+                changes.append(f'{table.name}.{column.name}: texto -> {column.type}')
+
+            existing_indexes = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    try:
+                        with connection.begin_nested():
+                            index.create(connection)
+                    except (IntegrityError, OperationalError) as error:
+                        changes.append(f'{table.name}: índice {index.name} não criado ({error.orig})')
+                        continue
+                    changes.append(f'{table.name}: índice {index.name}')
+
+            for constraint in missing_unique_keys(connection, table):
+                columns = list(constraint.columns.keys())
+                try:
+                    with connection.begin_nested():
+                        removed = remove_duplicates(connection, table, columns)
+                        Index(constraint.name, *(table.c[column] for column in columns), unique = True).create(connection)
+                except (IntegrityError, OperationalError) as error:
+                    changes.append(f'{table.name}: chave única {constraint.name} não criada ({error.orig})')
+                    continue
+                if removed:
+                    changes.append(f'{table.name}: {removed} linhas repetidas em ({", ".join(columns)}) removidas')
+                changes.append(f'{table.name}: chave única {constraint.name}')
+    return changes
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+# Tamanho máximo (em bytes) das respostas mantidas em memória. Zero desativa o cache.
+MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class CachedResult:
+    """Resposta já serializada (JSON em bytes), com os cabeçalhos calculados junto com ela e o ETag do conteúdo."""
+    def __init__(self, content: bytes, headers: dict[str, str]):
+        self.content = content
+        self.headers = headers
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+class ResultCache:
+    """Cache em memória (por processo) das respostas dos endpoints de dados, indexado por tabela e pelos parâmetros da
+    consulta (filtros e página), com remoção das respostas usadas há mais tempo quando o tamanho máximo é ultrapassado.
+
+    Os dados de uma tabela só mudam ao final de um scrap, que chama invalidate(tabela). Cada tabela tem uma geração,
+    incrementada a cada invalidação: uma resposta calculada antes da invalidação e armazenada depois dela é descartada.
+
+    Arguments:
+        max_bytes {int} -- Tamanho máximo (em bytes) das respostas armazenadas. Zero desativa o cache.
+    """
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._entries: OrderedDict[tuple[str, Hashable], CachedResult] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, table: str) -> int:
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    def get(self, table: str, key: Hashable) -> Optional[CachedResult]:
+        """Retorna a resposta armazenada para a consulta, ou None.
+
+        Arguments:
+            table {str} -- Nome da tabela consultada
+            key {Hashable} -- Parâmetros da consulta (ex.: ano, limit, cursor, sort)
+        """
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((table, key))
+            self.hits += 1
+            return entry
+
+    def put(self, table: str, key: Hashable, content: bytes, headers: dict[str, str], generation: int) -> CachedResult:
+        """Armazena a resposta de uma consulta e a retorna como CachedResult. A resposta não é armazenada se a tabela
+        tiver sido invalidada depois de "generation" (obtida com generation() antes da consulta) ou se for maior que
+        o tamanho máximo do cache.
+
+        Arguments:
+            table {str} -- Nome da tabela consultada
+            key {Hashable} -- Parâmetros da consulta
+            content {bytes} -- Resposta serializada
+            headers {dict[str, str]} -- Cabeçalhos da resposta (ex.: X-Total-Count)
+            generation {int} -- Geração da tabela no início da consulta
+        """
+        entry = CachedResult(content, headers)
+        with self._lock:
+            if len(content) > self.max_bytes or self._generations.get(table, 0) != generation:
+                return entry
+            previous = self._entries.pop((table, key), None)
+            if previous is not None:
+                self.size -= len(previous.content)
+            self._entries[(table, key)] = entry
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last = False)
+                self.size -= len(evicted.content)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, table: str) -> int:
+        """Remove todas as respostas da tabela e retorna quantas foram removidas."""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            keys = [key for key in self._entries if key[0] == table]
+            for key in keys:
+                self.size -= len(self._entries.pop(key).content)
+            self.invalidations += 1
+            return len(keys)
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos, faltas, remoções e invalidações, além do tamanho atual do cache."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'entries': len(self._entries), 'bytes': self.size,
+                    'max_bytes': self.max_bytes}
+
+
+result_cache = ResultCache()
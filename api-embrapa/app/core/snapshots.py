@@ -0,0 +1,128 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Integer, select
+from sqlalchemy.orm import Session
+
+# Pasta dos snapshots Parquet de cada aba. Uma string vazia desativa os snapshots.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+
+# Quantidade de snapshots mantidos por aba (os mais antigos são removidos) e linhas por row group do Parquet
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", 3))
+ROW_GROUP_SIZE = int(os.getenv("SNAPSHOT_ROW_GROUP_SIZE", 10000))
+
+MEDIA_TYPE = 'application/vnd.apache.parquet'
+
+
+def arrow_schema(model) -> pa.Schema:
+    """Schema Arrow com as colunas do modelo (exceto a chave primária): inteiros como int64 e as demais como string."""
+    return pa.schema([(column.name, pa.int64() if isinstance(column.type, Integer) else pa.string())
+                      for column in model.__table__.columns if not column.primary_key])
+
+
+class SnapshotStore:
+    """Snapshots Parquet imutáveis de cada aba, gravados a cada scrap para serem servidos sem consultar o banco.
+
+    Cada snapshot é um arquivo novo ({aba}/{aba}-{data}-{id}.parquet) que nunca é alterado depois de gravado, e o
+    arquivo {aba}/LATEST aponta para o mais recente. Tanto o snapshot quanto o ponteiro são gravados em um arquivo
+    temporário e renomeados, então quem lê sempre encontra um snapshot completo. As linhas são ordenadas por ano,
+    para que as estatísticas de cada row group permitam filtrar anos sem ler o arquivo inteiro.
+
+    Arguments:
+        directory {str} -- Pasta onde os snapshots são armazenados
+        keep {int} -- Quantidade de snapshots mantidos por aba
+        row_group_size {int} -- Quantidade de linhas por row group
+    """
+    def __init__(self, directory: str, keep: int = SNAPSHOT_KEEP, row_group_size: int = ROW_GROUP_SIZE):
+        self.directory = Path(directory)
+        self.keep = keep
+        self.row_group_size = row_group_size
+        self._lock = threading.Lock()
+
+    def latest_path(self, aba: str) -> Optional[Path]:
+        """Retorna o caminho do snapshot mais recente da aba, ou None se ela ainda não tiver snapshot."""
+        try:
+            name = (self.directory / aba / 'LATEST').read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.directory / aba / name
+        return path if path.exists() else None
+
+    def read(self, aba: str, columns: Optional[Sequence[str]] = None, ano: Optional[int] = None) -> Optional[pa.Table]:
+        """Lê o snapshot mais recente da aba com o arquivo mapeado em memória, apenas com as colunas pedidas e, se o ano
+        for informado, apenas com os row groups e linhas desse ano. Retorna None se a aba não tiver snapshot.
+
+        Arguments:
+            aba {str} -- Aba do site da Embrapa (ex.: exportacao)
+            columns {Optional[Sequence[str]]} -- Colunas a serem lidas; se não for informado, todas as colunas
+            ano {Optional[int]} -- Se for informado, apenas as linhas desse ano são lidas
+        """
+        path = self.latest_path(aba)
+        if path is None:
+            return None
+        return pq.read_table(path, columns = list(columns) if columns else None, memory_map = True,
+                             filters = [('ano', '=', ano)] if ano is not None else None)
+
+    def write(self, aba: str, table: pa.Table) -> Path:
+        """Grava um novo snapshot da aba, aponta LATEST para ele e remove os snapshots mais antigos."""
+        folder = self.directory / aba
+        folder.mkdir(parents = True, exist_ok = True)
+        name = f"{aba}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+
+        table = table.sort_by([('ano', 'ascending')])
+        temporary = folder / f'.{name}.tmp'
+        pq.write_table(table, temporary, row_group_size = self.row_group_size, compression = 'zstd')
+        os.replace(temporary, folder / name)
+
+        with self._lock:
+            pointer = folder / '.LATEST.tmp'
+            pointer.write_text(name)
+            os.replace(pointer, folder / 'LATEST')
+
+            snapshots = sorted(folder.glob(f'{aba}-*.parquet'), key = lambda path: path.stat().st_mtime)
+            for old in snapshots[:max(0, len(snapshots) - self.keep)]:
+                if old.name != name:
+                    old.unlink(missing_ok = True)
+        return folder / name
+
+    def update(self, db: Session, aba: str, model, data: pd.DataFrame, slice_columns: Sequence[str],
+               slices: Optional[pd.DataFrame] = None) -> Path:
+        """Gera o snapshot da aba após um scrap. As fatias (ex.: subopção e ano) buscadas no scrap substituem as mesmas
+        fatias do snapshot anterior, e as demais são mantidas. Se a aba ainda não tiver snapshot (ou se o snapshot anterior
+        tiver outro schema, como após uma mudança de tipo das colunas), ele é gerado a partir da tabela do banco (que já
+        contém os dados do scrap), para não ficar restrito aos anos buscados agora.
+
+        Arguments:
+            db {Session} -- Sessão do banco de dados, usada apenas quando a aba ainda não tem snapshot
+            aba {str} -- Aba do site da Embrapa (ex.: exportacao)
+            model -- Modelo (tabela) da aba, que define as colunas e os tipos do snapshot
+            data {pd.DataFrame} -- Dados do scrap, já com os nomes das colunas do modelo
+            slice_columns {Sequence[str]} -- Colunas que identificam as fatias buscadas no scrap (ex.: classificacao_derivado, ano)
+            slices {Optional[pd.DataFrame]} -- Fatias buscadas no scrap (valores de "slice_columns"). Se não for informado,
+                                               as fatias presentes em "data"; informe para que as fatias que ficaram
+                                               sem linhas também sejam removidas do snapshot
+        """
+        schema = arrow_schema(model)
+        previous = self.read(aba)
+        if previous is None or not previous.schema.equals(schema):
+            table = model.__table__
+            rows = db.execute(select(*(table.c[name] for name in schema.names))).all()
+            return self.write(aba, pa.Table.from_pylist([dict(row._mapping) for row in rows], schema = schema))
+
+        delta = data[schema.names]
+        kept = previous.to_pandas(types_mapper = {pa.int64(): pd.Int64Dtype()}.get)
+        slices = delta if slices is None else slices
+        refreshed = pd.MultiIndex.from_frame(slices[list(slice_columns)].drop_duplicates())
+        kept = kept[~pd.MultiIndex.from_frame(kept[list(slice_columns)]).isin(refreshed)]
+        merged = pd.concat([kept, delta], ignore_index = True)
+        return self.write(aba, pa.Table.from_pandas(merged, schema = schema, preserve_index = False))
+
+
+snapshot_store = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
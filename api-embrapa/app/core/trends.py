@@ -0,0 +1,139 @@
+import os
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .aggregations import MEASURE_COLUMNS
+from .bulk_loader import bulk_insert, dataframe_to_records
+
+# Quantidade de anos da média móvel
+TREND_WINDOW = int(os.getenv("TREND_WINDOW", 3))
+
+# Colunas de cada aba usadas como categoria (subopção ou tipo de produto) e como item (produto, cultivar ou país)
+TREND_COLUMNS = {
+    'producao': ('tipo_produto', 'titulo'),
+    'processamento': ('classificacao_uva', 'cultivo'),
+    'comercializacao': ('tipo_produto', 'titulo'),
+    'importacao': ('classificacao_derivado', 'paises'),
+    'exportacao': ('classificacao_derivado', 'paises'),
+}
+
+_KEYS = ['medida', 'categoria', 'item']
+
+
+def trend_cache_table(trend_model, aba: str) -> str:
+    """Nome usado no cache de respostas (veja core.result_cache) para as consultas de uma tabela de resumo na aba. As
+    tabelas de resumo são recalculadas depois do commit dos dados da aba, então suas respostas são invalidadas à parte.
+
+    Arguments:
+        trend_model -- Modelo da tabela de tendência anual ou de crescimento (CAGR)
+        aba {str} -- Aba do site da Embrapa (ex.: exportacao)
+    """
+    return f'{trend_model.__tablename__}:{aba}'
+
+
+def compute_trends(data: pd.DataFrame, categoria: str, item: str, measures: Sequence[str],
+                   window: int = TREND_WINDOW) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Calcula as tabelas de tendência de uma aba a partir dos dados limpos (uma linha por item e ano), com operações
+    vetorizadas do pandas por grupo (medida, categoria, item). Retorna dois dataframes:
+
+    - anual: uma linha por item e ano, com o valor, a variação em relação ao ano anterior (absoluta e percentual, apenas
+      quando o ano anterior existe e tem valor diferente de zero), a média móvel dos últimos "window" anos e a
+      participação do item no total da categoria naquele ano;
+    - crescimento: uma linha por item, com o primeiro ano com valor positivo, o último ano com valor, os valores desses
+      anos, o total do período e a taxa de crescimento anual composta (CAGR) entre eles.
+
+    Arguments:
+        data {pd.DataFrame} -- Dados da aba, com a coluna "ano" e as colunas de categoria, item e medidas
+        categoria {str} -- Coluna usada como categoria (ex.: classificacao_derivado)
+        item {str} -- Coluna usada como item (ex.: paises)
+        measures {Sequence[str]} -- Colunas numéricas (ex.: quantidade e valor)
+        window {int} -- Quantidade de anos da média móvel
+    """
+    frame = (data.rename(columns = {categoria: 'categoria', item: 'item'})
+                 .melt(id_vars = ['categoria', 'item', 'ano'], value_vars = list(measures), var_name = 'medida',
+                       value_name = '_valor')
+                 .rename(columns = {'_valor': 'valor'}))
+    frame['categoria'] = frame['categoria'].fillna('')
+    frame['item'] = frame['item'].fillna('')
+    frame['valor'] = pd.to_numeric(frame['valor'], errors = 'coerce').astype('float64')
+    frame = frame.sort_values(_KEYS + ['ano'], ignore_index = True)
+
+    groups = frame.groupby(_KEYS, sort = False)
+    previous = groups['valor'].shift(1).where(groups['ano'].shift(1) == frame['ano'] - 1)
+    frame['variacao'] = frame['valor'] - previous
+    frame['variacao_pct'] = frame['variacao'] / previous.where(previous != 0)
+    frame['media_movel'] = (groups['valor'].rolling(window, min_periods = 1).mean()
+                                           .reset_index(level = list(range(len(_KEYS))), drop = True))
+    total = frame.groupby(['medida', 'categoria', 'ano'])['valor'].transform('sum')
+    frame['participacao'] = frame['valor'] / total.where(total != 0)
+
+    valid = frame.dropna(subset = ['valor'])
+    start = (valid[valid['valor'] > 0].groupby(_KEYS)
+                                      .agg(ano_inicio = ('ano', 'first'), valor_inicio = ('valor', 'first')))
+    end = valid.groupby(_KEYS).agg(ano_fim = ('ano', 'last'), valor_fim = ('valor', 'last'), total = ('valor', 'sum'))
+    growth = end.join(start, how = 'left')
+    years = growth['ano_fim'] - growth['ano_inicio']
+    growth['cagr'] = np.power(growth['valor_fim'] / growth['valor_inicio'], 1 / years.where(years > 0)) - 1
+
+    yearly = frame.astype({'valor': 'Int64', 'variacao': 'Int64'})
+    growth = growth.reset_index().astype({'ano_inicio': 'Int64', 'ano_fim': 'Int64', 'valor_inicio': 'Int64',
+                                          'valor_fim': 'Int64', 'total': 'Int64'})
+    return yearly, growth
+
+
+def refresh_trends(db: Session, aba: str, model, yearly_model, growth_model) -> int:
+    """Recalcula as tabelas de tendência da aba a partir de todas as linhas da tabela do modelo (um scrap incremental
+    traz apenas alguns anos, mas a variação, a média móvel e o CAGR dependem do histórico inteiro) e substitui as linhas
+    da aba nas tabelas de resumo. Retorna a quantidade de linhas anuais gravadas. O commit fica a cargo de quem chamar
+    a função.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        aba {str} -- Aba do site da Embrapa (ex.: exportacao)
+        model -- Modelo (tabela) da aba
+        yearly_model -- Modelo da tabela de tendência anual
+        growth_model -- Modelo da tabela de crescimento (CAGR)
+    """
+    categoria, item = TREND_COLUMNS[aba]
+    table = model.__table__
+    measures = [column for column in MEASURE_COLUMNS if column in table.c]
+    columns = [categoria, item, 'ano', *measures]
+    data = pd.DataFrame(db.execute(select(*(table.c[column] for column in columns))).all(), columns = columns)
+
+    db.execute(delete(yearly_model).where(yearly_model.aba == aba))
+    db.execute(delete(growth_model).where(growth_model.aba == aba))
+    if data.empty:
+        return 0
+
+    yearly, growth = compute_trends(data, categoria, item, measures)
+    yearly_columns = {column: column for column in ['medida', 'categoria', 'item', 'ano', 'valor', 'variacao',
+                                                    'variacao_pct', 'media_movel', 'participacao']}
+    growth_columns = {column: column for column in ['medida', 'categoria', 'item', 'ano_inicio', 'ano_fim',
+                                                    'valor_inicio', 'valor_fim', 'total', 'cagr']}
+    bulk_insert(db, yearly_model, dataframe_to_records(yearly.assign(aba = aba), {'aba': 'aba', **yearly_columns}))
+    bulk_insert(db, growth_model, dataframe_to_records(growth.assign(aba = aba), {'aba': 'aba', **growth_columns}))
+    return len(yearly)
+
+
+def refresh_missing_trends(db: Session, models: dict, yearly_model, growth_model) -> list[str]:
+    """Calcula as tabelas de tendência das abas que têm dados mas ainda não têm tendências (ex.: bancos carregados antes
+    da criação das tabelas de resumo). Retorna as abas calculadas.
+
+    Arguments:
+        db {Session} -- Sessão do banco de dados
+        models {dict} -- Modelo (tabela) de cada aba
+        yearly_model -- Modelo da tabela de tendência anual
+        growth_model -- Modelo da tabela de crescimento (CAGR)
+    """
+    refreshed = []
+    for aba, model in models.items():
+        has_trends = db.scalar(select(yearly_model.id).where(yearly_model.aba == aba).limit(1)) is not None
+        if not has_trends and db.scalar(select(model.id).limit(1)) is not None:
+            refresh_trends(db, aba, model, yearly_model, growth_model)
+            db.commit()
+            refreshed.append(aba)
+    return refreshed
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class ComercializationScrapedData(Base):
     __tablename__ = "comercializacao_scraped_data"
+    __table_args__ = (UniqueConstraint('titulo', 'tipo_produto', 'ano', name='uq_comercializacao_titulo_tipo_produto_ano'),
+                      Index('ix_comercializacao_ano_tipo_produto', 'ano', 'tipo_produto'))
 
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(255), index=True)
     ano = Column(Integer)
-    quantidade = Column(String(255), nullable=True)
+    quantidade = Column(BigInteger, nullable=True)
     tipo_produto = (Column(String(255), nullable=True))
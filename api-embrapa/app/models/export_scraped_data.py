@@ -1,12 +1,15 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class ExportScrapedData(Base):
     __tablename__ = "exportacao_scraped_data"
+    __table_args__ = (UniqueConstraint('paises', 'classificacao_derivado', 'ano', name='uq_exportacao_paises_classificacao_ano'),
+                      Index('ix_exportacao_ano_classificacao', 'ano', 'classificacao_derivado'),
+                      Index('ix_exportacao_paises_ano', 'paises', 'ano'))
 
     id = Column(Integer, primary_key=True, index=True)
     paises = Column(String(255), index=True)
-    valor = Column(String(255), nullable=True)
+    valor = Column(BigInteger, nullable=True)
     ano = Column(Integer)
-    quantidade = Column(String(255), nullable=True)
+    quantidade = Column(BigInteger, nullable=True)
     classificacao_derivado = Column(String(255), nullable=True)
\ No newline at end of file
@@ -1,12 +1,15 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class ImportScrapedData(Base):
     __tablename__ = "importacao_scraped_data"
+    __table_args__ = (UniqueConstraint('paises', 'classificacao_derivado', 'ano', name='uq_importacao_paises_classificacao_ano'),
+                      Index('ix_importacao_ano_classificacao', 'ano', 'classificacao_derivado'),
+                      Index('ix_importacao_paises_ano', 'paises', 'ano'))
 
     id = Column(Integer, primary_key=True, index=True)
     paises = Column(String(255), index=True)
-    valor = Column(String(255), nullable=True)
+    valor = Column(BigInteger, nullable=True)
     ano = Column(Integer)
-    quantidade = Column(String(255), nullable=True)
+    quantidade = Column(BigInteger, nullable=True)
     classificacao_derivado = Column(String(255), nullable=True) 
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+from app.core.database import Base
+
+class ScrapPageState(Base):
+    # Hash da tabela de cada página (aba, subopção, ano) no último scrap, usado para descartar as páginas que não mudaram
+    # (veja app.scrapper.fingerprints.PageFingerprints). Nas abas sem subopções, a subopção é gravada como texto vazio
+    __tablename__ = "scrap_page_state"
+    __table_args__ = (UniqueConstraint('aba', 'subopcao', 'ano', name='uq_scrap_page_state_pagina'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    aba = Column(String(50))
+    subopcao = Column(String(255))
+    ano = Column(Integer)
+    content_hash = Column(String(64))
+    updated_at = Column(DateTime(timezone=True))
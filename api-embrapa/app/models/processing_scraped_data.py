@@ -1,11 +1,13 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class ProcessingScrapedData(Base):
     __tablename__ = "processamento_scraped_data"
+    __table_args__ = (UniqueConstraint('cultivo', 'classificacao_uva', 'ano', name='uq_processamento_cultivo_classificacao_ano'),
+                      Index('ix_processamento_ano_classificacao', 'ano', 'classificacao_uva'))
 
     id = Column(Integer, primary_key=True, index=True)
     cultivo = Column(String(255), index=True, nullable=True)
-    quantidade = Column(String(255), nullable=True)
+    quantidade = Column(BigInteger, nullable=True)
     ano = Column(Integer)
     classificacao_uva = Column(String(255), nullable=True)
\ No newline at end of file
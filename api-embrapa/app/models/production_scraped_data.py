@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, UniqueConstraint
 from app.core.database import Base
 
 class ProductionScrapedData(Base):
     __tablename__ = "producao_scraped_data"
+    __table_args__ = (UniqueConstraint('titulo', 'tipo_produto', 'ano', name='uq_producao_titulo_tipo_produto_ano'),
+                      Index('ix_producao_ano_tipo_produto', 'ano', 'tipo_produto'))
 
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(255), index=True)
@@ -0,0 +1,38 @@
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String, UniqueConstraint
+from app.core.database import Base
+
+class TrendYearlyData(Base):
+    __tablename__ = "tendencia_anual"
+    __table_args__ = (UniqueConstraint('aba', 'medida', 'categoria', 'item', 'ano', name='uq_tendencia_anual_item_ano'),
+                      Index('ix_tendencia_anual_aba_medida_ano', 'aba', 'medida', 'ano'),
+                      Index('ix_tendencia_anual_aba_medida_item', 'aba', 'medida', 'item', 'ano'))
+
+    id = Column(Integer, primary_key=True, index=True)
+    aba = Column(String(50))
+    medida = Column(String(50))
+    categoria = Column(String(255))
+    item = Column(String(255))
+    ano = Column(Integer)
+    valor = Column(BigInteger, nullable=True)
+    variacao = Column(BigInteger, nullable=True)
+    variacao_pct = Column(Float, nullable=True)
+    media_movel = Column(Float, nullable=True)
+    participacao = Column(Float, nullable=True)
+
+
+class TrendGrowthData(Base):
+    __tablename__ = "tendencia_crescimento"
+    __table_args__ = (UniqueConstraint('aba', 'medida', 'categoria', 'item', name='uq_tendencia_crescimento_item'),
+                      Index('ix_tendencia_crescimento_aba_medida_cagr', 'aba', 'medida', 'cagr'))
+
+    id = Column(Integer, primary_key=True, index=True)
+    aba = Column(String(50))
+    medida = Column(String(50))
+    categoria = Column(String(255))
+    item = Column(String(255))
+    ano_inicio = Column(Integer, nullable=True)
+    ano_fim = Column(Integer, nullable=True)
+    valor_inicio = Column(BigInteger, nullable=True)
+    valor_fim = Column(BigInteger, nullable=True)
+    total = Column(BigInteger, nullable=True)
+    cagr = Column(Float, nullable=True)
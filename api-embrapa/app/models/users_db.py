@@ -7,5 +7,5 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     password = Column(String(255))
-    email = Column(String(255))
+    email = Column(String(255), unique=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
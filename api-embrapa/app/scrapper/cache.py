@@ -0,0 +1,214 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+# Pasta do cache de páginas do site da Embrapa. Uma string vazia desativa o cache.
+CACHE_DIR = os.getenv("SCRAP_CACHE_DIR", ".scrap_cache")
+
+# Tempo de validade (em segundos) das páginas de anos fechados e das páginas que ainda podem mudar
+# (anos recentes e páginas sem ano, usadas para descobrir subopções e faixas de anos)
+CLOSED_YEAR_TTL = float(os.getenv("SCRAP_CACHE_CLOSED_YEAR_TTL", 30 * 24 * 3600))
+OPEN_TTL = float(os.getenv("SCRAP_CACHE_OPEN_TTL", 6 * 3600))
+
+# Quantidade de anos mais recentes (contando o ano atual) que o site ainda pode revisar
+MUTABLE_YEARS = int(os.getenv("SCRAP_CACHE_MUTABLE_YEARS", 3))
+
+# Tamanho máximo do cache em disco. As páginas acessadas há mais tempo são removidas primeiro.
+MAX_BYTES = int(os.getenv("SCRAP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class CachedPage:
+    """Página armazenada no cache, com os validadores (ETag e Last-Modified) enviados pelo servidor."""
+    def __init__(self, content: bytes, digest: str, fetched_at: float, ttl: float,
+                 etag: Optional[str], last_modified: Optional[str]):
+        self.content = content
+        self.digest = digest
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.fetched_at < self.ttl
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Cabeçalhos para revalidar a página com o servidor (resposta 304 caso ela não tenha mudado)."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Cache persistente em disco das páginas do site da Embrapa, indexado por (opcao, subopcao, ano).
+
+    O conteúdo das páginas é armazenado pelo seu hash (sha256), então páginas idênticas ocupam espaço uma única vez.
+    O índice (sqlite) guarda o hash, o momento do download, a validade e os validadores HTTP de cada página, além do
+    último acesso, usado para remover as páginas menos usadas quando o tamanho máximo é ultrapassado.
+
+    Arguments:
+        directory {str} -- Pasta onde o cache é armazenado
+        closed_year_ttl {float} -- Validade (em segundos) das páginas de anos fechados
+        open_ttl {float} -- Validade (em segundos) das páginas de anos recentes e das páginas sem ano
+        max_bytes {int} -- Tamanho máximo (em bytes) do conteúdo armazenado
+    """
+    def __init__(self, directory: str, closed_year_ttl: float = CLOSED_YEAR_TTL, open_ttl: float = OPEN_TTL,
+                 max_bytes: int = MAX_BYTES):
+        self.directory = Path(directory)
+        self.closed_year_ttl = closed_year_ttl
+        self.open_ttl = open_ttl
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.revalidations = self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # O índice é aberto apenas no primeiro uso, para que importar o scraper não crie a pasta do cache
+        if self._connection is None:
+            (self.directory / 'blobs').mkdir(parents = True, exist_ok = True)
+            self._connection = sqlite3.connect(self.directory / 'index.sqlite', check_same_thread = False,
+                                               isolation_level = None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                )''')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at)')
+        return self._connection
+
+    @staticmethod
+    def make_key(opcao: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> str:
+        return f'{opcao}|{subopcao or ""}|{ano or ""}'
+
+    def ttl_for(self, ano: Optional[int]) -> float:
+        """Validade das páginas de um ano: longa para anos fechados e curta para anos recentes e páginas sem ano."""
+        if ano is None or int(ano) > date.today().year - MUTABLE_YEARS:
+            return self.open_ttl
+        return self.closed_year_ttl
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / 'blobs' / digest[:2] / digest
+
+    def get(self, opcao: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> Optional[CachedPage]:
+        """Retorna a página armazenada (mesmo que vencida, para permitir a revalidação) ou None se ela não existir.
+
+        Arguments:
+            opcao {str} -- Valor do parâmetro "opcao" da página (ex.: opt_02)
+            subopcao {Optional[str]} -- Valor do parâmetro "subopcao" da página
+            ano {Optional[int]} -- Valor do parâmetro "ano" da página
+        """
+        key = self.make_key(opcao, subopcao, ano)
+        with self._lock:
+            row = self.connection.execute('SELECT digest, fetched_at, etag, last_modified FROM pages WHERE key = ?',
+                                          (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            digest, fetched_at, etag, last_modified = row
+            try:
+                content = self._blob_path(digest).read_bytes()
+            except FileNotFoundError:
+                self.connection.execute('DELETE FROM pages WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+            self.connection.execute('UPDATE pages SET accessed_at = ? WHERE key = ?', (time.time(), key))
+
+        page = CachedPage(content, digest, fetched_at, self.ttl_for(ano), etag, last_modified)
+        with self._lock:
+            if page.is_fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return page
+
+    def put(self, opcao: str, subopcao: Optional[str], ano: Optional[int], content: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> str:
+        """Armazena o conteúdo de uma página e retorna o seu hash (sha256).
+
+        Arguments:
+            opcao {str} -- Valor do parâmetro "opcao" da página (ex.: opt_02)
+            subopcao {Optional[str]} -- Valor do parâmetro "subopcao" da página
+            ano {Optional[int]} -- Valor do parâmetro "ano" da página
+            content {bytes} -- Conteúdo da página
+            etag {Optional[str]} -- Cabeçalho ETag da resposta, se houver
+            last_modified {Optional[str]} -- Cabeçalho Last-Modified da resposta, se houver
+        """
+        key = self.make_key(opcao, subopcao, ano)
+        digest = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        with self._lock:
+            path = self._blob_path(digest)
+            if not path.exists():
+                path.parent.mkdir(parents = True, exist_ok = True)
+                temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+                temporary.write_bytes(content)
+                os.replace(temporary, path)
+
+            previous = self.connection.execute('SELECT digest FROM pages WHERE key = ?', (key,)).fetchone()
+            self.connection.execute(
+                'INSERT OR REPLACE INTO pages (key, digest, size, fetched_at, accessed_at, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', (key, digest, len(content), now, now, etag, last_modified))
+            if previous and previous[0] != digest:
+                self._delete_blob_if_unused(previous[0])
+            self._evict()
+        return digest
+
+    def mark_revalidated(self, opcao: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> None:
+        """Renova a validade de uma página após o servidor responder que ela não mudou (HTTP 304)."""
+        with self._lock:
+            self.revalidations += 1
+            self.connection.execute('UPDATE pages SET fetched_at = ? WHERE key = ?',
+                                    (time.time(), self.make_key(opcao, subopcao, ano)))
+
+    def _delete_blob_if_unused(self, digest: str) -> None:
+        if not self.connection.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+            self._blob_path(digest).unlink(missing_ok = True)
+
+    def _evict(self) -> None:
+        # Remove as páginas acessadas há mais tempo até que o conteúdo armazenado caiba no tamanho máximo.
+        # Conteúdos compartilhados por várias páginas contam uma única vez.
+        total = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self.connection.execute(
+                'SELECT key, digest, size FROM pages ORDER BY accessed_at').fetchall():
+            self.connection.execute('DELETE FROM pages WHERE key = ?', (key,))
+            self.evictions += 1
+            if not self.connection.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+                self._blob_path(digest).unlink(missing_ok = True)
+                total -= size
+            if total <= self.max_bytes:
+                return
+
+    def clear(self) -> None:
+        """Remove todas as páginas do cache."""
+        with self._lock:
+            for (digest,) in self.connection.execute('SELECT DISTINCT digest FROM pages').fetchall():
+                self._blob_path(digest).unlink(missing_ok = True)
+            self.connection.execute('DELETE FROM pages')
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos, faltas, revalidações e remoções do cache, além do seu tamanho atual."""
+        with self._lock:
+            pages, size = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages').fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+                    'evictions': self.evictions, 'pages': pages, 'bytes': size}
+
+
+page_cache = PageCache(CACHE_DIR) if CACHE_DIR else None
@@ -0,0 +1,57 @@
+import threading
+from typing import Optional
+
+from .table_parser import table_fingerprint
+
+# Página (aba, nome da subopção, ano) identificada pelo hash da tabela. O nome da subopção é o mesmo gravado nas tabelas
+# do banco (ex.: classificacao_derivado), e None nas abas sem subopções
+FingerprintKey = tuple[str, Optional[str], int]
+
+
+class PageFingerprints:
+    """Detecção de páginas alteradas pelo hash da tabela de dados (veja table_parser.table_fingerprint). Cada página
+    obtida do site é comparada com o hash gravado no último scrap: se for igual, a página não é lida, tratada nem
+    gravada novamente. As páginas novas e alteradas ficam em "seen", para que o novo hash seja gravado junto com as
+    linhas da página.
+
+    Usada pela etapa "fetch" do pipeline, com várias threads ao mesmo tempo.
+
+    Arguments:
+        known {Optional[dict[FingerprintKey, str]]} -- Hash de cada página no último scrap (ex.: lido da tabela
+                                                       scrap_page_state)
+        table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+    """
+    def __init__(self, known: Optional[dict[FingerprintKey, str]] = None, table_attr: str = "tb_base tb_dados"):
+        self.known = dict(known or {})
+        self.table_attr = table_attr
+        self.seen: dict[FingerprintKey, str] = {}
+        self.unchanged = self.changed = self.new = 0
+        self._lock = threading.Lock()
+
+    def is_unchanged(self, aba: str, sub_option_name: Optional[str], ano: int, html: str) -> bool:
+        """Calcula o hash da página e indica se ele é igual ao do último scrap. Páginas novas ou alteradas têm o hash
+        guardado em "seen".
+
+        Arguments:
+            aba {str} -- Chave do dicionário "abas"
+            sub_option_name {Optional[str]} -- Nome da subopção da página, ou None nas abas sem subopções
+            ano {int} -- Ano da página
+            html {str} -- Html da página
+        """
+        key = (aba, sub_option_name, int(ano))
+        digest = table_fingerprint(html, self.table_attr)
+        previous = self.known.get(key)
+        with self._lock:
+            if previous == digest:
+                self.unchanged += 1
+                return True
+            if previous is None:
+                self.new += 1
+            else:
+                self.changed += 1
+            self.seen[key] = digest
+        return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'unchanged': self.unchanged, 'changed': self.changed, 'new': self.new}
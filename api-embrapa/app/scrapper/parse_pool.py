@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from .table_parser import TableRows, extract_table_rows
+
+# Quantidade de processos usados para extrair as tabelas das páginas (motor "stream"). Com 1 (ou 0), as tabelas são
+# extraídas no próprio processo da API
+PARSE_PROCESSES = int(os.getenv("SCRAP_PARSE_PROCESSES", os.cpu_count() or 1))
+
+# Planos de requisições com menos páginas que isso são extraídos no próprio processo: para poucas páginas, enviar o html
+# para outro processo custa mais do que extrair a tabela
+PARSE_POOL_MIN_PAGES = int(os.getenv("SCRAP_PARSE_POOL_MIN_PAGES", 32))
+
+
+def parse_rows(html: bytes, table_attr: str) -> Optional[TableRows]:
+    """Executada nos processos do pool: decodifica o html e retorna apenas os nomes das colunas e as linhas da tabela
+    (listas de textos, baratas de serializar de volta), ou None se a tabela não for encontrada.
+
+    Arguments:
+        html {bytes} -- Html da página, codificado em utf-8
+        table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+    """
+    return extract_table_rows(html.decode('utf-8'), table_attr)
+
+
+class ParsePool:
+    """Pool de processos para extrair as tabelas das páginas em paralelo. O tokenizador de html é Python puro e segura
+    o GIL, então várias threads não aceleram a extração; processos sim, um por núcleo. Os processos são criados no
+    primeiro uso (com "forkserver", que não copia as threads do processo da API) e reaproveitados entre os scraps.
+
+    Arguments:
+        processes {int} -- Quantidade de processos. Com 1 ou menos, o pool nunca é usado.
+        min_pages {int} -- Quantidade mínima de páginas de um plano para que ele use o pool (veja enabled_for)
+    """
+    def __init__(self, processes: int = PARSE_PROCESSES, min_pages: int = PARSE_POOL_MIN_PAGES):
+        self.processes = processes
+        self.min_pages = min_pages
+        self.pool_pages = self.fallback_pages = self.restarts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def enabled_for(self, pages: int) -> bool:
+        """Indica se um plano com essa quantidade de páginas deve ser extraído no pool."""
+        return self.processes > 1 and pages >= self.min_pages
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.processes, mp_context = multiprocessing.get_context(method))
+            return self._executor
+
+    def parse(self, html: str, table_attr: str) -> Optional[TableRows]:
+        """Extrai a tabela em um dos processos do pool e bloqueia até o resultado. Se o pool quebrar (ex.: um processo
+        morto pelo sistema), a página é extraída no próprio processo e o pool é recriado no próximo uso.
+
+        Arguments:
+            html {str} -- Html de uma página do site da Embrapa
+            table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+        """
+        executor = self._get_executor()
+        try:
+            rows = executor.submit(parse_rows, html.encode('utf-8'), table_attr).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                    self.restarts += 1
+                self.fallback_pages += 1
+            executor.shutdown(wait = False)
+            return extract_table_rows(html, table_attr)
+        with self._lock:
+            self.pool_pages += 1
+        return rows
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait = True, cancel_futures = True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'processes': self.processes, 'min_pages': self.min_pages, 'running': self._executor is not None,
+                    'pool_pages': self.pool_pages, 'fallback_pages': self.fallback_pages, 'restarts': self.restarts}
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,182 @@
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence
+
+# Quantidade máxima de itens esperando entre duas etapas do pipeline. Limita a memória usada quando uma etapa é mais
+# lenta que a anterior (ex.: páginas baixadas esperando a gravação no banco)
+QUEUE_SIZE = int(os.getenv("SCRAP_PIPELINE_QUEUE_SIZE", 8))
+
+# Intervalo (em segundos) em que as threads bloqueadas em uma fila verificam se o pipeline foi interrompido por um erro
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    """Etapa do pipeline: "function" recebe cada item da etapa anterior e retorna o item da próxima etapa. Se retornar
+    None, o item é descartado.
+
+    Arguments:
+        name {str} -- Nome da etapa nas medições de tempo (ex.: fetch)
+        function {Callable} -- Função aplicada a cada item
+        workers {int} -- Quantidade de threads da etapa
+    """
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+
+
+class StageTimings:
+    """Medições de uma etapa: itens processados, tempo de trabalho (soma de todas as threads), tempo esperando itens da
+    etapa anterior, tempo bloqueado com a fila da próxima etapa cheia e maior ocupação da fila de entrada."""
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.input_wait_seconds = 0.0
+        self.output_wait_seconds = 0.0
+        self.max_queue_depth = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, **values: float) -> None:
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'workers': self.workers, 'items': self.items, 'busy_seconds': round(self.busy_seconds, 3),
+                    'input_wait_seconds': round(self.input_wait_seconds, 3),
+                    'output_wait_seconds': round(self.output_wait_seconds, 3), 'max_queue_depth': self.max_queue_depth,
+                    'elapsed_seconds': round(self.finished_at - self.started_at, 3)
+                                       if self.finished_at and self.started_at is not None else None}
+
+
+class Pipeline:
+    """Executa as etapas ao mesmo tempo, cada uma com suas threads, ligadas por filas limitadas (produtor/consumidor).
+    Enquanto uma etapa trabalha em um item, a anterior já trabalha nos próximos; quando uma fila enche, a etapa que a
+    alimenta espera, o que limita a quantidade de itens em memória. Os itens saem da última etapa na ordem em que ficam
+    prontos. Se uma etapa lançar uma exceção, o pipeline é interrompido e a exceção é relançada por run().
+
+    Arguments:
+        stages {Sequence[Stage]} -- Etapas, na ordem em que os itens passam por elas
+        queue_size {int} -- Tamanho máximo de cada fila entre etapas
+    """
+    def __init__(self, stages: Sequence[Stage], queue_size: int = QUEUE_SIZE):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.timings = {stage.name: StageTimings(stage.name, stage.workers) for stage in self.stages}
+        self.elapsed_seconds = 0.0
+
+    def _put(self, output: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                output.put(item, timeout = _POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: queue.Queue, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                return source.get(timeout = _POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def run(self, items: Iterable) -> list:
+        """Passa os itens por todas as etapas e retorna os resultados da última etapa (que não forem None)."""
+        queues = [queue.Queue(maxsize = self.queue_size) for _ in self.stages]
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        results: list = []
+        results_lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def fail(error: BaseException) -> None:
+            errors.append(error)
+            stop.set()
+
+        def feed() -> None:
+            try:
+                for item in items:
+                    if not self._put(queues[0], item, stop):
+                        return
+                for _ in range(self.stages[0].workers):
+                    self._put(queues[0], _DONE, stop)
+            except BaseException as error:
+                fail(error)
+
+        def work(index: int) -> None:
+            stage, timings = self.stages[index], self.timings[self.stages[index].name]
+            source = queues[index]
+            output = queues[index + 1] if index + 1 < len(self.stages) else None
+            try:
+                while True:
+                    start = time.perf_counter()
+                    item = self._get(source, stop)
+                    waited = time.perf_counter() - start
+                    if item is _DONE:
+                        break
+                    with timings._lock:
+                        timings.max_queue_depth = max(timings.max_queue_depth, source.qsize() + 1)
+                        if timings.started_at is None:
+                            timings.started_at = time.perf_counter()
+
+                    start = time.perf_counter()
+                    result = stage.function(item)
+                    busy = time.perf_counter() - start
+                    if result is None:
+                        timings.add(items = 1, busy_seconds = busy, input_wait_seconds = waited)
+                        continue
+                    if output is None:
+                        with results_lock:
+                            results.append(result)
+                        timings.add(items = 1, busy_seconds = busy, input_wait_seconds = waited)
+                        continue
+
+                    start = time.perf_counter()
+                    delivered = self._put(output, result, stop)
+                    timings.add(items = 1, busy_seconds = busy, input_wait_seconds = waited,
+                                output_wait_seconds = time.perf_counter() - start)
+                    if not delivered:
+                        break
+            except BaseException as error:
+                fail(error)
+            finally:
+                # A última thread de cada etapa avisa a próxima etapa que não haverá mais itens
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last = remaining[index] == 0
+                if last:
+                    timings.finished_at = time.perf_counter()
+                    if output is not None:
+                        for _ in range(self.stages[index + 1].workers):
+                            self._put(output, _DONE, stop)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target = feed, name = 'pipeline-feed', daemon = True)]
+        for index, stage in enumerate(self.stages):
+            threads += [threading.Thread(target = work, args = (index,), name = f'pipeline-{stage.name}', daemon = True)
+                        for _ in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed_seconds = time.perf_counter() - start
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def snapshot(self) -> dict:
+        """Retorna as medições de cada etapa (veja StageTimings) e a duração total do pipeline."""
+        return {'elapsed_seconds': round(self.elapsed_seconds, 3),
+                'stages': {name: timings.snapshot() for name, timings in self.timings.items()}}
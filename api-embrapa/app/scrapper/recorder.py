@@ -0,0 +1,127 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Modo de acesso ao site da Embrapa: "live" (requisições normais), "record" (requisições normais, gravando cada página
+# obtida em SCRAP_RECORD_DIR) ou "replay" (as páginas são lidas de SCRAP_RECORD_DIR, sem nenhuma requisição)
+HTTP_MODE = os.getenv("SCRAP_HTTP_MODE", "live")
+RECORD_DIR = os.getenv("SCRAP_RECORD_DIR", "recordings")
+
+HTTP_MODES = ('live', 'record', 'replay')
+
+
+class RecordingNotFound(LookupError):
+    """Lançada no modo replay quando a página pedida não foi gravada."""
+
+
+class PageRecorder:
+    """Grava e lê páginas do site da Embrapa em um diretório, um arquivo html por (aba, subopção, ano), com o mesmo nome
+    usado pelos fixtures dos testes (ex.: processamento_subopt_01_2020.html; páginas sem ano, usadas para descobrir as
+    subopções e a faixa de anos, ficam como processamento_subopt_01.html).
+
+    Arguments:
+        directory {str} -- Diretório das páginas gravadas
+        mode {str} -- "record" ou "replay" (veja HTTP_MODE)
+    """
+    def __init__(self, directory: str, mode: str = 'replay'):
+        if mode not in HTTP_MODES:
+            raise ValueError(f'Invalid HTTP mode {mode!r}, expected one of {HTTP_MODES}')
+        self.directory = Path(directory)
+        self.mode = mode
+        self.recorded = self.replayed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    def path_for(self, aba: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> Path:
+        name = '_'.join(str(part) for part in (aba, subopcao, ano) if part not in (None, ''))
+        return self.directory / f'{name}.html'
+
+    def save(self, aba: str, subopcao: Optional[str], ano: Optional[int], html: str) -> None:
+        """Grava a página (substituindo a gravação anterior, se existir)."""
+        path = self.path_for(aba, subopcao, ano)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        temporary.write_text(html, encoding = 'utf-8')
+        temporary.replace(path)
+        with self._lock:
+            self.recorded += 1
+
+    def load(self, aba: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> str:
+        """Retorna a página gravada ou lança RecordingNotFound."""
+        path = self.path_for(aba, subopcao, ano)
+        try:
+            html = path.read_text(encoding = 'utf-8')
+        except FileNotFoundError:
+            raise RecordingNotFound(f'No recording for {path.name} in {self.directory}') from None
+        with self._lock:
+            self.replayed += 1
+        return html
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'mode': self.mode, 'directory': str(self.directory), 'recorded': self.recorded,
+                    'replayed': self.replayed}
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server: 'ReplayServer'
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        aba = self.server.abas.get(params.get('opcao'))
+        try:
+            body = self.server.recorder.load(aba, params.get('subopcao'), params.get('ano')).encode('utf-8')
+        except RecordingNotFound:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Servidor HTTP local que responde com as páginas gravadas, no lugar do site da Embrapa. Diferente do modo replay,
+    as requisições passam por todo o caminho do scraper (sessão HTTP, limite de requisições e cache de páginas).
+    Páginas não gravadas respondem 404.
+
+    Arguments:
+        directory {str} -- Diretório das páginas gravadas (veja PageRecorder)
+        port {int} -- Porta do servidor. Zero escolhe uma porta livre.
+    """
+    daemon_threads = True
+
+    def __init__(self, directory: str, port: int = 0):
+        from .scrap import abas
+        super().__init__(('127.0.0.1', port), _ReplayHandler)
+        self.recorder = PageRecorder(directory, 'replay')
+        self.abas = {opcao: aba for aba, opcao in abas.items()}
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target = self.serve_forever, daemon = True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+page_recorder = PageRecorder(RECORD_DIR, HTTP_MODE) if HTTP_MODE != 'live' else None
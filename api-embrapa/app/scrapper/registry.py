@@ -0,0 +1,86 @@
+import importlib
+from typing import NamedTuple, Optional
+
+
+class AbaSpec(NamedTuple):
+    """Descrição de uma aba do site da Embrapa: como as páginas são tratadas e onde as linhas são gravadas. O mesmo
+    motor de scrap (veja scrap.scrap_aba e scrap.clean_aba_page) e de carga (veja app.api.endpoints.scrap_api.run_scrap)
+    atende todas as abas a partir dessas descrições.
+
+    O tratamento de cada página segue sempre a mesma ordem: renomeia as colunas da tabela ("column_renames"), adiciona
+    a coluna "ano", a coluna com o nome da subopção ("sub_option_column"), a coluna "tipo_produto" (se "tipo_produto")
+    e converte as colunas numéricas ("numeric_columns").
+
+    Arguments:
+        aba {str} -- Nome da aba usado nos endpoints (ex.: importacao)
+        opcao {str} -- Valor do parâmetro "opcao" da aba no site (ex.: opt_05)
+        label {str} -- Nome da aba usado nas mensagens dos jobs
+        sub_option_column {Optional[str]} -- Coluna que recebe o nome da subopção da página. None nas abas sem subopções.
+        column_renames {dict[str,str]} -- Colunas da tabela que aparecem com outro nome em algumas páginas
+        tipo_produto {bool} -- Se verdadeiro, as linhas em maiúsculo viram a coluna "tipo_produto" (veja
+                               scrap.tipo_produto_as_column); em páginas sem essas linhas, a coluna recebe o nome da subopção
+        numeric_columns {tuple[str, ...]} -- Colunas com números em texto (ex.: "1.234"), convertidas para inteiros
+        drop_invalid {bool} -- Se verdadeiro, as linhas sem número em alguma das colunas numéricas são descartadas
+        table_columns {dict[str,str]} -- Mapeamento das colunas do dataframe tratado para as colunas da tabela no banco
+        natural_key {tuple[str, ...]} -- Colunas da tabela que identificam cada linha (veja core.bulk_loader.load_dataframe)
+        model_path {str} -- Caminho do modelo (tabela) da aba, importado apenas quando usado (veja "model")
+    """
+    aba: str
+    opcao: str
+    label: str
+    sub_option_column: Optional[str]
+    column_renames: dict[str, str]
+    tipo_produto: bool
+    numeric_columns: tuple[str, ...]
+    drop_invalid: bool
+    table_columns: dict[str, str]
+    natural_key: tuple[str, ...]
+    model_path: str
+
+    @property
+    def has_sub_options(self) -> bool:
+        return self.sub_option_column is not None
+
+    @property
+    def classificacao(self) -> Optional[str]:
+        """Coluna da tabela com o nome da subopção, se a aba tiver subopções."""
+        return self.table_columns[self.sub_option_column] if self.has_sub_options else None
+
+    @property
+    def model(self):
+        """Modelo (tabela) da aba. O scraper não depende do banco: o modelo só é importado quando as linhas são gravadas."""
+        module, name = self.model_path.rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+
+
+PRODUTO_COLUMNS = {'Produto': 'titulo', 'ano': 'ano', 'Quantidade (L.)': 'quantidade', 'tipo_produto': 'tipo_produto'}
+COMERCIO_EXTERIOR_COLUMNS = {'Países': 'paises', 'Valor (US$)': 'valor', 'ano': 'ano', 'Quantidade (Kg)': 'quantidade',
+                             'classificacao_derivado': 'classificacao_derivado'}
+
+ABAS = {spec.aba: spec for spec in (
+    AbaSpec('producao', 'opt_02', "Production", sub_option_column = None, column_renames = {}, tipo_produto = True,
+            numeric_columns = ('Quantidade (L.)',), drop_invalid = True, table_columns = PRODUTO_COLUMNS,
+            natural_key = ('titulo', 'tipo_produto', 'ano'),
+            model_path = 'app.models.production_scraped_data.ProductionScrapedData'),
+    # A subopção "Sem classificação" traz a coluna de cultivar com outro nome e nenhuma linha de tipo de produto
+    AbaSpec('processamento', 'opt_03', "Processing", sub_option_column = 'classificacao_uva',
+            column_renames = {'Sem definição': 'Cultivar'}, tipo_produto = True, numeric_columns = ('Quantidade (Kg)',),
+            drop_invalid = True,
+            table_columns = {'Cultivar': 'cultivo', 'Quantidade (Kg)': 'quantidade', 'ano': 'ano',
+                             'classificacao_uva': 'classificacao_uva'},
+            natural_key = ('cultivo', 'classificacao_uva', 'ano'),
+            model_path = 'app.models.processing_scraped_data.ProcessingScrapedData'),
+    AbaSpec('comercializacao', 'opt_04', "Comercialization", sub_option_column = None, column_renames = {},
+            tipo_produto = True, numeric_columns = ('Quantidade (L.)',), drop_invalid = True,
+            table_columns = PRODUTO_COLUMNS, natural_key = ('titulo', 'tipo_produto', 'ano'),
+            model_path = 'app.models.comercialization_scraped_data.ComercializationScrapedData'),
+    # Valores sem informação ("-", "nd") viram nulos, mas o país continua na tabela
+    AbaSpec('importacao', 'opt_05', "Importacao", sub_option_column = 'classificacao_derivado', column_renames = {},
+            tipo_produto = False, numeric_columns = ('Quantidade (Kg)', 'Valor (US$)'), drop_invalid = False,
+            table_columns = COMERCIO_EXTERIOR_COLUMNS, natural_key = ('paises', 'classificacao_derivado', 'ano'),
+            model_path = 'app.models.import_scraped_data.ImportScrapedData'),
+    AbaSpec('exportacao', 'opt_06', "Exportacao", sub_option_column = 'classificacao_derivado', column_renames = {},
+            tipo_produto = False, numeric_columns = ('Quantidade (Kg)', 'Valor (US$)'), drop_invalid = False,
+            table_columns = COMERCIO_EXTERIOR_COLUMNS, natural_key = ('paises', 'classificacao_derivado', 'ano'),
+            model_path = 'app.models.export_scraped_data.ExportScrapedData'),
+)}
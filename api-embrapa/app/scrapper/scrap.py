@@ -1,22 +1,146 @@
-import requests
 import pandas as pd
 import pandas.api.types as ptypes
 from bs4 import BeautifulSoup
+import os
 import re
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Optional, Sequence, TypeVar
+from urllib.parse import urlsplit
+from .session import session
+from .cache import page_cache
+from .recorder import page_recorder
+from .pipeline import QUEUE_SIZE, Pipeline, Stage
+from .parse_pool import parse_pool
+from .fingerprints import PageFingerprints
+from .table_parser import extract_table_rows
+from .registry import ABAS, AbaSpec
 
 embrapa_url = "http://vitibrasil.cnpuv.embrapa.br"
 
-abas = {
-        'producao': 'opt_02',
-        'processamento': 'opt_03',
-        'comercializacao': 'opt_04',
-        'importacao': 'opt_05',
-        'exportacao': 'opt_06',
-}
+# Quantidade máxima de requisições simultâneas ao site e limite de requisições por segundo para cada host
+MAX_WORKERS = int(os.getenv("SCRAP_MAX_WORKERS", 8))
+MAX_REQUESTS_PER_SECOND = float(os.getenv("SCRAP_MAX_REQUESTS_PER_SECOND", 10))
+
+# Motor de extração das tabelas: "stream" (tokenizador incremental, lê apenas a tabela de dados) ou "bs4" (BeautifulSoup)
+TABLE_ENGINE = os.getenv("SCRAP_TABLE_ENGINE", "stream")
+
+# Valor do parâmetro "opcao" de cada aba no site (veja registry.ABAS)
+abas = {aba: spec.opcao for aba, spec in ABAS.items()}
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Função chamada a cada mudança de estado de uma página do plano de requisições: progress(subopcao, ano, estado),
+# com estado "pending" (a página entrou no plano), "fetched" (o html da página foi obtido), "unchanged" (a tabela da
+# página é igual à do último scrap e a página é descartada, veja fingerprints.PageFingerprints) ou "no_table" (a página
+# não tem a tabela de dados e é descartada, sem alterar as linhas já gravadas)
+ProgressCallback = Callable[[Optional[str], int, str], None]
+
+# Função que recebe cada página tratada assim que ela fica pronta: write(nome da subopção, ano, dataframe). O nome da
+# subopção (None nas abas sem subopções) identifica, com o ano, a fatia da tabela que a página substitui, mesmo quando
+# nenhuma linha da página sobra depois do tratamento
+PageWriter = Callable[[Optional[str], int, pd.DataFrame], None]
+
+# Função que recebe, ao final do scrap, as medições de cada etapa do pipeline (veja pipeline.Pipeline.snapshot)
+TimingsCallback = Callable[[dict], None]
+
+class HostRateLimiter:
+    """Limita a quantidade de requisições por segundo enviadas a cada host, mesmo quando feitas por várias threads.
+
+    Arguments:
+        max_per_second {float} -- Quantidade máxima de requisições por segundo para um mesmo host. Zero desativa o limite.
+    """
+    def __init__(self, max_per_second: float):
+        self.interval = 1 / max_per_second if max_per_second > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """Bloqueia a thread atual até que uma nova requisição ao host da url possa ser feita."""
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot.get(host, now), now)
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+rate_limiter = HostRateLimiter(MAX_REQUESTS_PER_SECOND)
+
+def map_concurrently(func: Callable[[T], R], items: Iterable[T], max_workers: int = MAX_WORKERS) -> list[R]:
+    """Aplica a função em cada item usando até "max_workers" threads e retorna os resultados na mesma ordem dos itens.
+
+    Arguments:
+        func {Callable} -- Função aplicada a cada item
+        items {Iterable} -- Itens a serem processados
+        max_workers {int} -- Quantidade máxima de threads. Com 1 (ou menos), os itens são processados em série.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers = min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+def fetch_html(url: str, aba: str, subopcao: Optional[str]  = None, ano: Optional[str] = None) -> str:
+    """Retorna o html de uma página do site da Embrapa (veja download_html). Com SCRAP_HTTP_MODE=record, cada página
+    obtida também é gravada em SCRAP_RECORD_DIR; com SCRAP_HTTP_MODE=replay, as páginas são lidas dessa gravação, sem
+    nenhuma requisição ao site (veja recorder.PageRecorder).
+
+    Arguments:
+        url {str} -- URL da embrapa que irá receber a requisição
+        aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
+        subopcao {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "subopcao" na requisição.
+        ano {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "ano" na requisição.
+    """
+    if page_recorder and page_recorder.replaying:
+        return page_recorder.load(aba, subopcao, ano)
+
+    html = download_html(url, aba, subopcao, ano)
+    if page_recorder and page_recorder.recording:
+        page_recorder.save(aba, subopcao, ano, html)
+    return html
+
+def download_html(url: str, aba: str, subopcao: Optional[str]  = None, ano: Optional[str] = None) -> str:
+    """Obtém o html de uma página do site da Embrapa, usando o cache de páginas em disco quando ele estiver ativo.
+    Páginas ainda válidas no cache não geram requisição; páginas vencidas são revalidadas com o servidor (ETag/Last-Modified)
+    e só são baixadas novamente se tiverem mudado.
+
+    Arguments:
+        url {str} -- URL da embrapa que irá receber a requisição
+        aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
+        subopcao {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "subopcao" na requisição.
+        ano {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "ano" na requisição.
+    """
+    opcao = abas[aba]
+    cached = page_cache.get(opcao, subopcao, ano) if page_cache else None
+    if cached and cached.is_fresh:
+        return cached.content.decode('utf-8')
+    
+    rate_limiter.wait(url)
+    response = session.get(url, params= {'opcao': opcao, 'subopcao': subopcao, 'ano': ano},
+                           headers = cached.conditional_headers() if cached else None)
+    
+    # Página não mudou desde o último download: renova a validade da cópia em cache
+    if cached and response.status_code == 304:
+        page_cache.mark_revalidated(opcao, subopcao, ano)
+        return cached.content.decode('utf-8')
+    
+    response.raise_for_status()
+    html = response.text
+    if page_cache:
+        page_cache.put(opcao, subopcao, ano, html.encode('utf-8'),
+                       etag = response.headers.get('ETag'), last_modified = response.headers.get('Last-Modified'))
+    return html
 
 def http_get(url: str, aba: str, subopcao: Optional[str]  = None, ano: Optional[str] = None) -> BeautifulSoup:
     """Realiza uma requisição GET no link informado junto de outros parâmetros. Ele retorna um objeto BeautifulSoup com o html obtido.
+    A requisição usa a sessão compartilhada do scraper (conexões keep-alive, timeouts e novas tentativas em falhas temporárias)
+    e o cache de páginas em disco (veja fetch_html).
 
     Arguments:
         url {str} -- URL da embrapa que irá receber a requisição
@@ -24,9 +148,7 @@ def http_get(url: str, aba: str, subopcao: Optional[str]  = None, ano: Optional[
         subopcao {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "subopcao" na requisição.
         ano {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "ano" na requisição.
     """
-    response = requests.get(url, params= {'opcao': abas[aba], 'subopcao': subopcao, 'ano': ano})
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(fetch_html(url, aba, subopcao, ano), 'html.parser')
     return soup
 
 def get_available_suboptions(embrapa_url: str, aba: str) -> dict[str,str]:
@@ -37,7 +159,15 @@ def get_available_suboptions(embrapa_url: str, aba: str) -> dict[str,str]:
         url {str} -- URL da embrapa que irá receber a requisição
         aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
     """
-    soup = http_get(embrapa_url, aba)
+    return parse_suboptions(http_get(embrapa_url, aba), aba)
+
+def parse_suboptions(soup: BeautifulSoup, aba: str) -> dict[str,str]:
+    """Retorna as subopções (botões de subaba) de uma página já obtida, no mesmo formato de get_available_suboptions.
+
+    Arguments:
+        soup {BeautifulSoup} -- Página de uma aba do site da Embrapa
+        aba {str} -- Chave do dicionário "abas", usada na mensagem de erro
+    """
     sub_options = {f'subopt_0{n +1}': sub_option.text for n, sub_option in enumerate(soup.find_all('button', 'btn_sopt'))}
     
     assert sub_options, f'Subopções da aba {aba} não encontradas'
@@ -51,14 +181,109 @@ def get_available_years(embrapa_url: str, aba: str, subopcao: Optional[str]  = N
         aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
         subopcao {Optional[str]} -- Se este parâmetro for informado, adicona o parâmetro "subopcao" na requisição.
     """
-    soup = http_get(embrapa_url, aba, subopcao)
+    return parse_available_years(http_get(embrapa_url, aba, subopcao))
+
+def parse_available_years(soup: BeautifulSoup) -> tuple[str, str]:
+    """Retorna a faixa de anos (label "lbl_pesq") de uma página já obtida, no mesmo formato de get_available_years.
+
+    Arguments:
+        soup {BeautifulSoup} -- Página de uma aba do site da Embrapa
+    """
     periodo_busca = soup.find_all('label','lbl_pesq')[0].text
     ano_inicio, ano_fim = re.findall(r'\[(\d{4})-(\d{4})\]', periodo_busca)[0]
     
     return ano_inicio, ano_fim
 
-def structure_table(soup: BeautifulSoup, table_attr: str) -> pd.DataFrame:
-    """Gera um dataframe com dados da tabela de uma página.
+def parse_page_year(soup: BeautifulSoup) -> Optional[int]:
+    """Retorna o ano exibido na tabela de uma página (título "text_center", ex.: "Importação de derivados de uva [2023]"),
+    ou None se ele não for encontrado. Páginas pedidas sem o parâmetro ano exibem o último ano disponível.
+
+    Arguments:
+        soup {BeautifulSoup} -- Página de uma aba do site da Embrapa
+    """
+    titulo = soup.find('p', 'text_center')
+    ano = re.search(r'\[(\d{4})\]', titulo.text) if titulo else None
+    return int(ano.group(1)) if ano else None
+
+def build_request_plan(embrapa_url: str, aba: str, sub_options: Optional[dict[str,str]] = None,
+                       max_workers: int = MAX_WORKERS, anos: Optional[Iterable[int]] = None,
+                       loaded: Optional[set[tuple[Optional[str], int]]] = None) -> list[tuple[Optional[str], int]]:
+    """Monta a lista de páginas (subopção, ano) com dados de uma aba, ordenada por subopção e ano.
+    A faixa de anos de cada subopção é consultada de forma concorrente.
+
+    Arguments:
+        embrapa_url {str} -- URL da embrapa que irá receber a requisição
+        aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
+        sub_options {Optional[dict[str,str]]} -- Subopções da aba, como retornadas por get_available_suboptions. Se não for informado, a aba é tratada como sem subopções.
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        anos {Optional[Iterable[int]]} -- Se for informado, apenas esses anos entram no plano.
+        loaded {Optional[set[tuple[Optional[str], int]]]} -- Pares (nome da subopção, ano) que já estão carregados no banco de dados e não precisam ser buscados novamente.
+                                                            O último ano disponível de cada subopção é sempre buscado, pois ainda pode ser alterado no site.
+    """
+    sub_option_keys = list(sub_options) if sub_options else [None]
+    year_ranges = map_concurrently(lambda sub_option: get_available_years(embrapa_url, aba, sub_option),
+                                   sub_option_keys, max_workers)
+    anos = set(map(int, anos)) if anos is not None else None
+    loaded = loaded or set()
+    
+    requests_plan = []
+    for sub_option, (ano_inicio, ano_fim) in zip(sub_option_keys, year_ranges):
+        sub_option_name = sub_options[sub_option] if sub_options else None
+        requests_plan += [(sub_option, ano) for ano in plan_years(int(ano_inicio), int(ano_fim), sub_option_name, anos, loaded)]
+    return requests_plan
+
+def plan_years(ano_inicio: int, ano_fim: int, sub_option_name: Optional[str], anos: Optional[set[int]],
+               loaded: set[tuple[Optional[str], int]]) -> list[int]:
+    """Anos de uma subopção que entram no plano de requisições (veja build_request_plan).
+
+    Arguments:
+        ano_inicio {int} -- Primeiro ano disponível da subopção
+        ano_fim {int} -- Último ano disponível da subopção, sempre buscado (ainda pode ser alterado no site)
+        sub_option_name {Optional[str]} -- Nome da subopção, como aparece em "loaded"
+        anos {Optional[set[int]]} -- Se for informado, apenas esses anos entram no plano
+        loaded {set[tuple[Optional[str], int]]} -- Pares (nome da subopção, ano) já carregados no banco
+    """
+    return [ano for ano in range(ano_inicio, ano_fim + 1)
+            if (anos is None or ano in anos) and ((sub_option_name, ano) not in loaded or ano >= ano_fim)]
+
+def fetch_pages(embrapa_url: str, aba: str, requests_plan: list[tuple[Optional[str], int]],
+                max_workers: int = MAX_WORKERS, progress: Optional[ProgressCallback] = None) -> list[str]:
+    """Obtém o html de todas as páginas (subopção, ano) informadas usando até "max_workers" requisições simultâneas.
+    As páginas são retornadas na mesma ordem do plano de requisições, independente da ordem em que as respostas chegam.
+
+    Arguments:
+        embrapa_url {str} -- URL da embrapa que irá receber a requisição
+        aba {str} -- Chave do dicionário "abas". Informe com base em qual aba do site da embrapa gostaria de fazer a requisição.
+        requests_plan {list[tuple[Optional[str], int]]} -- Lista de pares (subopção, ano), como retornada por build_request_plan
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        progress {Optional[ProgressCallback]} -- Se for informada, é chamada para cada página do plano e a cada página obtida
+    """
+    if progress is None:
+        return map_concurrently(lambda request: fetch_html(url = embrapa_url, aba = aba, subopcao = request[0], ano = request[1]),
+                                requests_plan, max_workers)
+
+    for sub_option, ano in requests_plan:
+        progress(sub_option, ano, 'pending')
+
+    def fetch(request: tuple[Optional[str], int]) -> str:
+        html = fetch_html(url = embrapa_url, aba = aba, subopcao = request[0], ano = request[1])
+        progress(request[0], request[1], 'fetched')
+        return html
+
+    return map_concurrently(fetch, requests_plan, max_workers)
+
+def rows_to_dataframe(colunas: list[str], linhas_com_valores: list[list[str]]) -> pd.DataFrame:
+    """Gera um dataframe a partir dos nomes das colunas e das linhas de valores de uma tabela.
+
+    Arguments:
+        colunas {list[str]} -- Nomes das colunas da tabela
+        linhas_com_valores {list[list[str]]} -- Valores de cada linha da tabela, na mesma ordem das colunas
+    """
+    df = {colunas[id_coluna]: [valor[id_coluna] for valor in linhas_com_valores] for id_coluna in range(len(colunas))}
+    return pd.DataFrame(df)
+
+def structure_table(soup: BeautifulSoup, table_attr: str) -> Optional[pd.DataFrame]:
+    """Gera um dataframe com dados da tabela de uma página. Retorna None se a página não tiver a tabela.
 
     Arguments:
         soup {BeautifulSoup} -- Objeto BeautifulSoup gerado a partir de uma requisição e html do site da Embrapa
@@ -83,9 +308,27 @@ def structure_table(soup: BeautifulSoup, table_attr: str) -> pd.DataFrame:
             linhas_com_valores.append([valor.text.strip() for valor in linha.findChildren('td')])
         
         # Criação de dataframe
-        df = {colunas[id_coluna]: [valor[id_coluna] for valor in linhas_com_valores] for id_coluna in range(len(colunas))}
-        df = pd.DataFrame(df)
-        return df
+        return rows_to_dataframe(colunas, linhas_com_valores)
+
+def parse_table(html: str, table_attr: str, engine: str = TABLE_ENGINE) -> Optional[pd.DataFrame]:
+    """Gera um dataframe com dados da tabela a partir do html de uma página. Retorna None se a página não tiver a
+    tabela (ex.: página de erro do site), com os dois motores; quem chamar a função deve verificar esse caso.
+
+    Arguments:
+        html {str} -- Html de uma página do site da Embrapa
+        table_attr {str} -- Nome do elemento tabela, escrito no html obtido de uma requisição.
+        engine {str} -- "stream" para o tokenizador incremental, que lê apenas as linhas da tabela sem montar a árvore
+                        do documento, ou "bs4" para montar a árvore com BeautifulSoup e usar structure_table.
+    """
+    if engine == 'bs4':
+        return structure_table(BeautifulSoup(html, 'html.parser'), table_attr)
+    if engine != 'stream':
+        raise ValueError(f'Motor de extração de tabelas desconhecido: {engine}')
+    
+    table_rows = extract_table_rows(html, table_attr)
+    if table_rows is None:
+        return None
+    return rows_to_dataframe(*table_rows)
     
 ##################### Funções de tratamento de dados #####################
 def tipo_produto_as_column(df: pd.DataFrame) -> pd.DataFrame:
@@ -95,149 +338,383 @@ def tipo_produto_as_column(df: pd.DataFrame) -> pd.DataFrame:
         df {pd.DataFrame} -- Dataframe
     """
     coluna = df.columns[0]
-    for index,row in df.iterrows():
-        if row[coluna].isupper():
-            tipo_produto = df.loc[index,coluna].capitalize()
-            df.loc[index,'tipo_produto'] = tipo_produto
-        else:
-            df.loc[index,'tipo_produto'] = tipo_produto
+    
+    # Linhas em maiúsculo são os tipos de produto; cada linha recebe o último tipo que aparece acima dela
+    is_tipo_produto = df[coluna].str.isupper().fillna(False).astype(bool)
+    df = df.assign(tipo_produto = df[coluna].where(is_tipo_produto).str.capitalize().ffill())
             
     # Elimina linhas que registram o valor total do tipo do produto        
-    df = df[~df[coluna].str.isupper()]
-    return df
+    return df[~is_tipo_produto]
 
-def clean_numeric_column(df: pd.DataFrame, numeric_columns:list) -> pd.DataFrame:
-    """Transforma colunas numéricas que estão em texto para números enquanto que elimina pontos e linhas sem valores.
+def clean_numeric_column(df: pd.DataFrame, numeric_columns:list, drop_invalid: bool = True) -> pd.DataFrame:
+    """Transforma colunas numéricas que estão em texto para números inteiros (anuláveis), eliminando os pontos.
+    Valores que não são números (como "-", "nd" ou "*") se tornam nulos e, por padrão, as linhas com esses valores são eliminadas.
 
     Arguments:
         df {pd.DataFrame} -- Dataframe
         numeric_columns {list} -- Lista com nomes de colunas a receberem o tratamento de limpeza
+        drop_invalid {bool} -- Se verdadeiro, elimina as linhas sem valores numéricos em alguma das colunas. Se falso, mantém as linhas com valores nulos.
     """
+    numeric_values = {}
     for column in numeric_columns:
-        
-        # Remoção de pontos nos números
-        df[column] = df[column].str.replace('.','')
-        
-        # Eliminação de registros sem valores
-        df = df[(~df[column].str.contains('-')) & 
-        (~df[column].str.contains('nd')) & 
-        (~df[column].str.contains(r'\*'))].dropna(axis=0, how='any')
-        
-        # Troca do tipo do dado para número
-        df[column] = df[column].astype(int)
+        # Remoção de pontos nos números e troca do tipo do dado para número, com nulo em valores que não são apenas dígitos
+        values = df[column].str.replace('.', '', regex = False)
+        values = values.where(values.str.fullmatch(r'\d+', na = False))
+        numeric_values[column] = pd.to_numeric(values, dtype_backend = 'numpy_nullable').astype('Int64')
+    
+    df = df.assign(**numeric_values)
+    
+    # Eliminação de registros sem valores
+    if drop_invalid:
+        df = df.dropna(axis = 0, how = 'any', subset = numeric_columns)
     return df
 
-##################### Funções de scraping de cada aba #####################
-def scrap_producao() -> pd.DataFrame:
-    """ Gera um dataframe com dados de tabelas de todos os anos disponíveis, da aba produção do site da Embrapa.
+def clean_aba_page(spec: AbaSpec, df: pd.DataFrame, sub_option_name: Optional[str], ano: int) -> pd.DataFrame:
+    """Tratamento da tabela de uma página de qualquer aba, conforme a descrição da aba (veja registry.AbaSpec).
+
+    Arguments:
+        spec {AbaSpec} -- Descrição da aba
+        df {pd.DataFrame} -- Tabela da página, como retornada por parse_table
+        sub_option_name {Optional[str]} -- Nome da subopção da página (None nas abas sem subopções)
+        ano {int} -- Ano da página
     """
-    aba = 'producao'
-    dfs = []
-    ano_inicio, ano_fim = get_available_years(embrapa_url = embrapa_url, aba = aba)
+    # Altera nomes de colunas diferentes para o mesmo nome que aparece nas outras páginas
+    if spec.column_renames:
+        df = df.rename(columns = spec.column_renames)
+    df = df.assign(ano = ano)
+    if spec.has_sub_options:
+        df = df.assign(**{spec.sub_option_column: sub_option_name})
     
-    # Iteração para cada ano, lendo dados da tabela na página e concatenando resultados
-    for ano in range(int(ano_inicio), int(ano_fim) + 1):
-        soup = http_get(url =embrapa_url, aba = aba, ano = ano)
-        df = structure_table(soup = soup, table_attr = "tb_base tb_dados").assign(ano = ano)
-        dfs.append(df)
+    # Páginas sem linhas de tipo de produto (ex.: subopção "Sem classificação") usam o nome da subopção como tipo
+    if spec.tipo_produto:
+        if df[df.columns[0]].str.isupper().any():
+            df = tipo_produto_as_column(df)
+        else:
+            df = df.assign(tipo_produto = sub_option_name)
+    return clean_numeric_column(df, list(spec.numeric_columns), drop_invalid = spec.drop_invalid)
 
-    # Tratamento final de dados
-    cleaned_df = pd.concat(dfs).reset_index(drop= True)
-    cleaned_df = tipo_produto_as_column(cleaned_df)
-    cleaned_df = clean_numeric_column(cleaned_df, ['Quantidade (L.)'])
-    return cleaned_df
+##################### Pipeline de scraping #####################
+# Página (aba, subopção, ano) de um plano de requisições com uma ou mais abas
+PageKey = tuple[str, Optional[str], int]
 
+def run_page_pipeline(requests_plan: list[PageKey], clean_page: Callable[[str, Optional[str], int, pd.DataFrame], pd.DataFrame],
+                      max_workers: int = MAX_WORKERS, engine: str = TABLE_ENGINE,
+                      progress: Optional[Callable[[str, Optional[str], int, str], None]] = None,
+                      write: Optional[Callable[[str, Optional[str], int, pd.DataFrame], None]] = None,
+                      timings: Optional[TimingsCallback] = None, queue_size: int = QUEUE_SIZE,
+                      prefetched: Optional[dict[PageKey, str]] = None,
+                      unchanged: Optional[Callable[[str, Optional[str], int, str], bool]] = None) -> list[tuple[str, Optional[str], int, pd.DataFrame]]:
+    """Busca, lê, trata e (opcionalmente) grava as páginas do plano em um pipeline (veja pipeline.Pipeline): enquanto
+    algumas páginas são baixadas ("fetch", até "max_workers" requisições simultâneas), as já baixadas têm a tabela
+    extraída ("parse"), as já extraídas são tratadas ("clean") e as já tratadas são entregues a "write". As filas entre
+    as etapas são limitadas, então apenas algumas páginas ficam em memória ao mesmo tempo.
 
-def scrap_processamento() -> pd.DataFrame:
-    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba processamento do site da Embrapa.
+    Com o motor "stream", planos grandes têm as tabelas extraídas no pool de processos (veja parse_pool.ParsePool), com
+    uma thread da etapa "parse" por processo; planos pequenos são extraídos no próprio processo.
+
+    Com "unchanged", cada página é verificada logo depois de obtida: as páginas iguais às do último scrap (veja
+    fingerprints.PageFingerprints) são descartadas antes da extração da tabela e não chegam a "write". As páginas sem a
+    tabela de dados também são descartadas, com o estado "no_table" em "progress".
+
+    Sem "write", retorna as páginas tratadas (aba, subopção, ano, dataframe), na ordem do plano. Com "write", cada página
+    tratada é entregue a essa função assim que fica pronta (em qualquer ordem) e não é acumulada, e a lista retornada é vazia.
+
+    Arguments:
+        requests_plan {list[PageKey]} -- Lista de páginas (aba, subopção, ano)
+        clean_page {Callable} -- Tratamento da tabela de cada página: clean_page(aba, subopção, ano, dataframe)
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        engine {str} -- Motor de extração das tabelas ("stream" ou "bs4"), veja parse_table
+        progress {Optional[Callable]} -- Se for informada, é chamada para cada página do plano e a cada página obtida: progress(aba, subopção, ano, estado)
+        write {Optional[Callable]} -- Se for informada, recebe cada página tratada: write(aba, subopção, ano, dataframe)
+        timings {Optional[TimingsCallback]} -- Se for informada, recebe as medições de cada etapa ao final
+        queue_size {int} -- Tamanho máximo de cada fila entre as etapas
+        prefetched {Optional[dict[PageKey, str]]} -- Html de páginas do plano já obtidas (ex.: na descoberta das subopções
+                                                     e anos, veja build_crawl_plan), que não são buscadas novamente
+        unchanged {Optional[Callable]} -- Se for informada, indica as páginas que não mudaram desde o último scrap:
+                                          unchanged(aba, subopção, ano, html)
     """
-    aba = 'processamento'
-    dfs = []
-    
-    sub_options = get_available_suboptions(embrapa_url, aba)
-    
-    # Iteração para cada sub aba
-    for sub_option in sub_options.keys():
-        ano_inicio, ano_fim = get_available_years(embrapa_url = embrapa_url, aba = aba, subopcao = sub_option)
+    if not requests_plan:
+        return []
+    if progress is not None:
+        for aba, sub_option, ano in requests_plan:
+            progress(aba, sub_option, ano, 'pending')
+    prefetched = prefetched or {}
+
+    def fetch(request: tuple[int, str, Optional[str], int]) -> tuple[int, str, Optional[str], int, str]:
+        index, aba, sub_option, ano = request
+        html = prefetched.get((aba, sub_option, ano))
+        if html is None:
+            html = fetch_html(url = embrapa_url, aba = aba, subopcao = sub_option, ano = ano)
+        if unchanged is not None and unchanged(aba, sub_option, ano, html):
+            if progress is not None:
+                progress(aba, sub_option, ano, 'unchanged')
+            return None
+        if progress is not None:
+            progress(aba, sub_option, ano, 'fetched')
+        return index, aba, sub_option, ano, html
+
+    def parsed(page: tuple[int, str, Optional[str], int, str], df: Optional[pd.DataFrame]) -> Optional[tuple[int, str, Optional[str], int, pd.DataFrame]]:
+        # Páginas sem a tabela de dados são descartadas (não há o que tratar nem gravar)
+        index, aba, sub_option, ano, _ = page
+        if df is None:
+            if progress is not None:
+                progress(aba, sub_option, ano, 'no_table')
+            return None
+        return index, aba, sub_option, ano, df
+
+    def parse(page: tuple[int, str, Optional[str], int, str]) -> Optional[tuple[int, str, Optional[str], int, pd.DataFrame]]:
+        return parsed(page, parse_table(page[4], "tb_base tb_dados", engine))
+
+    def parse_in_pool(page: tuple[int, str, Optional[str], int, str]) -> Optional[tuple[int, str, Optional[str], int, pd.DataFrame]]:
+        table_rows = parse_pool.parse(page[4], "tb_base tb_dados")
+        return parsed(page, rows_to_dataframe(*table_rows) if table_rows is not None else None)
+
+    def clean(page: tuple[int, str, Optional[str], int, pd.DataFrame]) -> tuple[int, str, Optional[str], int, pd.DataFrame]:
+        index, aba, sub_option, ano, df = page
+        return index, aba, sub_option, ano, clean_page(aba, sub_option, ano, df)
+
+    if engine == 'stream' and parse_pool.enabled_for(len(requests_plan)):
+        parse_stage = Stage('parse', parse_in_pool, parse_pool.processes)
+    else:
+        parse_stage = Stage('parse', parse)
+    stages = [Stage('fetch', fetch, max(max_workers, 1)), parse_stage, Stage('clean', clean)]
+    if write is not None:
+        stages.append(Stage('write', lambda page: write(*page[1:])))
+
+    pipeline = Pipeline(stages, queue_size)
+    results = pipeline.run((index, *request) for index, request in enumerate(requests_plan))
+    if timings is not None:
+        timings(pipeline.snapshot())
+    if write is not None:
+        return []
     
-        # Iteração para cada ano de cada sub aba, lendo dados da tabela na página e concatenando resultados
-        for ano in range(int(ano_inicio), int(ano_fim) + 1):
-            soup = http_get(url =embrapa_url, aba = aba, subopcao = sub_option, ano = ano)
-            df = structure_table(soup = soup, table_attr = "tb_base tb_dados").assign(ano = ano) \
-                                                                              .assign(classificacao_uva = sub_options[sub_option])
-            
-            # Altera nome de coluna diferente para o mesmo nome que aparece em outras abas
-            if 'Sem definição' in df.columns:
-                df = df.rename(columns = {'Sem definição':'Cultivar'})
-                
-            dfs.append(df)
+    # Páginas na ordem do plano (as etapas terminam as páginas em qualquer ordem)
+    return [page[1:] for page in sorted(results, key = lambda page: page[0])]
 
-    # Tratamento final de dados
-    cleaned_df = pd.concat(dfs).reset_index(drop= True)
-    cleaned_df = tipo_produto_as_column(cleaned_df)
-    cleaned_df = clean_numeric_column(cleaned_df, ['Quantidade (Kg)'])
-    return cleaned_df
+def scrap_pages(aba: str, requests_plan: list[tuple[Optional[str], int]], clean_page: Callable[..., pd.DataFrame],
+                sub_options: Optional[dict[str,str]] = None, max_workers: int = MAX_WORKERS, engine: str = TABLE_ENGINE,
+                progress: Optional[ProgressCallback] = None, write: Optional[PageWriter] = None,
+                timings: Optional[TimingsCallback] = None, queue_size: int = QUEUE_SIZE,
+                fingerprints: Optional[PageFingerprints] = None) -> pd.DataFrame:
+    """Busca, lê, trata e (opcionalmente) grava as páginas do plano de uma aba em um pipeline (veja run_page_pipeline).
 
+    Sem "write", retorna um dataframe com todas as páginas tratadas, na ordem do plano. Com "write", cada página tratada
+    é entregue a essa função assim que fica pronta (em qualquer ordem) e não é acumulada, e o dataframe retornado é vazio.
 
-def scrap_comercializacao() -> pd.DataFrame:
-    """ Gera um dataframe com dados de tabelas de todos os anos, da aba comercialização do site da Embrapa.
+    Arguments:
+        aba {str} -- Chave do dicionário "abas"
+        requests_plan {list[tuple[Optional[str], int]]} -- Lista de pares (subopção, ano), como retornada por build_request_plan
+        clean_page {Callable} -- Tratamento da tabela de cada página: clean_page(dataframe, nome da subopção, ano)
+        sub_options {Optional[dict[str,str]]} -- Subopções da aba, como retornadas por get_available_suboptions
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        engine {str} -- Motor de extração das tabelas ("stream" ou "bs4"), veja parse_table
+        progress {Optional[ProgressCallback]} -- Se for informada, é chamada para cada página do plano e a cada página obtida
+        write {Optional[PageWriter]} -- Se for informada, recebe cada página tratada (ex.: para gravá-la no banco)
+        timings {Optional[TimingsCallback]} -- Se for informada, recebe as medições de cada etapa ao final
+        queue_size {int} -- Tamanho máximo de cada fila entre as etapas
+        fingerprints {Optional[PageFingerprints]} -- Se for informado, as páginas iguais às do último scrap são descartadas
     """
-    aba = 'comercializacao'
-    dfs = []
-    ano_inicio, ano_fim = get_available_years(embrapa_url = embrapa_url, aba = aba)
-    
-    # Iteração para cada ano, lendo dados da tabela na página e concatenando resultados
-    for ano in range(int(ano_inicio), int(ano_fim) + 1):
-        soup = http_get(url =embrapa_url, aba = aba, ano = ano)
-        df = structure_table(soup = soup, table_attr = "tb_base tb_dados").assign(ano = ano)
-        dfs.append(df)
-    
-    # Tratamento final de dados
-    cleaned_df = pd.concat(dfs).reset_index(drop= True)
-    cleaned_df = tipo_produto_as_column(cleaned_df)
-    cleaned_df = clean_numeric_column(cleaned_df, ['Quantidade (L.)'])
-    return cleaned_df
+    def sub_option_name(sub_option: Optional[str]) -> Optional[str]:
+        return sub_options[sub_option] if sub_options else None
+
+    pages = run_page_pipeline(
+        [(aba, sub_option, ano) for sub_option, ano in requests_plan],
+        lambda _, sub_option, ano, df: clean_page(df, sub_option_name(sub_option), ano),
+        max_workers, engine,
+        progress = (lambda _, sub_option, ano, estado: progress(sub_option, ano, estado)) if progress else None,
+        write = (lambda _, sub_option, ano, df: write(sub_option_name(sub_option), ano, df)) if write else None,
+        timings = timings, queue_size = queue_size,
+        unchanged = (lambda _, sub_option, ano, html: fingerprints.is_unchanged(aba, sub_option_name(sub_option), ano, html))
+                    if fingerprints else None)
+    if not pages:
+        return pd.DataFrame()
+    return pd.concat([df for _, _, _, df in pages]).reset_index(drop = True)
 
+##################### Scraping de todas as abas #####################
+class CrawlPlan:
+    """Plano de requisições de várias abas, montado por build_crawl_plan.
 
-def scrap_importacao() -> pd.DataFrame:
-    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba importação do site da Embrapa.
+    Arguments:
+        requests {list[PageKey]} -- Páginas (aba, subopção, ano) com dados, na ordem das abas, subopções e anos
+        sub_options {dict[str, dict[str,str]]} -- Subopções de cada aba (vazio nas abas sem subopções)
+        prefetched {dict[PageKey, str]} -- Html das páginas do plano já obtidas durante a descoberta
+        discovery_requests {int} -- Quantidade de páginas obtidas para descobrir as subopções e as faixas de anos
     """
-    aba = 'importacao'
-    dfs = []
-    
-    sub_options = get_available_suboptions(embrapa_url, aba)
-    
-    # Iteração para cada sub aba
-    for sub_option in sub_options.keys():
-        ano_inicio, ano_fim = get_available_years(embrapa_url = embrapa_url, aba = aba, subopcao = sub_option)
-    
-        # Iteração para cada ano de cada sub aba, lendo dados da tabela na página e concatenando resultados
-        for ano in range(int(ano_inicio), int(ano_fim) + 1):
-            soup = http_get(url =embrapa_url, aba = aba, subopcao = sub_option, ano = ano)
-            df = structure_table(soup = soup, table_attr = "tb_base tb_dados").assign(ano = ano).assign(classificacao_derivado = sub_options[sub_option])
-                
-            dfs.append(df)
-            
-    return pd.concat(dfs)
+    def __init__(self, requests: list[PageKey], sub_options: dict[str, dict[str,str]], prefetched: dict[PageKey, str],
+                 discovery_requests: int):
+        self.requests = requests
+        self.sub_options = sub_options
+        self.prefetched = prefetched
+        self.discovery_requests = discovery_requests
+
+    def stats(self) -> dict:
+        """Páginas do plano por aba e requisições ao site: as do plano e as que o scrap de cada aba em separado faria
+        para as mesmas páginas. As páginas de descoberta são as mesmas nos dois casos, mas, no scrap de cada aba, a
+        página do último ano de cada subopção é buscada de novo depois da descoberta."""
+        pages = {}
+        for aba, _, _ in self.requests:
+            pages[aba] = pages.get(aba, 0) + 1
+        per_aba_requests = self.discovery_requests + len(self.requests)
+        return {'pages': len(self.requests), 'pages_by_aba': pages, 'discovery_requests': self.discovery_requests,
+                'reused_pages': len(self.prefetched), 'requests': per_aba_requests - len(self.prefetched),
+                'per_aba_requests': per_aba_requests, 'requests_saved': len(self.prefetched)}
 
+def build_crawl_plan(embrapa_url: str, abas_to_scrap: Sequence[str], max_workers: int = MAX_WORKERS,
+                     anos: Optional[Iterable[int]] = None,
+                     loaded: Optional[dict[str, set[tuple[Optional[str], int]]]] = None) -> CrawlPlan:
+    """Monta um único plano de requisições (aba, subopção, ano) para várias abas. As páginas de descoberta de todas as
+    abas são obtidas de forma concorrente, dividindo as mesmas "max_workers" requisições simultâneas: primeiro a página
+    inicial de cada aba (subopções) e depois a página sem ano de cada subopção (faixa de anos).
 
-def scrap_exportacao() -> pd.DataFrame:
-    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba exportação do site da Embrapa.
+    Cada página pedida sem ano já exibe a tabela de um ano (o último disponível, identificado pelo título da tabela,
+    veja parse_page_year); se esse ano estiver no plano, a página é reaproveitada como a página de dados desse ano e não
+    é buscada novamente. Nas abas sem subopções, a página inicial é a própria página sem ano.
+
+    Arguments:
+        embrapa_url {str} -- URL da embrapa que irá receber a requisição
+        abas_to_scrap {Sequence[str]} -- Chaves do dicionário "abas", na ordem em que entram no plano
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        anos {Optional[Iterable[int]]} -- Se for informado, apenas esses anos entram no plano
+        loaded {Optional[dict[str, set[tuple[Optional[str], int]]]]} -- Para cada aba, pares (nome da subopção, ano) já
+                                                                         carregados no banco (veja build_request_plan)
     """
-    aba = 'exportacao'
-    dfs = []
-    
-    sub_options = get_available_suboptions(embrapa_url, aba)
-    
-    # Iteração para cada sub aba
-    for sub_option in sub_options.keys():
-        ano_inicio, ano_fim = get_available_years(embrapa_url = embrapa_url, aba = aba, subopcao = sub_option)
-    
-        # Iteração para cada ano de cada sub aba, lendo dados da tabela na página e concatenando resultados
-        for ano in range(int(ano_inicio), int(ano_fim) + 1):
-            soup = http_get(url =embrapa_url, aba = aba, subopcao = sub_option, ano = ano)
-            df = structure_table(soup = soup, table_attr = "tb_base tb_dados").assign(ano = ano).assign(classificacao_derivado = sub_options[sub_option])
-                
-            dfs.append(df)
-    
-    return pd.concat(dfs)
\ No newline at end of file
+    anos = set(map(int, anos)) if anos is not None else None
+    loaded = loaded or {}
+
+    roots = map_concurrently(lambda aba: fetch_html(url = embrapa_url, aba = aba), abas_to_scrap, max_workers)
+    sub_options = {aba: parse_suboptions(BeautifulSoup(html, 'html.parser'), aba) if ABAS[aba].has_sub_options else {}
+                   for aba, html in zip(abas_to_scrap, roots)}
+
+    sub_option_pages = [(aba, sub_option) for aba in abas_to_scrap for sub_option in sub_options[aba]]
+    htmls = map_concurrently(lambda page: fetch_html(url = embrapa_url, aba = page[0], subopcao = page[1]),
+                             sub_option_pages, max_workers)
+    discovered = dict(zip(sub_option_pages, htmls))
+    discovered.update({(aba, None): html for aba, html in zip(abas_to_scrap, roots) if not sub_options[aba]})
+
+    requests, prefetched = [], {}
+    for aba in abas_to_scrap:
+        for sub_option in sub_options[aba] or [None]:
+            html = discovered[(aba, sub_option)]
+            soup = BeautifulSoup(html, 'html.parser')
+            ano_inicio, ano_fim = parse_available_years(soup)
+            years = plan_years(int(ano_inicio), int(ano_fim), sub_options[aba].get(sub_option), anos, loaded.get(aba, set()))
+            requests += [(aba, sub_option, ano) for ano in years]
+            ano_exibido = parse_page_year(soup)
+            if ano_exibido in years:
+                prefetched[(aba, sub_option, ano_exibido)] = html
+    return CrawlPlan(requests, sub_options, prefetched, len(roots) + len(sub_option_pages))
+
+def scrap_crawl_plan(plan: CrawlPlan, max_workers: int = MAX_WORKERS, engine: str = TABLE_ENGINE,
+                     progress: Optional[Callable[[str, Optional[str], int, str], None]] = None,
+                     write: Optional[Callable[[str, Optional[str], int, pd.DataFrame], None]] = None,
+                     timings: Optional[TimingsCallback] = None,
+                     fingerprints: Optional[PageFingerprints] = None) -> dict[str, pd.DataFrame]:
+    """Busca, lê, trata e (opcionalmente) grava todas as páginas do plano em um único pipeline (veja run_page_pipeline),
+    com até "max_workers" requisições simultâneas para todas as abas juntas. As páginas reaproveitadas da descoberta não
+    geram requisições.
+
+    Sem "write", retorna um dataframe por aba, com as mesmas colunas retornadas pela função scrap_* da aba. Com "write",
+    retorna um dicionário vazio.
+
+    Arguments:
+        plan {CrawlPlan} -- Plano de requisições, como retornado por build_crawl_plan
+        max_workers {int} -- Quantidade máxima de requisições simultâneas
+        engine {str} -- Motor de extração das tabelas ("stream" ou "bs4"), veja parse_table
+        progress {Optional[Callable]} -- Se for informada, recebe o andamento de cada página: progress(aba, subopção, ano, estado)
+        write {Optional[Callable]} -- Se for informada, recebe cada página tratada: write(aba, nome da subopção, ano, dataframe)
+        timings {Optional[TimingsCallback]} -- Se for informada, recebe as medições de cada etapa do pipeline
+        fingerprints {Optional[PageFingerprints]} -- Se for informado, as páginas iguais às do último scrap são descartadas
+    """
+    def clean(aba: str, sub_option: Optional[str], ano: int, df: pd.DataFrame) -> pd.DataFrame:
+        return clean_aba_page(ABAS[aba], df, plan.sub_options[aba].get(sub_option), ano)
+
+    def unchanged(aba: str, sub_option: Optional[str], ano: int, html: str) -> bool:
+        return fingerprints.is_unchanged(aba, plan.sub_options[aba].get(sub_option), ano, html)
+
+    def write_page(aba: str, sub_option: Optional[str], ano: int, df: pd.DataFrame) -> None:
+        write(aba, plan.sub_options[aba].get(sub_option), ano, df)
+
+    pages = run_page_pipeline(plan.requests, clean, max_workers, engine, progress, write_page if write else None,
+                              timings, prefetched = plan.prefetched, unchanged = unchanged if fingerprints else None)
+    data = {}
+    for aba, _, _, df in pages:
+        data.setdefault(aba, []).append(df)
+    return {aba: pd.concat(dfs).reset_index(drop = True) for aba, dfs in data.items()}
+
+##################### Funções de scraping de cada aba #####################
+def scrap_aba(aba: str, max_workers: int = MAX_WORKERS, engine: str = TABLE_ENGINE, anos: Optional[Iterable[int]] = None,
+              loaded: Optional[set[tuple[Optional[str], int]]] = None,
+              progress: Optional[ProgressCallback] = None, write: Optional[PageWriter] = None,
+              timings: Optional[TimingsCallback] = None, fingerprints: Optional[PageFingerprints] = None) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis de uma aba do site da Embrapa,
+    tratadas conforme a descrição da aba (veja registry.ABAS e clean_aba_page).
+
+    Arguments:
+        aba {str} -- Chave do dicionário "abas"
+        max_workers {int} -- Quantidade máxima de requisições simultâneas ao site
+        engine {str} -- Motor de extração das tabelas ("stream" ou "bs4"), veja parse_table
+        anos {Optional[Iterable[int]]} -- Se for informado, apenas esses anos são buscados
+        loaded {Optional[set[tuple[Optional[str], int]]]} -- Pares (nome da subopção, ano) já carregados no banco, que não são buscados novamente (veja build_request_plan)
+        progress {Optional[ProgressCallback]} -- Se for informada, recebe o andamento de cada página (subopção, ano), veja scrap_pages
+        write {Optional[PageWriter]} -- Se for informada, recebe cada página tratada assim que fica pronta, e o dataframe retornado é vazio (veja scrap_pages)
+        timings {Optional[TimingsCallback]} -- Se for informada, recebe as medições de cada etapa do pipeline
+        fingerprints {Optional[PageFingerprints]} -- Se for informado, as páginas iguais às do último scrap não são lidas, tratadas nem gravadas
+    """
+    spec = ABAS[aba]
+    sub_options = get_available_suboptions(embrapa_url, aba) if spec.has_sub_options else None
+    requests_plan = build_request_plan(embrapa_url, aba, sub_options, max_workers, anos, loaded)
+    return scrap_pages(aba, requests_plan, partial(clean_aba_page, spec), sub_options, max_workers, engine, progress,
+                       write, timings, fingerprints = fingerprints)
+
+
+def scrap_producao(**options) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos disponíveis, da aba produção do site da Embrapa (veja scrap_aba)."""
+    return scrap_aba('producao', **options)
+
+
+def scrap_processamento(**options) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba processamento do site da Embrapa (veja scrap_aba)."""
+    return scrap_aba('processamento', **options)
+
+
+def scrap_comercializacao(**options) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos, da aba comercialização do site da Embrapa (veja scrap_aba)."""
+    return scrap_aba('comercializacao', **options)
+
+
+def scrap_importacao(**options) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba importação do site da Embrapa (veja scrap_aba)."""
+    return scrap_aba('importacao', **options)
+
+
+def scrap_exportacao(**options) -> pd.DataFrame:
+    """ Gera um dataframe com dados de tabelas de todos os anos e subabas disponíveis, da aba exportação do site da Embrapa (veja scrap_aba)."""
+    return scrap_aba('exportacao', **options)
+
+
+def scrap_all(abas_to_scrap: Sequence[str] = tuple(abas), max_workers: int = MAX_WORKERS, engine: str = TABLE_ENGINE,
+              anos: Optional[Iterable[int]] = None, loaded: Optional[dict[str, set[tuple[Optional[str], int]]]] = None,
+              progress: Optional[Callable[[str, Optional[str], int, str], None]] = None,
+              write: Optional[Callable[[str, Optional[str], int, pd.DataFrame], None]] = None,
+              timings: Optional[TimingsCallback] = None,
+              plan_stats: Optional[Callable[[dict], None]] = None,
+              fingerprints: Optional[PageFingerprints] = None) -> dict[str, pd.DataFrame]:
+    """ Gera um dataframe por aba com dados de tabelas de todos os anos e subabas disponíveis de várias abas do site da
+    Embrapa, com um único plano de requisições (veja build_crawl_plan) e um único pipeline (veja scrap_crawl_plan).
+
+    Arguments:
+        abas_to_scrap {Sequence[str]} -- Chaves do dicionário "abas" (por padrão, todas)
+        max_workers {int} -- Quantidade máxima de requisições simultâneas ao site, para todas as abas juntas
+        engine {str} -- Motor de extração das tabelas ("stream" ou "bs4"), veja parse_table
+        anos {Optional[Iterable[int]]} -- Se for informado, apenas esses anos são buscados
+        loaded {Optional[dict[str, set[tuple[Optional[str], int]]]]} -- Para cada aba, pares (nome da subopção, ano) já carregados no banco (veja build_request_plan)
+        progress {Optional[Callable]} -- Se for informada, recebe o andamento de cada página: progress(aba, subopção, ano, estado)
+        write {Optional[Callable]} -- Se for informada, recebe cada página tratada assim que fica pronta: write(aba, nome da subopção, ano, dataframe), e o dicionário retornado é vazio
+        timings {Optional[TimingsCallback]} -- Se for informada, recebe as medições de cada etapa do pipeline
+        plan_stats {Optional[Callable[[dict], None]]} -- Se for informada, recebe o resumo do plano antes das páginas serem buscadas (veja CrawlPlan.stats)
+        fingerprints {Optional[PageFingerprints]} -- Se for informado, as páginas iguais às do último scrap não são lidas, tratadas nem gravadas
+    """
+    plan = build_crawl_plan(embrapa_url, list(abas_to_scrap), max_workers, anos, loaded)
+    if plan_stats is not None:
+        plan_stats(plan.stats())
+    return scrap_crawl_plan(plan, max_workers, engine, progress, write, timings, fingerprints)
@@ -0,0 +1,126 @@
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.metrics import LatencyHistogram
+
+# Tempo máximo (em segundos) para abrir a conexão e para receber a resposta de uma página
+CONNECT_TIMEOUT = float(os.getenv("SCRAP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("SCRAP_READ_TIMEOUT", 30))
+
+# Novas tentativas em erros 5xx, timeouts e conexões interrompidas, com espera exponencial (com jitter) entre elas
+MAX_RETRIES = int(os.getenv("SCRAP_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.getenv("SCRAP_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.getenv("SCRAP_BACKOFF_MAX", 10))
+
+# Quantidade de conexões mantidas abertas (keep-alive) por host. Deve ser ao menos igual a SCRAP_MAX_WORKERS.
+POOL_SIZE = int(os.getenv("SCRAP_POOL_SIZE", 16))
+
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class HttpMetrics:
+    """Contadores das requisições feitas pelo scraper: requisições, novas tentativas, erros, bytes recebidos e latência."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.errors = 0
+            self.bytes = 0
+            self.latency = LatencyHistogram()
+
+    def record_response(self, response: requests.Response, elapsed: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(response.content)
+            self.latency.observe(elapsed)
+
+    def record_error(self, elapsed: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.latency.observe(elapsed)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'retries': self.retries, 'errors': self.errors,
+                    'bytes': self.bytes, 'latency_seconds': self.latency.snapshot()}
+
+
+class ScrapSession:
+    """Sessão HTTP compartilhada entre as threads do scraper, com pool de conexões keep-alive, timeouts e novas
+    tentativas com espera exponencial (com jitter) em erros 5xx, timeouts e conexões interrompidas.
+
+    Arguments:
+        connect_timeout {float} -- Tempo máximo (em segundos) para abrir a conexão
+        read_timeout {float} -- Tempo máximo (em segundos) de espera pela resposta
+        max_retries {int} -- Quantidade máxima de novas tentativas por requisição
+        backoff_base {float} -- Espera base (em segundos) antes da primeira nova tentativa, dobrada a cada tentativa
+        backoff_max {float} -- Espera máxima (em segundos) entre tentativas
+        pool_size {int} -- Quantidade de conexões mantidas abertas por host
+    """
+    def __init__(self, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX, pool_size: int = POOL_SIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = HttpMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size, max_retries = 0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def backoff(self, attempt: int) -> float:
+        """Tempo de espera antes da nova tentativa de número "attempt" (começando em 0), com jitter completo."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> requests.Response:
+        """Realiza uma requisição GET, tentando novamente em erros 5xx, timeouts e conexões interrompidas.
+        Retorna a última resposta obtida; caso a última tentativa termine em erro de conexão, a exceção é propagada.
+
+        Arguments:
+            url {str} -- URL que irá receber a requisição
+            params {Optional[dict]} -- Parâmetros da query string
+            headers {Optional[dict]} -- Cabeçalhos adicionais da requisição
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params = params, headers = headers, timeout = self.timeout)
+            except RETRYABLE_ERRORS:
+                self.metrics.record_error(time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                self.metrics.record_response(response, time.perf_counter() - start)
+                if response.status_code < 500 or attempt == self.max_retries:
+                    return response
+
+            self.metrics.record_retry()
+            time.sleep(self.backoff(attempt))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+session = ScrapSession()
+
+def get_http_metrics() -> dict:
+    """Retorna os contadores das requisições feitas pela sessão compartilhada do scraper."""
+    return session.metrics.snapshot()
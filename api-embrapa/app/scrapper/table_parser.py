@@ -0,0 +1,136 @@
+import hashlib
+import re
+from html.parser import HTMLParser
+from typing import Optional
+
+TableRows = tuple[list[str], list[list[str]]]
+
+
+class TableRowsParser(HTMLParser):
+    """Tokenizador incremental que lê apenas as linhas da primeira tabela com a classe informada, sem montar a árvore
+    do documento. Ao final, "columns" contém os nomes das colunas (células th) e "rows" os valores de cada linha de
+    dados (células td), na mesma lógica de structure_table: a última linha da tabela (total) é descartada.
+
+    Arguments:
+        table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+    """
+    def __init__(self, table_attr: str):
+        super().__init__(convert_charrefs = True)
+        self.table_attr = table_attr
+        self.columns: Optional[list[str]] = None
+        self.rows: list[list[str]] = []
+        self.found = False
+        self.done = False
+
+        self._depth = 0             # Profundidade de tabelas abertas dentro da tabela de dados
+        self._row: Optional[list[tuple[str, str]]] = None
+        self._cell: Optional[list[str]] = None
+        self._cell_tag: Optional[str] = None
+        self._all_rows: list[list[tuple[str, str]]] = []
+
+    def _is_target(self, attrs: list[tuple[str, Optional[str]]]) -> bool:
+        classes = dict(attrs).get('class') or ''
+        return classes == self.table_attr or self.table_attr in classes.split()
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._row.append((self._cell_tag, ''.join(self._cell).strip()))
+            self._cell = self._cell_tag = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self._all_rows.append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if not self.found:
+            if tag == 'table' and self._is_target(attrs):
+                self.found = True
+                self._depth = 1
+            return
+
+        if tag == 'table':
+            self._depth += 1
+        elif tag == 'tr':
+            self._close_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._close_cell()
+            self._cell, self._cell_tag = [], tag
+
+    def handle_endtag(self, tag):
+        if not self.found or self.done:
+            return
+        if tag == 'table':
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_row()
+                self._finish()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag == self._cell_tag:
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and not self.done:
+            self._cell.append(data)
+
+    def _finish(self):
+        self.done = True
+        last = len(self._all_rows) - 1
+        for n, row in enumerate(self._all_rows):
+            # Linhas com células th contêm os nomes das colunas
+            if any(tag == 'th' for tag, _ in row):
+                self.columns = [text for tag, text in row if tag == 'th']
+                continue
+
+            # A última linha é o total e é descartada
+            if n == last:
+                break
+
+            self.rows.append([text for tag, text in row if tag == 'td'])
+
+
+def _table_slice(html: str, table_attr: str) -> str:
+    # Recorta o trecho do html entre a abertura da tabela de dados e o primeiro "</table>" seguinte, para que o
+    # tokenizador não precise percorrer o restante da página. Se houver tabelas aninhadas, o documento inteiro é usado.
+    start = re.search(r'<table\b[^>]*\bclass\s*=\s*["\']?' + re.escape(table_attr), html, re.IGNORECASE)
+    if not start:
+        return html
+    end = html.lower().find('</table>', start.end())
+    if end == -1 or '<table' in html[start.end():end].lower():
+        return html[start.start():]
+    return html[start.start():end + len('</table>')]
+
+
+def table_fingerprint(html: str, table_attr: str) -> str:
+    """Retorna o hash (sha256, em hexadecimal) do trecho do html com a tabela de dados. Mudanças no restante da página
+    (menus, rodapé) não alteram o hash; qualquer mudança na tabela, sim.
+
+    Arguments:
+        html {str} -- Html de uma página do site da Embrapa
+        table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+    """
+    return hashlib.sha256(_table_slice(html, table_attr).encode('utf-8')).hexdigest()
+
+
+def extract_table_rows(html: str, table_attr: str) -> Optional[TableRows]:
+    """Extrai os nomes das colunas e as linhas de dados da primeira tabela com a classe informada, sem montar a árvore
+    do documento. Retorna None se a tabela não for encontrada.
+
+    Arguments:
+        html {str} -- Html de uma página do site da Embrapa
+        table_attr {str} -- Classe da tabela, escrita no html obtido de uma requisição (ex.: "tb_base tb_dados").
+    """
+    parser = TableRowsParser(table_attr)
+    parser.feed(_table_slice(html, table_attr))
+    parser.close()
+    if not parser.found:
+        return None
+    if not parser.done:
+        parser._close_row()
+        parser._finish()
+    return parser.columns, parser.rows
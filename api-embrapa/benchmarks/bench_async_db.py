@@ -0,0 +1,109 @@
+"""Compara a concorrência de um endpoint de dados síncrono (def + Session, executado no pool de threads da API) com o
+mesmo endpoint assíncrono (async def + AsyncSession), com a mesma quantidade fixa de threads no pool.
+
+Cada consulta recebe uma latência artificial (--latencia-ms) para simular a ida e volta até um banco remoto: no
+endpoint síncrono a thread fica parada durante a espera, enquanto no assíncrono a espera não ocupa nenhuma thread da API.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_async_db --threads 8 --concorrencia 64 --requisicoes 512 --latencia-ms 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{directory}/bench.db'
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30')):
+    os.environ.setdefault(name, value)
+
+import anyio.to_thread
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk_loader import load_dataframe
+from app.core.database import Base, SessionLocal, async_engine, engine, get_async_db, get_db
+from app.models.export_scraped_data import ExportScrapedData
+from benchmarks.bench_bulk_load import COLUMNS, NATURAL_KEY, synthetic_frame
+
+
+def page_query(latency_ms: int):
+    # Página de 100 linhas de um ano, com a latência artificial calculada uma única vez por consulta
+    table = ExportScrapedData.__table__
+    delay = select(func.sleep_ms(latency_ms)).scalar_subquery()
+    return select(*table.columns).where(table.c.ano == 1980, delay == 0).order_by(table.c.id).limit(100)
+
+
+def build_app(latency_ms: int) -> FastAPI:
+    app = FastAPI()
+    query = page_query(latency_ms)
+
+    @app.get('/sync')
+    def sync_page(db=Depends(get_db)):
+        return [dict(row) for row in db.execute(query).mappings()]
+
+    @app.get('/async')
+    async def async_page(db: AsyncSession = Depends(get_async_db)):
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    return app
+
+
+def register_sleep(dbapi_connection, _):
+    dbapi_connection.create_function('sleep_ms', 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+async def load(app: FastAPI, path: str, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200 and len(response.json()) == 100, response.text[:300]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(requests)))
+        return time.perf_counter() - start, sorted(latencies)
+
+
+async def run(args) -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    app = build_app(args.latencia_ms)
+    print(f'threads no pool da API: {args.threads}, concorrência: {args.concorrencia}, '
+          f'requisições: {args.requisicoes}, latência por consulta: {args.latencia_ms}ms, '
+          f'pool do banco: {engine.pool.size()} + {engine.pool._max_overflow} extras')
+    for name, path in (('def + Session', '/sync'), ('async def + AsyncSession', '/async')):
+        await load(app, path, args.concorrencia, args.concorrencia)  # aquecimento do pool de conexões
+        elapsed, latencies = await load(app, path, args.requisicoes, args.concorrencia)
+        print(f'{name:<26} {args.requisicoes / elapsed:7.0f} req/s  p50 {statistics.median(latencies) * 1000:7.1f}ms  '
+              f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concorrencia', type=int, default=64)
+    parser.add_argument('--requisicoes', type=int, default=512)
+    parser.add_argument('--latencia-ms', type=int, default=100)
+    args = parser.parse_args()
+
+    # A função precisa ser registrada antes da primeira conexão de cada pool
+    event.listen(engine, 'connect', register_sleep)
+    event.listen(async_engine.sync_engine, 'connect', register_sleep)
+    Base.metadata.create_all(engine, tables=[ExportScrapedData.__table__])
+    with SessionLocal() as db:
+        load_dataframe(db, ExportScrapedData, synthetic_frame(20_000), COLUMNS, NATURAL_KEY)
+        db.commit()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Teste de carga da autenticação: faz várias requisições autenticadas a um endpoint que não consulta o banco
+(/scrap/jobs) e conta os comandos SQL executados por requisição, sem e com o cache de usuários autenticados.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_auth_cache --requisicoes 2000 --threads 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{directory}/bench.db'
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30'),
+                    ('SNAPSHOT_DIR', '')):
+    os.environ.setdefault(name, value)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from app.api.authentication.security import user_cache
+from app.core.database import engine
+
+
+def run(client: TestClient, requests: int, threads: int) -> tuple[float, int]:
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            statuses = list(executor.map(lambda _: client.get('/scrap/jobs').status_code, range(requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert set(statuses) == {200}, f'respostas inesperadas: {set(statuses)}'
+    return elapsed, statements
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with TestClient(main.app) as client:
+        client.post('/users/create', json={'email': 'bench@example.com', 'password': 'benchmark'})
+        token = client.post('/auth/token', data={'username': 'bench@example.com', 'password': 'benchmark'}).json()
+        client.headers['Authorization'] = f"Bearer {token['access_token']}"
+
+        ttl = user_cache.ttl
+        print(f'requisições: {args.requisicoes}, threads: {args.threads}')
+        for name, cache_ttl in (('sem cache', 0), (f'com cache (ttl {ttl}s)', ttl)):
+            user_cache.ttl = cache_ttl
+            elapsed, statements = run(client, args.requisicoes, args.threads)
+            print(f'{name:<22} {statements / args.requisicoes:6.3f} comandos SQL/requisição '
+                  f'{args.requisicoes / elapsed:8.0f} requisições/s')
+        print(f'cache: {user_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,85 @@
+"""Compara as funções de tratamento de dados (tipo_produto_as_column e clean_numeric_column) com as versões
+anteriores, baseadas em iterrows e em várias buscas com str.contains, sobre um dataframe sintético.
+
+A versão anterior é muito lenta para 1 milhão de linhas, então ela é medida sobre uma amostra menor (que também é
+usada para validar que os resultados são iguais) e o seu tempo para o dataframe completo é estimado.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_cleaning --linhas 1000000 --linhas-versao-anterior 20000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.scrapper.scrap import clean_numeric_column, tipo_produto_as_column
+
+NUMERIC_COLUMN = 'Quantidade (L.)'
+
+
+def legacy_tipo_produto_as_column(df: pd.DataFrame) -> pd.DataFrame:
+    coluna = df.columns[0]
+    for index, row in df.iterrows():
+        if row[coluna].isupper():
+            tipo_produto = df.loc[index, coluna].capitalize()
+            df.loc[index, 'tipo_produto'] = tipo_produto
+        else:
+            df.loc[index, 'tipo_produto'] = tipo_produto
+    df = df[~df[coluna].str.isupper()]
+    return df
+
+
+def legacy_clean_numeric_column(df: pd.DataFrame, numeric_columns: list) -> pd.DataFrame:
+    for column in numeric_columns:
+        df[column] = df[column].str.replace('.', '')
+        df = df[(~df[column].str.contains('-')) &
+                (~df[column].str.contains('nd')) &
+                (~df[column].str.contains(r'\*'))].dropna(axis=0, how='any')
+        df[column] = df[column].astype(int)
+    return df
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Gera um dataframe no formato das abas produção/comercialização: um tipo de produto (maiúsculo) a cada 10 linhas,
+    quantidades com pontos de milhar e alguns valores ausentes ("-", "nd" e "*")."""
+    rng = np.random.default_rng(seed)
+    produtos = np.where(np.arange(rows) % 10 == 0,
+                        np.char.add('TIPO ', (np.arange(rows) // 10 % 50).astype(str)),
+                        np.char.add('Produto ', (np.arange(rows) % 10).astype(str))).astype(object)
+    quantidades = pd.Series(rng.integers(0, 10**9, rows)).map('{:,}'.format).str.replace(',', '.').to_numpy(object)
+    missing = rng.random(rows)
+    quantidades[missing < 0.03] = '-'
+    quantidades[(missing >= 0.03) & (missing < 0.04)] = 'nd'
+    quantidades[(missing >= 0.04) & (missing < 0.045)] = '*'
+    return pd.DataFrame({'Produto': produtos, NUMERIC_COLUMN: quantidades, 'ano': rng.integers(1970, 2024, rows)})
+
+
+def run(tipo_produto, clean, df: pd.DataFrame) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    result = clean(tipo_produto(df.copy()), [NUMERIC_COLUMN])
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--linhas-versao-anterior', type=int, default=20_000)
+    args = parser.parse_args()
+
+    sample = synthetic_frame(args.linhas_versao_anterior)
+    legacy, legacy_elapsed = run(legacy_tipo_produto_as_column, legacy_clean_numeric_column, sample)
+    vectorized, _ = run(tipo_produto_as_column, clean_numeric_column, sample)
+    pd.testing.assert_frame_equal(legacy, vectorized, check_dtype=False)
+
+    full = synthetic_frame(args.linhas)
+    _, elapsed = run(tipo_produto_as_column, clean_numeric_column, full)
+    legacy_estimate = legacy_elapsed * args.linhas / args.linhas_versao_anterior
+
+    print(f'versão anterior: {legacy_elapsed:8.2f}s para {args.linhas_versao_anterior} linhas '
+          f'(estimado {legacy_estimate:.0f}s para {args.linhas})')
+    print(f'vetorizada:      {elapsed:8.2f}s para {args.linhas} linhas ({legacy_estimate / elapsed:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
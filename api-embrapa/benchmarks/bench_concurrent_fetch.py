@@ -0,0 +1,62 @@
+"""Compara o tempo de scraping com requisições em série e concorrentes, usando o servidor local fake_vitibrasil.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_concurrent_fetch --latencia 0.05 --workers 1 4 8 16
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from app.scrapper import scrap
+from benchmarks.fake_vitibrasil import FakeVitibrasil
+
+SCRAPERS = {
+    'producao': scrap.scrap_producao,
+    'processamento': scrap.scrap_processamento,
+    'comercializacao': scrap.scrap_comercializacao,
+    'importacao': scrap.scrap_importacao,
+    'exportacao': scrap.scrap_exportacao,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência simulada por página, em segundos')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--abas', nargs='+', default=['producao', 'importacao'], choices=SCRAPERS)
+    args = parser.parse_args()
+
+    # Sem limite por host e sem cache de páginas, para medir apenas o efeito da concorrência
+    scrap.rate_limiter = scrap.HostRateLimiter(0)
+    scrap.page_cache = None
+
+    with FakeVitibrasil(latencia=args.latencia) as server:
+        scrap.embrapa_url = server.url
+        for aba in args.abas:
+            reference = None
+            for workers in args.workers:
+                server.requisicoes = 0
+                scrap.session.metrics.reset()
+                start = time.perf_counter()
+                df = SCRAPERS[aba](max_workers=workers)
+                elapsed = time.perf_counter() - start
+
+                if reference is None:
+                    reference = df
+                    speedup = ''
+                else:
+                    # O resultado precisa ser idêntico (inclusive na ordem das linhas) ao da execução em série
+                    pd.testing.assert_frame_equal(reference, df)
+                    speedup = f'{baseline / elapsed:5.1f}x'
+                if workers == args.workers[0]:
+                    baseline = elapsed
+                http = scrap.session.metrics.snapshot()
+                print(f'{aba:<16} workers={workers:<3} páginas={server.requisicoes:<4} '
+                      f'linhas={len(df):<7} tempo={elapsed:7.2f}s {speedup:>6} '
+                      f'(rede: {http["latency_seconds"]["sum"]:6.2f}s somados, {http["bytes"] / 1e6:.1f} MB, '
+                      f'{http["retries"]} novas tentativas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compara a resposta antiga dos endpoints de dados (todas as linhas carregadas como objetos ORM e serializadas em um
+único JSON) com a exportação em streaming (NDJSON/CSV lidos do banco com cursor do lado do servidor), medindo o tempo
+até o primeiro bloco, o tempo total e o pico de memória alocada.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_data_export --linhas 200000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{directory}/bench.db'
+# Valores usados apenas para importar os módulos da API (o benchmark não gera tokens)
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30')):
+    os.environ.setdefault(name, value)
+
+from fastapi.encoders import jsonable_encoder
+import json
+
+from app.api.endpoints.data_api import iter_rows
+from app.core.bulk_loader import load_dataframe
+from app.core.database import Base, SessionLocal, engine
+from app.models.export_scraped_data import ExportScrapedData
+from benchmarks.bench_bulk_load import COLUMNS, NATURAL_KEY, synthetic_frame
+
+
+def legacy_response() -> str:
+    db = SessionLocal()
+    try:
+        return json.dumps(jsonable_encoder(db.query(ExportScrapedData).all()))
+    finally:
+        db.close()
+
+
+def measure(name: str, chunks) -> None:
+    # Os tempos são medidos em uma execução sem o tracemalloc, que deixa a alocação de memória bem mais lenta.
+    # O coletor de lixo é executado antes, para que os objetos da medição anterior não pesem nesta.
+    gc.collect()
+    start = time.perf_counter()
+    first_chunk, size = None, 0
+    for chunk in chunks():
+        first_chunk = first_chunk or time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for chunk in chunks():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{name:<24} primeiro bloco {first_chunk * 1000:8.1f} ms   total {elapsed:6.2f} s   '
+          f'pico de memória {peak / 2**20:7.1f} MiB   {size / 2**20:6.1f} MiB gerados')
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--linhas', type = int, default = 200_000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine, tables = [ExportScrapedData.__table__])
+    with SessionLocal() as db:
+        load_dataframe(db, ExportScrapedData, synthetic_frame(args.linhas), COLUMNS, NATURAL_KEY)
+        db.commit()
+    print(f'linhas: {args.linhas}')
+
+    measure('JSON (.all())', lambda: [legacy_response()])
+    measure('streaming NDJSON', lambda: iter_rows(ExportScrapedData, None, 'id', 'ndjson'))
+    measure('streaming CSV', lambda: iter_rows(ExportScrapedData, None, 'id', 'csv'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Rajada de logins (/auth/token) concorrentes enquanto outro cliente consulta um endpoint autenticado (/scrap/jobs),
+comparando o pool de hashes limitado (HASH_MAX_WORKERS/HASH_MAX_QUEUE) com um pool praticamente sem limite, que
+equivale ao comportamento antigo (cada thread da API calculando o próprio hash).
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_login_burst --logins 200 --threads 32
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{directory}/bench.db'
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30'),
+                    ('SNAPSHOT_DIR', '')):
+    os.environ.setdefault(name, value)
+
+from fastapi.testclient import TestClient
+
+import main
+from app.api.authentication import security
+from app.api.authentication.hashing import HashingPool
+
+CREDENTIALS = {'username': 'bench@example.com', 'password': 'benchmark'}
+
+
+def burst(client: TestClient, logins: int, threads: int) -> dict:
+    stop = threading.Event()
+    latencies = []
+
+    def probe():
+        # Cliente que consulta um endpoint leve durante a rajada, medindo o tempo de resposta
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/scrap/jobs')
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        statuses = list(executor.map(lambda _: client.post('/auth/token', data=CREDENTIALS).status_code,
+                                     range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+
+    latencies.sort()
+    return {'elapsed': elapsed, 'ok': statuses.count(200), 'rejected': statuses.count(429),
+            'p50': statistics.median(latencies), 'p99': latencies[int(len(latencies) * 0.99) - 1],
+            'probes': len(latencies)}
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with TestClient(main.app) as client:
+        client.post('/users/create', json={'email': CREDENTIALS['username'], 'password': CREDENTIALS['password']})
+        token = client.post('/auth/token', data=CREDENTIALS).json()['access_token']
+        client.headers['Authorization'] = f'Bearer {token}'
+
+        bounded = security.hashing_pool
+        pools = [(f'sem limite ({args.threads} threads)', HashingPool(bounded.password_hash, args.threads, args.logins)),
+                 (f'limitado ({bounded.max_workers} threads, fila {bounded.max_queue})', bounded)]
+        print(f'logins: {args.logins}, threads de login: {args.threads}')
+        for name, pool in pools:
+            security.hashing_pool = pool
+            result = burst(client, args.logins, args.threads)
+            print(f"{name:<32} {result['elapsed']:6.2f}s  logins ok: {result['ok']:4d}  429: {result['rejected']:4d}  "
+                  f"/scrap/jobs p50 {result['p50'] * 1000:7.1f}ms p99 {result['p99'] * 1000:7.1f}ms")
+        security.hashing_pool = bounded
+        print(f"pool limitado: {bounded.stats()['hash_seconds']}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,55 @@
+"""Compara o scraping sem cache, com o cache de páginas vazio (frio), com o cache válido (quente) e com o cache vencido
+(revalidação por ETag, respostas 304), usando o servidor local fake_vitibrasil.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_page_cache --latencia 0.05 --aba importacao
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from app.scrapper import scrap
+from app.scrapper.cache import PageCache
+from benchmarks.bench_concurrent_fetch import SCRAPERS
+from benchmarks.fake_vitibrasil import FakeVitibrasil
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência simulada por página, em segundos')
+    parser.add_argument('--aba', default='importacao', choices=SCRAPERS)
+    parser.add_argument('--workers', type=int, default=scrap.MAX_WORKERS)
+    args = parser.parse_args()
+
+    scrap.rate_limiter = scrap.HostRateLimiter(0)
+    scraper = SCRAPERS[args.aba]
+
+    with FakeVitibrasil(latencia=args.latencia) as server, tempfile.TemporaryDirectory() as directory:
+        scrap.embrapa_url = server.url
+        cache = PageCache(directory)
+        reference = None
+
+        for name, page_cache in [('sem cache', None), ('cache frio', cache), ('cache quente', cache),
+                                 ('cache vencido (304)', cache)]:
+            if name.startswith('cache vencido'):
+                cache.closed_year_ttl = cache.open_ttl = 0
+            scrap.page_cache = page_cache
+            server.requisicoes = 0
+
+            start = time.perf_counter()
+            df = scraper(max_workers=args.workers)
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = df
+            else:
+                pd.testing.assert_frame_equal(reference, df)
+            print(f'{name:<20} tempo={elapsed:7.2f}s requisições={server.requisicoes}')
+
+        print('estatísticas do cache:', cache.stats())
+
+
+if __name__ == '__main__':
+    main()
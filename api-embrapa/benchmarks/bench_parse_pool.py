@@ -0,0 +1,70 @@
+"""Mede a extração das tabelas (motor "stream") de um histórico completo de páginas no próprio processo e no pool de
+processos (app/scrapper/parse_pool.py) com 1 a N processos, do mesmo jeito que a etapa "parse" do pipeline usa o pool:
+uma thread por processo, cada uma enviando o html de uma página e esperando as linhas da tabela.
+
+As páginas são as gravadas em app/fixtures (ou em um diretório de gravações, veja app/scrapper/recorder.py), repetidas
+até a quantidade de páginas pedida.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_parse_pool --paginas 400 --processos 1,2,4,8
+    python -m benchmarks.bench_parse_pool --gravacoes recordings
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.scrapper.parse_pool import ParsePool
+from app.scrapper.table_parser import extract_table_rows
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / 'app' / 'fixtures'
+TABLE_ATTR = 'tb_base tb_dados'
+
+
+def parse_in_process(pages: list[str]) -> int:
+    return sum(len(extract_table_rows(html, TABLE_ATTR)[1]) for html in pages)
+
+
+def parse_in_pool(pages: list[str], processes: int) -> tuple[int, float]:
+    pool = ParsePool(processes, min_pages = 0)
+    try:
+        # Inicia os processos antes da medição (no servidor, o pool é criado uma vez e reaproveitado entre os scraps)
+        pool.parse(pages[0], TABLE_ATTR)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(processes) as threads:
+            rows = sum(len(table_rows[1]) for table_rows in threads.map(lambda html: pool.parse(html, TABLE_ATTR), pages))
+        return rows, time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paginas', type=int, default=400, help='Quantidade de páginas extraídas em cada medição')
+    parser.add_argument('--processos', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})),
+                        help='Quantidades de processos medidas, separadas por vírgula')
+    parser.add_argument('--gravacoes', type=Path, default=FIXTURES_DIR, help='Diretório com as páginas gravadas')
+    args = parser.parse_args()
+
+    recorded = [path.read_text(encoding='utf-8') for path in sorted(args.gravacoes.glob('*.html'))]
+    recorded = [html for html in recorded if extract_table_rows(html, TABLE_ATTR) is not None]
+    pages = list(itertools.islice(itertools.cycle(recorded), args.paginas))
+    print(f'{len(pages)} páginas ({len(recorded)} gravações distintas, {sum(map(len, pages)) / 2**20:.1f} MiB), '
+          f'{os.cpu_count()} núcleos')
+
+    start = time.perf_counter()
+    expected = parse_in_process(pages)
+    baseline = time.perf_counter() - start
+    print(f'{"no próprio processo":<22} {baseline:6.2f}s {len(pages) / baseline:8.0f} páginas/s')
+
+    for processes in (int(n) for n in args.processos.split(',')):
+        rows, elapsed = parse_in_pool(pages, processes)
+        assert rows == expected, f'{processes} processos: {rows} linhas, esperado {expected}'
+        print(f'{f"pool, {processes} processos":<22} {elapsed:6.2f}s {len(pages) / elapsed:8.0f} páginas/s '
+              f'{baseline / elapsed:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
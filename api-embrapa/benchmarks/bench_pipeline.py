@@ -0,0 +1,99 @@
+"""Compara o scrap + gravação no banco da aba importação no fluxo antigo (baixa todas as páginas, concatena, trata e só
+então grava) com o pipeline (páginas baixadas, lidas, tratadas e gravadas ao mesmo tempo, com filas limitadas), usando
+o servidor local de benchmarks/fake_vitibrasil.py. Mede o tempo total, o pico de memória alocada (tracemalloc, em uma
+segunda execução) e mostra as medições de cada etapa do pipeline.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_pipeline --latencia 0.05 --workers 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30')):
+    os.environ.setdefault(name, value)
+
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.scrapper.registry import COMERCIO_EXTERIOR_COLUMNS
+from app.core.bulk_loader import load_dataframe
+from app.core.database import Base
+from app.models.import_scraped_data import ImportScrapedData
+from app.scrapper import scrap
+from benchmarks.fake_vitibrasil import FakeVitibrasil
+
+NATURAL_KEY = ('paises', 'classificacao_derivado', 'ano')
+
+
+def sequential(db, workers: int) -> int:
+    # Fluxo anterior ao pipeline: todas as páginas em memória antes do tratamento, e todas as linhas antes da gravação
+    aba = 'importacao'
+    sub_options = scrap.get_available_suboptions(scrap.embrapa_url, aba)
+    requests_plan = scrap.build_request_plan(scrap.embrapa_url, aba, sub_options, workers)
+    pages = scrap.fetch_pages(scrap.embrapa_url, aba, requests_plan, workers)
+    dfs = [scrap.parse_table(html, 'tb_base tb_dados').assign(ano = ano).assign(classificacao_derivado = sub_options[sub_option])
+           for (sub_option, ano), html in zip(requests_plan, pages)]
+    data = scrap.clean_numeric_column(pd.concat(dfs), ['Quantidade (Kg)', 'Valor (US$)'], drop_invalid = False)
+    return load_dataframe(db, ImportScrapedData, data, COMERCIO_EXTERIOR_COLUMNS, NATURAL_KEY)
+
+
+def pipelined(db, workers: int, timings: dict) -> int:
+    rows = 0
+
+    def write(subopcao, ano, page):
+        nonlocal rows
+        rows += load_dataframe(db, ImportScrapedData, page, COMERCIO_EXTERIOR_COLUMNS, NATURAL_KEY)
+
+    scrap.scrap_importacao(max_workers = workers, write = write, timings = timings.update)
+    return rows
+
+
+def measure(strategy, Session, engine, memory: bool) -> tuple[float, int, int]:
+    Base.metadata.drop_all(engine, tables = [ImportScrapedData.__table__])
+    Base.metadata.create_all(engine, tables = [ImportScrapedData.__table__])
+    if memory:
+        tracemalloc.start()
+    with Session() as db:
+        start = time.perf_counter()
+        rows = strategy(db)
+        db.commit()
+        elapsed = time.perf_counter() - start
+        assert db.scalar(select(func.count()).select_from(ImportScrapedData)) == rows
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+    return elapsed, rows, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia', type=float, default=0.05, help='Atraso (em segundos) de cada resposta do servidor')
+    parser.add_argument('--workers', type=int, default=8, help='Requisições simultâneas')
+    args = parser.parse_args()
+
+    scrap.page_cache = None
+    scrap.rate_limiter = scrap.HostRateLimiter(0)
+    with tempfile.TemporaryDirectory() as directory, FakeVitibrasil(latencia = args.latencia) as server:
+        scrap.embrapa_url = server.url
+        engine = create_engine(f'sqlite:///{directory}/bench.db')
+        Session = sessionmaker(bind = engine)
+        print(f'aba importacao, latência {args.latencia}s, {args.workers} requisições simultâneas')
+        timings, traced_timings = {}, {}
+        for name, strategy, traced in (('sequencial (antigo)', lambda db: sequential(db, args.workers), None),
+                                       ('pipeline', lambda db: pipelined(db, args.workers, timings),
+                                        lambda db: pipelined(db, args.workers, traced_timings))):
+            elapsed, rows, _ = measure(strategy, Session, engine, memory = False)
+            _, _, peak = measure(traced or strategy, Session, engine, memory = True)
+            print(f'{name:<20} {elapsed:6.2f}s  {rows} linhas  pico de memória {peak / 2**20:6.1f} MiB')
+    # Medições da execução sem tracemalloc, que deixa as etapas em Python bem mais lentas
+    print(json.dumps(timings, indent = 1))
+
+
+if __name__ == '__main__':
+    main()
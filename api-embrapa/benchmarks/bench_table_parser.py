@@ -0,0 +1,42 @@
+"""Micro-benchmark dos motores de extração de tabelas ("bs4" e "stream") sobre as páginas salvas em app/fixtures.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_table_parser --repeticoes 200
+"""
+import argparse
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from app.scrapper.scrap import parse_table
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / 'app' / 'fixtures'
+TABLE_ATTR = 'tb_base tb_dados'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=100)
+    parser.add_argument('--fixtures', type=Path, default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    totals = {'bs4': 0.0, 'stream': 0.0}
+    for path in sorted(args.fixtures.glob('*.html')):
+        html = path.read_text(encoding='utf-8')
+        pd.testing.assert_frame_equal(parse_table(html, TABLE_ATTR, 'bs4'), parse_table(html, TABLE_ATTR, 'stream'))
+
+        timings = {engine: min(timeit.repeat(lambda: parse_table(html, TABLE_ATTR, engine), number=args.repeticoes,
+                                             repeat=3)) / args.repeticoes
+                   for engine in totals}
+        for engine, elapsed in timings.items():
+            totals[engine] += elapsed
+        print(f'{path.name:<40} bs4={timings["bs4"] * 1e3:7.2f}ms stream={timings["stream"] * 1e3:7.2f}ms '
+              f'{timings["bs4"] / timings["stream"]:5.1f}x')
+
+    print(f'{"total":<40} bs4={totals["bs4"] * 1e3:7.2f}ms stream={totals["stream"] * 1e3:7.2f}ms '
+          f'{totals["bs4"] / totals["stream"]:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compara o cálculo das tendências (variação anual, média móvel, participação e CAGR) a cada consulta, a partir das
+linhas da aba, com a leitura das tabelas de resumo gravadas ao final do scrap por refresh_trends.
+
+Uso (a partir da pasta api-embrapa):
+    python -m benchmarks.bench_trends --linhas 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30')):
+    os.environ.setdefault(name, value)
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.bulk_loader import load_dataframe
+from app.core.database import Base
+from app.core.trends import compute_trends, refresh_trends
+from app.models.export_scraped_data import ExportScrapedData
+from app.models.trend_data import TrendGrowthData, TrendYearlyData
+from benchmarks.bench_bulk_load import COLUMNS, NATURAL_KEY, synthetic_frame
+
+
+def per_request(db, item: str) -> tuple[list, list]:
+    # O que um endpoint precisaria fazer sem as tabelas de resumo: ler as linhas da aba e calcular tudo a cada consulta
+    table = ExportScrapedData.__table__
+    columns = ['classificacao_derivado', 'paises', 'ano', 'quantidade', 'valor']
+    data = pd.DataFrame(db.execute(select(*(table.c[column] for column in columns))).all(), columns = columns)
+    yearly, growth = compute_trends(data, 'classificacao_derivado', 'paises', ['quantidade', 'valor'])
+    return yearly[yearly['item'] == item].to_dict('records'), growth.nlargest(10, 'cagr').to_dict('records')
+
+
+def materialized(db, item: str) -> tuple[list, list]:
+    yearly = db.execute(select(TrendYearlyData).where(TrendYearlyData.aba == 'exportacao',
+                                                      TrendYearlyData.medida == 'valor',
+                                                      TrendYearlyData.item == item)).all()
+    growth = db.execute(select(TrendGrowthData).where(TrendGrowthData.aba == 'exportacao',
+                                                      TrendGrowthData.medida == 'valor')
+                                               .order_by(TrendGrowthData.cagr.desc()).limit(10)).all()
+    return yearly, growth
+
+
+def best_of(repeat: int, function, *args) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f'sqlite:///{directory}/bench.db')
+        Base.metadata.create_all(engine, tables=[ExportScrapedData.__table__, TrendYearlyData.__table__,
+                                                 TrendGrowthData.__table__])
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            load_dataframe(db, ExportScrapedData, synthetic_frame(args.linhas), COLUMNS, NATURAL_KEY)
+            db.commit()
+
+            start = time.perf_counter()
+            rows = refresh_trends(db, 'exportacao', ExportScrapedData, TrendYearlyData, TrendGrowthData)
+            db.commit()
+            print(f'linhas: {args.linhas}, refresh_trends (ao final do scrap): {rows} linhas anuais em '
+                  f'{time.perf_counter() - start:.2f}s')
+
+            computed = best_of(args.repeticoes, per_request, db, 'País 042')
+            read = best_of(args.repeticoes, materialized, db, 'País 042')
+            print(f"{'cálculo a cada consulta':<28} {computed * 1000:9.1f}ms")
+            print(f"{'tabelas de resumo':<28} {read * 1000:9.1f}ms {computed / read:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Servidor HTTP local que imita as páginas do site vitibrasil da Embrapa.
+
+As páginas são geradas de forma determinística para cada combinação de (opcao, subopcao, ano), com a mesma estrutura
+de html que o scraper espera encontrar (botões de subopção, label com a faixa de anos e a tabela "tb_base tb_dados").
+É usado pelos benchmarks para medir o scraper sem depender do site real.
+
+Uso:
+    python -m benchmarks.fake_vitibrasil --port 8000 --latencia 0.05
+"""
+import argparse
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+ANO_INICIO = 1970
+ANO_FIM = 2023
+
+PAISES = [f'País {n:03d}' for n in range(1, 141)]
+
+CATEGORIAS_PRODUCAO = {
+    'VINHO DE MESA': ['Tinto', 'Branco', 'Rosado'],
+    'VINHO FINO DE MESA (VINIFERA)': ['Tinto', 'Branco', 'Rosado'],
+    'SUCO': ['Suco de uva integral', 'Suco de uva concentrado', 'Suco de uva adoçado', 'Suco de uva orgânico'],
+    'DERIVADOS': ['Espumante', 'Espumante moscatel', 'Base espumante', 'Bebida de uva', 'Coquetel', 'Filtrado',
+                  'Jeropiga', 'Mistelas', 'Néctar de uva', 'Polpa de uva', 'Vinagre', 'Vinho composto'],
+}
+
+CATEGORIAS_PROCESSAMENTO = {
+    'TINTAS': [f'Cultivar tinta {n:02d}' for n in range(1, 41)],
+    'BRANCAS E ROSADAS': [f'Cultivar branca {n:02d}' for n in range(1, 41)],
+}
+
+# Configuração de cada aba: subopções (valor -> texto do botão) e colunas da tabela
+ABAS = {
+    'opt_02': {'titulo': 'Produção de vinhos, sucos e derivados do Rio Grande do Sul', 'subopcoes': {},
+               'colunas': ['Produto', 'Quantidade (L.)'], 'categorias': CATEGORIAS_PRODUCAO},
+    'opt_03': {'titulo': 'Quantidade de uvas processadas no Rio Grande do Sul',
+               'subopcoes': {'subopt_01': 'Viníferas', 'subopt_02': 'Americanas e híbridas',
+                             'subopt_03': 'Uvas de mesa', 'subopt_04': 'Sem classificação'},
+               'colunas': ['Cultivar', 'Quantidade (Kg)'], 'categorias': CATEGORIAS_PROCESSAMENTO},
+    'opt_04': {'titulo': 'Comercialização de vinhos e derivados no Rio Grande do Sul', 'subopcoes': {},
+               'colunas': ['Produto', 'Quantidade (L.)'], 'categorias': CATEGORIAS_PRODUCAO},
+    'opt_05': {'titulo': 'Importação de derivados de uva',
+               'subopcoes': {'subopt_01': 'Vinhos de mesa', 'subopt_02': 'Espumantes', 'subopt_03': 'Uvas frescas',
+                             'subopt_04': 'Uvas passas', 'subopt_05': 'Suco de uva'},
+               'colunas': ['Países', 'Quantidade (Kg)', 'Valor (US$)'], 'categorias': None},
+    'opt_06': {'titulo': 'Exportação de derivados de uva',
+               'subopcoes': {'subopt_01': 'Vinhos de mesa', 'subopt_02': 'Espumantes', 'subopt_03': 'Uvas frescas',
+                             'subopt_04': 'Suco de uva'},
+               'colunas': ['Países', 'Quantidade (Kg)', 'Valor (US$)'], 'categorias': None},
+}
+
+
+def _valor(*chave) -> str:
+    """Gera um valor numérico determinístico, no formato do site (pontos como separador de milhar, '-' e 'nd')."""
+    numero = int(hashlib.md5(repr(chave).encode()).hexdigest()[:10], 16)
+    if numero % 23 == 0:
+        return '-'
+    if numero % 97 == 0:
+        return 'nd'
+    return f'{numero % 50_000_000:,}'.replace(',', '.')
+
+
+def _linhas(opcao: str, subopcao: Optional[str], ano: int) -> list[tuple[str, list[str], str]]:
+    aba = ABAS[opcao]
+    linhas = []
+    if aba['categorias'] is None:
+        for pais in PAISES:
+            linhas.append(('', [pais, _valor(opcao, subopcao, ano, pais, 'kg'), _valor(opcao, subopcao, ano, pais, 'us')], ''))
+        return linhas
+
+    if opcao == 'opt_03' and subopcao == 'subopt_04':
+        return [('', ['Sem definição', _valor(opcao, subopcao, ano)], '')]
+
+    for categoria, itens in aba['categorias'].items():
+        linhas.append(('tb_item', [categoria, _valor(opcao, subopcao, ano, categoria)], ''))
+        for item in itens:
+            linhas.append(('tb_subitem', [item, _valor(opcao, subopcao, ano, categoria, item)], ''))
+    return linhas
+
+
+def render_page(opcao: str, subopcao: Optional[str] = None, ano: Optional[int] = None) -> str:
+    """Gera o html de uma página do site para a aba, subopção e ano informados.
+
+    Sem ano, a página exibe o último ano disponível; sem subopção, exibe a primeira subopção da aba (como o site real).
+    """
+    aba = ABAS[opcao]
+    if aba['subopcoes'] and subopcao not in aba['subopcoes']:
+        subopcao = next(iter(aba['subopcoes']))
+    if ano is None or not ANO_INICIO <= ano <= ANO_FIM:
+        ano = ANO_FIM
+
+    colunas = list(aba['colunas'])
+    if opcao == 'opt_03' and subopcao == 'subopt_04':
+        colunas[0] = 'Sem definição'
+
+    botoes = ''.join(f'<button type="submit" class="btn_sopt" name="subopcao" value="{valor}">{texto}</button>\n'
+                     for valor, texto in aba['subopcoes'].items())
+    cabecalho = ''.join(f'<th>{coluna}</th>' for coluna in colunas)
+    corpo = ''.join(
+        '<tr>' + ''.join(f'<td class="{classe}">\n\t\t\t\t{valor}\t\t\t</td>' if classe else f'<td>{valor}</td>'
+                         for valor in valores) + '</tr>\n'
+        for classe, valores, _ in _linhas(opcao, subopcao, ano))
+    total = '<tr><td>Total</td>' + '<td>-</td>' * (len(colunas) - 1) + '</tr>'
+
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="utf-8"><title>Banco de dados de uva, vinho e derivados</title></head>
+<body>
+<table class="tb_base tb_header no_print"><tr><td><img src="logo.png" alt="Embrapa"></td></tr></table>
+<form action="index.php" method="get">
+<table class="tb_base tb_conteudo">
+<tr><td class="col_left no_print">
+{''.join(f'<button type="submit" class="btn_opt" name="opcao" value="{valor}">{valor}</button>' for valor in ABAS)}
+</td>
+<td class="col_center" id="row_main">
+<div class="content_center">
+<input type="hidden" name="opcao" value="{opcao}">
+{botoes}
+<label class="lbl_pesq">Ano: [{ANO_INICIO}-{ANO_FIM}]</label>
+<input type="number" class="text_pesq" name="ano" min="{ANO_INICIO}" max="{ANO_FIM}">
+<p class="text_center">{aba['titulo']} [{ano}]</p>
+<table class="tb_base tb_dados">
+<thead><tr>{cabecalho}</tr></thead>
+<tbody>
+{corpo}</tbody>
+<tfoot class="tb_total">{total}</tfoot>
+</table>
+</div>
+</td></tr>
+</table>
+</form>
+</body>
+</html>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'FakeVitibrasil'
+
+    def do_GET(self):
+        params = {chave: valores[0] for chave, valores in parse_qs(urlsplit(self.path).query).items()}
+        opcao = params.get('opcao', 'opt_02')
+        if opcao not in ABAS:
+            self.send_error(404)
+            return
+        ano = params.get('ano')
+
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        with self.server.lock:
+            self.server.requisicoes += 1
+
+        body = render_page(opcao, params.get('subopcao'), int(ano) if ano and ano.isdigit() else None).encode('utf-8')
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.server.validators and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if self.server.validators:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Mon, 01 Jul 2024 00:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeVitibrasil(ThreadingHTTPServer):
+    """Servidor local com as páginas geradas por `render_page`, executado em uma thread em segundo plano.
+
+    Arguments:
+        latencia {float} -- Atraso (em segundos) adicionado a cada resposta, simulando a latência do site real.
+        validators {bool} -- Se verdadeiro, envia ETag/Last-Modified e responde 304 a requisições condicionais.
+    """
+    daemon_threads = True
+
+    def __init__(self, latencia: float = 0.0, port: int = 0, validators: bool = True):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latencia = latencia
+        self.validators = validators
+        self.requisicoes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latencia', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeVitibrasil(latencia=args.latencia, port=args.port)
+    print(f'Servindo páginas em {server.url}')
+    server.serve_forever()
@@ -0,0 +1,179 @@
+"""Suíte do pytest-benchmark com os tempos de cada etapa do scrap, sem acessar o site da Embrapa: cada função scrap_*
+(com as páginas lidas de uma gravação, veja app/scrapper/recorder.py), a extração da tabela (structure_table e o motor
+"stream"), as funções de tratamento e as etapas de gravação no banco (carga, tendências e snapshot Parquet).
+
+Por padrão, as páginas são gravadas uma vez a partir do servidor local de benchmarks/fake_vitibrasil.py. Para medir com
+as páginas reais, grave-as antes (por exemplo, rodando os testes com SCRAP_HTTP_MODE=record SCRAP_RECORD_DIR=recordings)
+e informe o diretório em SCRAP_BENCH_RECORD_DIR; os anos medidos (SCRAP_BENCH_ANOS) precisam estar na gravação.
+
+Uso (a partir da pasta api-embrapa):
+    python -m pytest benchmarks/test_bench_scrapper.py --benchmark-group-by=group
+    python -m pytest benchmarks/test_bench_scrapper.py --benchmark-autosave          # grava o resultado em .benchmarks/
+    python -m pytest benchmarks/test_bench_scrapper.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import os
+import tempfile
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+for name, value in (('SECRET_KEY', 'benchmark'), ('ALGORITHM', 'HS256'), ('ACCESS_TOKEN_EXPIRE_MINUTES', '30')):
+    os.environ.setdefault(name, value)
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.scrapper.registry import COMERCIO_EXTERIOR_COLUMNS
+from app.core.bulk_loader import load_dataframe
+from app.core.database import Base
+from app.core.snapshots import SnapshotStore
+from app.core.trends import refresh_trends
+from app.models.import_scraped_data import ImportScrapedData
+from app.models.trend_data import TrendGrowthData, TrendYearlyData
+from app.scrapper import scrap
+from app.scrapper.recorder import PageRecorder
+from benchmarks.fake_vitibrasil import FakeVitibrasil
+
+ANOS = [int(ano) for ano in os.getenv('SCRAP_BENCH_ANOS', '2018,2019,2020').split(',')]
+TABLE_ATTR = 'tb_base tb_dados'
+IMPORTACAO_NATURAL_KEY = ('paises', 'classificacao_derivado', 'ano')
+
+SCRAPERS = [scrap.scrap_producao, scrap.scrap_processamento, scrap.scrap_comercializacao, scrap.scrap_importacao,
+            scrap.scrap_exportacao]
+
+
+@pytest.fixture(scope='session')
+def record_dir(tmp_path_factory):
+    directory = os.getenv('SCRAP_BENCH_RECORD_DIR')
+    if directory:
+        return directory
+
+    # Grava as páginas das cinco abas a partir do servidor local, sem cache de páginas nem limite de requisições
+    directory = str(tmp_path_factory.mktemp('recordings'))
+    recorder, url, cache, limiter = scrap.page_recorder, scrap.embrapa_url, scrap.page_cache, scrap.rate_limiter
+    with FakeVitibrasil() as server:
+        scrap.embrapa_url, scrap.page_cache = server.url, None
+        scrap.page_recorder = PageRecorder(directory, 'record')
+        scrap.rate_limiter = scrap.HostRateLimiter(0)
+        try:
+            for scraper in SCRAPERS:
+                scraper(anos = ANOS)
+        finally:
+            scrap.page_recorder, scrap.embrapa_url, scrap.page_cache, scrap.rate_limiter = recorder, url, cache, limiter
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def replay(record_dir, monkeypatch):
+    monkeypatch.setattr(scrap, 'page_recorder', PageRecorder(record_dir, 'replay'))
+
+
+@pytest.fixture(scope='session')
+def importacao_data(record_dir) -> pd.DataFrame:
+    recorder, scrap.page_recorder = scrap.page_recorder, PageRecorder(record_dir, 'replay')
+    try:
+        return scrap.scrap_importacao(anos = ANOS)
+    finally:
+        scrap.page_recorder = recorder
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine, tables = [ImportScrapedData.__table__, TrendYearlyData.__table__,
+                                               TrendGrowthData.__table__])
+    with sessionmaker(bind = engine)() as session:
+        yield session
+
+
+# ------------- Funções de scrap (páginas lidas da gravação) -------------
+@pytest.mark.benchmark(group='scrap')
+@pytest.mark.parametrize('scraper', SCRAPERS, ids = lambda scraper: scraper.__name__)
+def test_scrap(benchmark, scraper):
+    data = benchmark(scraper, anos = ANOS, max_workers = 1)
+    assert not data.empty
+
+
+# ------------- Extração das tabelas -------------
+@pytest.fixture(scope='session')
+def processamento_html(record_dir) -> str:
+    return PageRecorder(record_dir).load('processamento', 'subopt_01', ANOS[-1])
+
+
+@pytest.mark.benchmark(group='parse')
+def test_structure_table(benchmark, processamento_html):
+    soup = BeautifulSoup(processamento_html, 'html.parser')
+    assert not benchmark(scrap.structure_table, soup, TABLE_ATTR).empty
+
+
+@pytest.mark.benchmark(group='parse')
+@pytest.mark.parametrize('engine', ['bs4', 'stream'])
+def test_parse_table(benchmark, processamento_html, engine):
+    assert not benchmark(scrap.parse_table, processamento_html, TABLE_ATTR, engine).empty
+
+
+# ------------- Funções de tratamento -------------
+@pytest.fixture(scope='session')
+def producao_raw(record_dir) -> pd.DataFrame:
+    recorder = PageRecorder(record_dir)
+    return pd.concat([scrap.parse_table(recorder.load('producao', None, ano), TABLE_ATTR).assign(ano = ano)
+                      for ano in ANOS]).reset_index(drop = True)
+
+
+@pytest.mark.benchmark(group='clean')
+def test_tipo_produto_as_column(benchmark, producao_raw):
+    assert 'tipo_produto' in benchmark(scrap.tipo_produto_as_column, producao_raw)
+
+
+@pytest.mark.benchmark(group='clean')
+def test_clean_numeric_column(benchmark, producao_raw):
+    data = scrap.tipo_produto_as_column(producao_raw)
+    assert not benchmark(scrap.clean_numeric_column, data, ['Quantidade (L.)']).empty
+
+
+# ------------- Gravação no banco (etapas de run_scrap) -------------
+@pytest.mark.benchmark(group='db')
+def test_load_dataframe_insert(benchmark, db, importacao_data):
+    def setup():
+        db.query(ImportScrapedData).delete()
+        db.commit()
+
+    def load():
+        load_dataframe(db, ImportScrapedData, importacao_data, COMERCIO_EXTERIOR_COLUMNS, IMPORTACAO_NATURAL_KEY)
+        db.commit()
+
+    benchmark.pedantic(load, setup = setup, rounds = 5)
+
+
+@pytest.mark.benchmark(group='db')
+def test_load_dataframe_upsert_unchanged(benchmark, db, importacao_data):
+    def load():
+        load_dataframe(db, ImportScrapedData, importacao_data, COMERCIO_EXTERIOR_COLUMNS, IMPORTACAO_NATURAL_KEY)
+        db.commit()
+
+    load()
+    benchmark.pedantic(load, rounds = 5)
+
+
+@pytest.mark.benchmark(group='db')
+def test_refresh_trends(benchmark, db, importacao_data):
+    load_dataframe(db, ImportScrapedData, importacao_data, COMERCIO_EXTERIOR_COLUMNS, IMPORTACAO_NATURAL_KEY)
+    db.commit()
+
+    def refresh():
+        refresh_trends(db, 'importacao', ImportScrapedData, TrendYearlyData, TrendGrowthData)
+        db.commit()
+
+    benchmark.pedantic(refresh, rounds = 5)
+
+
+@pytest.mark.benchmark(group='db')
+def test_snapshot_update(benchmark, db, importacao_data):
+    load_dataframe(db, ImportScrapedData, importacao_data, COMERCIO_EXTERIOR_COLUMNS, IMPORTACAO_NATURAL_KEY)
+    db.commit()
+    data = importacao_data[list(COMERCIO_EXTERIOR_COLUMNS)].rename(columns = COMERCIO_EXTERIOR_COLUMNS)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(directory)
+        benchmark.pedantic(store.update, args = (db, 'importacao', ImportScrapedData, data,
+                                                 ('classificacao_derivado', 'ano')), rounds = 5)
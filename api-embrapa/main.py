@@ -3,8 +3,15 @@ from contextlib import asynccontextmanager
 from app.api.endpoints import scrap_api
 from app.api.endpoints import data_api
 from app.api.endpoints import users_api
+from app.api.endpoints import metrics_api
 from app.api.authentication import auth
-from app.core.database import init_db
+from app.core.database import SessionLocal, async_engine, init_db
+from app.core.migrations import upgrade_schema
+from app.core.jobs import job_manager
+from app.api.authentication.security import hashing_pool
+from app.scrapper.parse_pool import parse_pool
+from app.core.trends import refresh_missing_trends
+from app.models.trend_data import TrendYearlyData, TrendGrowthData
 import yaml
 from fastapi.openapi.utils import get_openapi
 
@@ -12,9 +19,18 @@ from fastapi.openapi.utils import get_openapi
 async def lifespan(app: FastAPI):
     # Setup (executado ao iniciar a aplicação)
     init_db()
+    for change in upgrade_schema():
+        print(f'Schema atualizado: {change}')
+    with SessionLocal() as db:
+        for aba in refresh_missing_trends(db, data_api.ABA_MODELS, TrendYearlyData, TrendGrowthData):
+            print(f'Tendências calculadas: {aba}')
     yield
-    # Cleanup (executado ao desligar a aplicação)
-    pass
+    # Cleanup (executado ao desligar a aplicação): cancela os jobs de scrap e os hashes de senha que ainda estão na fila
+    # e encerra os processos de extração de tabelas
+    job_manager.shutdown()
+    hashing_pool.shutdown()
+    parse_pool.shutdown()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -32,4 +48,5 @@ app.openapi = custom_openapi
 app.include_router(users_api.router, prefix='/users', tags=['users'])
 app.include_router(auth.router, prefix='/auth', tags=['auth'])
 app.include_router(scrap_api.router, prefix='/scrap', tags=['scrap'])
-app.include_router(data_api.router)
\ No newline at end of file
+app.include_router(data_api.router)
+app.include_router(metrics_api.router, tags=['metrics'])
\ No newline at end of file